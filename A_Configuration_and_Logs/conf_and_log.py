@@ -1,18 +1,32 @@
 from configparser import ConfigParser
 import logging
+from A_Configuration_and_Logs.log_setup import start_logging
 
 
 class ConfLog:
     """ Provide full absolute path to config.ini file: """
     config_ini_path = 'D:/A_STUDIUM/PYTHON/UASFRA-MS-ProjektIntellSys/A_Configuration_and_Logs/config.ini'
 
-    def __init__(self):
+    def __init__(self, overrides: dict = None):
+        """ overrides: settings that replace the ones in config.ini, e.g. {'D_Search': {'decimals': 2}} """
+        """ The settings are only read here and never changed afterwards, so one ConfLog can be shared by threads """
+        self.overrides = overrides
         self.config = ConfigParser()
         self.config.read(self.config_ini_path)
+        if overrides:
+            self.config.read_dict({section: {key: str(value) for key, value in settings.items()}
+                                   for section, settings in overrides.items()})
         self.logging_path = self.config['A_Configuration_and_Logs']['log_file_path_and_name']
+        self.log_format = self.config['A_Configuration_and_Logs']['log_format']
+        self.log_level = self.config['A_Configuration_and_Logs']['log_level'].upper()
+        self.console_log_level = self.config['A_Configuration_and_Logs']['console_log_level'].upper()
+        self.debug_rate_limit = int(self.config['A_Configuration_and_Logs']['debug_rate_limit'])
+        self.debug_rate_interval = float(self.config['A_Configuration_and_Logs']['debug_rate_interval'])
+        """ The queue listener is started only once per run, any further ConfLog just logs into its queue """
+        start_logging(log_path=self.logging_path, log_format=self.log_format, file_level=self.log_level,
+                      console_level=self.console_log_level, debug_max_records=self.debug_rate_limit,
+                      debug_interval=self.debug_rate_interval)
         self.logging = logging
-        self.logging.basicConfig(filename=self.logging_path, level=logging.ERROR,
-                                 format='%(asctime)s %(message)s', datefmt='%m/%d/%Y %I:%M:%S %p')
         self.path_to_input_directory = self.config['C_File_Conversion']['path_to_input_directory']
         self.path_to_output_directory = self.config['C_File_Conversion']['path_to_output_directory']
         self.pdf24_tool = self.config['C_File_Conversion']['pdf24_tool']
@@ -31,6 +45,28 @@ class ConfLog:
             self.config['D_Search']['min_num_int_digits_in_searched_value'])
         self.find_word_decimals = int(self.config['D_Search']['decimals'])
         self.find_word_unit_list = eval(self.config['D_Search']['unit_list'])
+        self.find_word_page_dedup = self.config['D_Search'].getboolean('page_dedup')
+        self.find_word_page_store_path = self.config['D_Search']['page_store_path']
+        self.find_word_page_fingerprint_grid = float(self.config['D_Search']['page_fingerprint_grid'])
+        self.find_word_document_memo = self.config['D_Search'].getboolean('document_memo')
+        self.find_word_document_store_path = self.config['D_Search']['document_store_path']
+        self.find_word_early_stop = self.config['D_Search'].getboolean('early_stop')
+        self.find_word_early_stop_min_num_of_values = int(self.config['D_Search']['early_stop_min_num_of_values'])
+        self.find_word_page_priority = self.config['D_Search'].getboolean('page_priority')
+        self.find_word_page_priority_terms = eval(self.config['D_Search']['page_priority_terms'])
+        self.find_word_backend = self.config['D_Search']['backend']
+        self.find_word_corpus_index_path = self.config['D_Search']['corpus_index_path']
+        self.find_word_font_cache_size = int(self.config['D_Search']['font_cache_size'])
+        self.find_word_approximate = self.config['D_Search'].getboolean('approximate')
+        self.find_word_approximate_max_errors = int(self.config['D_Search']['approximate_max_errors'])
+        self.find_word_approximate_min_length = int(self.config['D_Search']['approximate_min_length'])
+        self.find_word_multi_year = self.config['D_Search'].getboolean('multi_year')
+        self.find_word_multi_year_min_years = int(self.config['D_Search']['multi_year_min_years'])
+        self.find_word_sentence_segmentation = self.config['D_Search']['sentence_segmentation']
+        self.sentence_corpus_enabled = self.config['D_Search.SentenceCorpus'].getboolean('enabled')
+        self.sentence_corpus_path = self.config['D_Search.SentenceCorpus']['path']
+        self.sentence_corpus_expected_sentences = int(self.config['D_Search.SentenceCorpus']['expected_sentences'])
+        self.sentence_corpus_false_positive_rate = float(self.config['D_Search.SentenceCorpus']['false_positive_rate'])
         self.extract_number_of_vals_to_include = int(
             self.config['F_Extract']['number_of_vals_to_include'])
         self.extract_number_of_table_vals_to_include = int(
@@ -39,6 +75,25 @@ class ConfLog:
             self.config['F_Extract']['number_of_text_vals_to_include'])
         self.extract_number_of_neighbour_vals_to_include = int(
             self.config['F_Extract']['number_of_neighbour_vals_to_include'])
+        self.extract_batch_size = int(self.config['F_Extract']['batch_size'])
+        self.sweep_ground_truth_path = self.config['F_Extract.Sweep']['ground_truth_path']
+        self.sweep_max_workers = int(self.config['F_Extract.Sweep']['max_workers'])
+        self.prefetch_depth = int(self.config['F_Extract.Prefetch']['depth'])
+        self.prefetch_mode = self.config['F_Extract.Prefetch']['mode']
+        self.scheduler_max_workers = int(self.config['F_Extract.Scheduler']['max_workers'])
+        self.scheduler_mode = self.config['F_Extract.Scheduler']['mode']
+        self.scheduler_history_path = self.config['F_Extract.Scheduler']['history_path']
+        self.scheduler_report_path = self.config['F_Extract.Scheduler']['report_path']
+        self.profiling_enabled = self.config['F_Extract.Profiling'].getboolean('enabled')
+        self.profiling_sample_rate = float(self.config['F_Extract.Profiling']['sample_rate'])
+        self.profiling_top_n = int(self.config['F_Extract.Profiling']['top_n'])
+        self.profiling_directory = self.config['F_Extract.Profiling']['directory']
+        self.pipeline_queue_size = int(self.config['F_Extract.Pipeline']['queue_size'])
+        self.pipeline_read_concurrency = int(self.config['F_Extract.Pipeline']['read_concurrency'])
+        self.pipeline_layout_concurrency = int(self.config['F_Extract.Pipeline']['layout_concurrency'])
+        self.pipeline_search_concurrency = int(self.config['F_Extract.Pipeline']['search_concurrency'])
+        self.pipeline_extract_concurrency = int(self.config['F_Extract.Pipeline']['extract_concurrency'])
+        self.pipeline_sink_concurrency = int(self.config['F_Extract.Pipeline']['sink_concurrency'])
         self.pdfminer_layout_line_overlap = float(self.config['D_Search.PDFMiner.LayoutOptions']['line_overlap'])
         self.pdfminer_layout_char_margin = float(self.config['D_Search.PDFMiner.LayoutOptions']['char_margin'])
         self.pdfminer_layout_line_margin = float(self.config['D_Search.PDFMiner.LayoutOptions']['line_margin'])
@@ -46,3 +101,9 @@ class ConfLog:
         self.pdfminer_layout_boxes_flow = float(self.config['D_Search.PDFMiner.LayoutOptions']['boxes_flow'])
         self.pdfminer_layout_detect_vertical = bool(self.config['D_Search.PDFMiner.LayoutOptions']['detect_vertical'])
         self.pdfminer_layout_all_texts = bool(self.config['D_Search.PDFMiner.LayoutOptions']['all_texts'])
+        self.pdfminer_layout_engine = self.config['D_Search.PDFMiner.LayoutOptions']['layout_engine']
+
+    def get_section_settings(self, *sections: str) -> dict:
+        """ Raw settings of the given sections without any paths, e.g. as input for a config fingerprint """
+        return {section: {key: value for key, value in self.config[section].items() if 'path' not in key}
+                for section in sections}
@@ -0,0 +1,181 @@
+import sys
+import copy
+import json
+import time
+import atexit
+import logging
+import logging.handlers
+import threading
+import multiprocessing
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+""" Queue based logging: every process (main process and workers) only puts its log records into ONE queue
+    (QueueHandler, never blocks on the file), a single QueueListener in the main process writes them to the log file
+    (plain text or JSON lines) and to the console. Every record carries the context of the document, page and stage
+    it was logged in (see log_context). Debug records are rate limited per message.
+
+    Worker processes that are forked inherit the QueueHandler. Worker processes that are spawned (e.g. on Windows)
+    must call configure_worker_logging(queue) with the queue of get_log_queue() in their initializer.
+"""
+
+LOG_CONTEXT_FIELDS = ('document', 'page', 'stage')
+
+_log_context = ContextVar('log_context', default={})
+_log_queue = None
+_log_listener = None
+
+
+@contextmanager
+def log_context(**context):
+    """ with log_context(document='report.pdf', stage='search'): ... -> all records within get these fields """
+    token = _log_context.set({**_log_context.get(), **context})
+    try:
+        yield
+    finally:
+        _log_context.reset(token)
+
+
+def set_log_context(**context):
+    """ Sets fields (e.g. the page number) in the current context without a with-block """
+    _log_context.set({**_log_context.get(), **context})
+
+
+class LogContextFilter(logging.Filter):
+    """ Adds document, page and stage of the current log_context to the record (before it leaves the process) """
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        context = _log_context.get()
+        for field in LOG_CONTEXT_FIELDS:
+            if not hasattr(record, field):
+                setattr(record, field, context.get(field))
+        return True
+
+
+class DebugRateLimitFilter(logging.Filter):
+    """ Lets at most max_records debug records of the same message (template) pass per interval (in seconds).
+    Records of level INFO and higher are never dropped. Thread safe (the worker threads of the thread mode log at the
+    same time). """
+
+    def __init__(self, max_records: int = 10, interval: float = 1.0):
+        super().__init__()
+        self.max_records = max_records
+        self.interval = interval
+        self.windows = dict()
+        self.lock = threading.Lock()
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if record.levelno > logging.DEBUG or self.max_records <= 0:
+            return True
+        now = time.monotonic()
+        key = (record.name, record.msg if isinstance(record.msg, str) else type(record.msg).__name__)
+        with self.lock:
+            window_start, count = self.windows.get(key, (now, 0))
+            if now - window_start >= self.interval:
+                window_start, count = now, 0
+            self.windows[key] = (window_start, count + 1)
+        return count < self.max_records
+
+
+class JsonLinesFormatter(logging.Formatter):
+    """ One JSON object per line: time, level, logger, message, document, page, stage (and the traceback) """
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {'time': self.formatTime(record, '%Y-%m-%dT%H:%M:%S'), 'level': record.levelname,
+                 'logger': record.name, 'process': record.process, 'message': record.getMessage()}
+        for field in LOG_CONTEXT_FIELDS:
+            entry[field] = getattr(record, field, None)
+        if record.exc_info:
+            entry['exception'] = self.formatException(record.exc_info)
+        elif record.exc_text:
+            entry['exception'] = record.exc_text
+        return json.dumps(entry, default=str)
+
+
+class TextFormatter(logging.Formatter):
+    """ The format of the error.log so far, plus the context fields that are set """
+
+    def __init__(self):
+        super().__init__(fmt='%(asctime)s %(message)s', datefmt='%m/%d/%Y %I:%M:%S %p')
+
+    def format(self, record: logging.LogRecord) -> str:
+        text = super().format(record)
+        context = ' '.join(f'{field}={getattr(record, field)}' for field in LOG_CONTEXT_FIELDS if
+                           getattr(record, field, None) is not None)
+        return f'{text} [{context}]' if context else text
+
+
+class _QueueHandler(logging.handlers.QueueHandler):
+    """ The message is formatted in the process that logs it. The traceback is kept apart as text (exc_text),
+    because the traceback object itself can not be sent to another process. """
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        record = copy.copy(record)
+        record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+
+def get_log_queue():
+    return _log_queue
+
+
+def _add_queue_handler(queue, level: int, debug_max_records: int, debug_interval: float):
+    root_logger = logging.getLogger()
+    for handler in list(root_logger.handlers):
+        root_logger.removeHandler(handler)
+    queue_handler = _QueueHandler(queue)
+    queue_handler.addFilter(LogContextFilter())
+    queue_handler.addFilter(DebugRateLimitFilter(max_records=debug_max_records, interval=debug_interval))
+    root_logger.addHandler(queue_handler)
+    root_logger.setLevel(level)
+
+
+def configure_worker_logging(queue, level: int = logging.DEBUG, debug_max_records: int = 10,
+                             debug_interval: float = 1.0):
+    """ For the initializer of worker processes: all records go into the queue of the listener """
+    global _log_queue
+    _log_queue = queue
+    _add_queue_handler(queue=queue, level=level, debug_max_records=debug_max_records, debug_interval=debug_interval)
+
+
+def start_logging(log_path: str, log_format: str = 'text', file_level: str = 'ERROR', console_level: str = 'INFO',
+                  debug_max_records: int = 10, debug_interval: float = 1.0):
+    """ Starts the single listener (once per run, further calls do nothing). Records of file_level and higher go to
+    the log file ("text" or "jsonl"), records of console_level and higher to stderr. """
+    global _log_queue, _log_listener
+    if _log_queue is not None:
+        return
+    if log_format == 'jsonl':
+        file_formatter = JsonLinesFormatter()
+    elif log_format == 'text':
+        file_formatter = TextFormatter()
+    else:
+        raise ValueError(f'Unknown log_format {log_format} ! Use "text" or "jsonl". ')
+    file_handler = logging.FileHandler(log_path, encoding='utf-8')
+    file_handler.setLevel(file_level)
+    file_handler.setFormatter(file_formatter)
+    console_handler = logging.StreamHandler(sys.stderr)
+    console_handler.setLevel(console_level)
+    console_handler.setFormatter(logging.Formatter('%(message)s'))
+    _log_queue = multiprocessing.Queue(-1)
+    _log_listener = logging.handlers.QueueListener(_log_queue, file_handler, console_handler,
+                                                   respect_handler_level=True)
+    _log_listener.start()
+    atexit.register(stop_logging)
+    _add_queue_handler(queue=_log_queue, level=min(logging.getLevelName(file_level),
+                                                   logging.getLevelName(console_level)),
+                       debug_max_records=debug_max_records, debug_interval=debug_interval)
+
+
+def stop_logging():
+    """ Writes all records that are still in the queue and stops the listener """
+    global _log_listener
+    if _log_listener is not None:
+        _log_listener.stop()
+        for handler in _log_listener.handlers:
+            handler.close()
+        _log_listener = None
@@ -0,0 +1,180 @@
+import math
+from typing import List, Tuple, Dict, Iterable
+
+""" Approximate keyword matching for reports that went through OCR (C_File_Conversion), where "Scope 1" may come out
+    as "Scope l", "Sc0pe 1", "SCOPE 1" or "Scopel". Instead of adding every variant to keyword_dict_of_lists:
+
+    1. Folding: upper case and the typical OCR confusables (l/I/| -> 1, o -> 0, z -> 2, s -> 5, subscript digits) are
+       mapped to one character each, for the keywords and the text lines alike. Folded matches cost nothing.
+    2. Prefilter (pigeonhole): the keyword is split into k + 1 pieces, an occurrence with at most k edits contains at
+       least one of them unchanged. This is checked with plain substring tests (in C) for all keywords of a list at
+       once (the pieces of "Scope 1", "Scope 2", ... are mostly the same), so lines without any keyword cost about as
+       much as the exact "keyword in line" test.
+    3. Bitap (bit-parallel, Wu-Manber) finds the end positions of occurrences with at most k edits (insertions,
+       deletions, substitutions) in the remaining lines.
+    4. Verification: an alignment of every candidate yields its start and its edit distance. Digits of the keyword
+       are protected: they can not be substituted or deleted (only folded), so "Scope 2" never matches "Scope 1".
+
+    The positions refer to the original line (folding does not change the length), like the positions of
+    get_first_last_indices_of_keyword_in_string. The keywords of the matching sentences (text values) are looked up
+    the same way (see get_keyword_matchers and D_Search/SentenceIndex.py).
+"""
+
+_CONFUSABLES = {'l': '1', 'i': '1', '|': '1', '!': '1', 'o': '0', 'z': '2', 's': '5', '₀': '0', '₁': '1', '₂': '2',
+                '₃': '3', '₄': '4', '₅': '5', '₆': '6', '₇': '7', '₈': '8', '₉': '9', '\xa0': ' '}
+_FOLD_TABLE = str.maketrans({**{chr(code): _CONFUSABLES.get(chr(code).lower(), chr(code).lower()) for code in
+                                range(ord('A'), ord('Z') + 1)}, **_CONFUSABLES})
+
+
+def fold(text: str) -> str:
+    """ One character for one character (positions are kept) """
+    return text.translate(_FOLD_TABLE)
+
+
+class ApproximateKeyword:
+
+    def __init__(self, keyword: str, max_errors: int = 1, min_length: int = 6):
+        self.keyword = keyword
+        self.pattern = fold(keyword)
+        """ Short keywords (e.g. "CO2e") are only folded, an edit would match too much """
+        self.max_errors = max_errors if len(keyword.replace(' ', '')) >= min_length else 0
+        self.protected = [char.isdigit() for char in keyword]
+        piece_length = len(self.pattern) // (self.max_errors + 1)
+        """ (offset in the pattern, piece) """
+        self.offset_pieces = [(index * piece_length, self.pattern[index * piece_length:(index + 1) * piece_length if
+                                                                  index < self.max_errors else len(self.pattern)])
+                              for index in range(self.max_errors + 1)]
+        self.pieces = [piece for _, piece in self.offset_pieces]
+        self.masks: Dict[str, int] = dict()
+        for index, char in enumerate(self.pattern):
+            self.masks[char] = self.masks.get(char, 0) | (1 << index)
+        self.match_bit = 1 << (len(self.pattern) - 1)
+
+    def may_occur_in(self, folded_line: str) -> bool:
+        return any(piece in folded_line for piece in self.pieces)
+
+    def get_windows(self, folded_line: str) -> List[Tuple[int, int]]:
+        """ The parts of the line around the pieces that were found: only there an occurrence is possible """
+        windows = list()
+        for offset, piece in self.offset_pieces:
+            position = folded_line.find(piece)
+            while position >= 0:
+                windows.append((max(0, position - offset - self.max_errors),
+                                min(len(folded_line), position - offset + len(self.pattern) + self.max_errors)))
+                position = folded_line.find(piece, position + 1)
+        merged = list()
+        for start, end in sorted(windows):
+            if len(merged) > 0 and start <= merged[-1][1]:
+                merged[-1] = (merged[-1][0], max(merged[-1][1], end))
+            else:
+                merged.append((start, end))
+        return merged
+
+    def iter_candidate_ends(self, folded_line: str, start: int = 0, stop: int = None) -> Iterable[int]:
+        """ Bitap: end positions (exclusive) of occurrences with at most max_errors edits in folded_line[start:stop] """
+        k = self.max_errors
+        """ states[d]: bit i is set if pattern[:i + 1] matches a suffix of the text read so far with <= d edits """
+        states = [(1 << d) - 1 for d in range(k + 1)]
+        for position, char in enumerate(folded_line[start:stop], start=start):
+            mask = self.masks.get(char, 0)
+            previous = states[0]
+            states[0] = ((previous << 1) | 1) & mask
+            for d in range(1, k + 1):
+                old = states[d]
+                """ match | insertion (text char) | substitution | deletion (pattern char) """
+                states[d] = (((old << 1) | 1) & mask) | previous | (previous << 1) | (states[d - 1] << 1) | 1
+                previous = old
+            if states[k] & self.match_bit:
+                yield position + 1
+
+    def align(self, folded_line: str, end: int) -> Tuple[int, int] or None:
+        """ (start, edits) of the best occurrence ending at end, with the digits of the keyword protected """
+        pattern = self.pattern
+        if end >= len(pattern) and folded_line.startswith(pattern, end - len(pattern)):
+            return end - len(pattern), 0
+        window_start = max(0, end - len(pattern) - self.max_errors)
+        window = folded_line[window_start:end]
+        infinite = math.inf
+        """ costs[i][j]: edits to align pattern[:i] with a suffix of window[:j], starts[i][j]: its start """
+        costs = [[0] * (len(window) + 1)]
+        starts = [list(range(len(window) + 1))]
+        for i in range(1, len(pattern) + 1):
+            protected = self.protected[i - 1]
+            row_costs = [costs[i - 1][0] + (infinite if protected else 1)]
+            row_starts = [starts[i - 1][0]]
+            for j in range(1, len(window) + 1):
+                if window[j - 1] == pattern[i - 1]:
+                    best, start = costs[i - 1][j - 1], starts[i - 1][j - 1]
+                else:
+                    best, start = costs[i - 1][j - 1] + (infinite if protected else 1), starts[i - 1][j - 1]
+                deletion = costs[i - 1][j] + (infinite if protected else 1)
+                if deletion < best:
+                    best, start = deletion, starts[i - 1][j]
+                insertion = row_costs[j - 1] + 1
+                if insertion < best:
+                    best, start = insertion, row_starts[j - 1]
+                row_costs.append(best)
+                row_starts.append(start)
+            costs.append(row_costs)
+            starts.append(row_starts)
+        if costs[-1][-1] > self.max_errors:
+            return None
+        return window_start + starts[-1][-1], costs[-1][-1]
+
+    def find(self, line: str, folded_line: str = None) -> List[Tuple[int, int, int]]:
+        """ (start, end, edits) of all occurrences that do not overlap (fewest edits, then shortest first) """
+        folded_line = fold(line) if folded_line is None else folded_line
+        if self.max_errors == 0:
+            matches = list()
+            start = folded_line.find(self.pattern)
+            while start >= 0:
+                matches.append((start, start + len(self.pattern), 0))
+                start = folded_line.find(self.pattern, start + 1)
+            return matches
+        candidates = set()
+        """ Ends that overlap an exact occurrence can not yield a better (or another non-overlapping) one """
+        skip_until = -1
+        for window_start, window_end in self.get_windows(folded_line=folded_line):
+            for end in self.iter_candidate_ends(folded_line=folded_line, start=window_start, stop=window_end):
+                if end < skip_until:
+                    continue
+                aligned = self.align(folded_line=folded_line, end=end)
+                if aligned is not None:
+                    candidates.add((aligned[0], end, aligned[1]))
+                    if aligned[1] == 0:
+                        skip_until = end + len(self.pattern) - self.max_errors
+        matches = list()
+        for start, end, edits in sorted(candidates, key=lambda match: (match[2], match[1] - match[0], match[0])):
+            if all(end <= other_start or start >= other_end for other_start, other_end, _ in matches):
+                matches.append((start, end, edits))
+        return sorted(matches)
+
+
+class ApproximateMatcher:
+    """ All keywords of a keyword list. Keywords that are the same after folding (e.g. "Scope 1" and "scope 1") are
+    searched only once. """
+
+    def __init__(self, keywords: List[str], max_errors: int = 1, min_length: int = 6):
+        self.keywords: Dict[tuple, ApproximateKeyword] = dict()
+        self.keyword_names: Dict[tuple, List[str]] = dict()
+        for keyword in keywords:
+            approximate_keyword = ApproximateKeyword(keyword=keyword, max_errors=max_errors, min_length=min_length)
+            key = (approximate_keyword.pattern, tuple(approximate_keyword.protected), approximate_keyword.max_errors)
+            self.keywords.setdefault(key, approximate_keyword)
+            self.keyword_names.setdefault(key, list()).append(keyword)
+        self.pieces = sorted({piece for keyword in self.keywords.values() for piece in keyword.pieces})
+
+    def find(self, line: str) -> List[Tuple[str, int, int]]:
+        """ (keyword, start, end) of every occurrence of any keyword """
+        folded_line = fold(line)
+        if not any(piece in folded_line for piece in self.pieces):
+            return list()
+        return [(name, start, end) for key, keyword in self.keywords.items() for start, end, _ in
+                keyword.find(line=line, folded_line=folded_line) for name in self.keyword_names[key]]
+
+
+def get_keyword_matchers(keywords_dict_of_list: Dict[str, List[str]], max_errors: int = 1, min_length: int = 6) -> \
+        Dict[str, ApproximateMatcher]:
+    """ keywords_key -> ApproximateMatcher of its keyword list """
+    return {keywords_key: ApproximateMatcher(keywords=keywords_list, max_errors=max_errors, min_length=min_length)
+            for keywords_key, keywords_list in keywords_dict_of_list.items()}
@@ -0,0 +1,281 @@
+import sys
+import time
+from abc import ABC, abstractmethod
+from typing import List, Iterator, Dict
+from pdfminer.layout import LAParams, LTTextContainer, LTTextLine
+
+from A_Configuration_and_Logs.conf_and_log import ConfLog
+from D_Search.DocumentSession import DocumentSession
+from D_Search.FontCache import get_font_cache
+from D_Search.PageText import PageText, TextBlock, TextLine, page_text_from_layout
+from D_Search.PagePriority import get_page_order, get_page_order_from_scores, get_page_scores
+
+""" Extraction backends: everything in D_Search after the extraction (neighbour, table and text search in
+    PDFMiner.PageSearch, page deduplication, sweep) works on PageText objects, i.e. pages of text blocks, text lines and
+    the characters with their bboxes (in pdf coordinates: origin bottom left). A backend turns a pdf document into
+    these pages. pdfminer.six is the reference backend, PyMuPDF (optional: pip install pymupdf) extracts the same
+    information with MuPDF (C) and is much faster. The backend is set in config.ini ([D_Search] backend).
+"""
+
+BACKEND_PDFMINER = 'pdfminer'
+BACKEND_PYMUPDF = 'pymupdf'
+
+
+class ExtractionBackend(ABC):
+    """ Interface of a backend """
+
+    name = None
+
+    def __init__(self, path: str, conf_log: ConfLog, data: bytes or None = None):
+        """ data: the content of the pdf doc if it was already read into memory, then path is only its name """
+        self.path = path
+        self.conf_log = conf_log
+        self.data = data
+
+    @property
+    @abstractmethod
+    def is_extractable(self) -> bool:
+        pass
+
+    @abstractmethod
+    def get_number_of_pages(self) -> int:
+        pass
+
+    @abstractmethod
+    def iter_page_texts(self, page_order: List[int] or None = None) -> Iterator[PageText]:
+        """ All pages in document order or in page_order (zero-indexed). PageText.page_number starts with 1. """
+
+    @abstractmethod
+    def get_title_texts(self) -> List[str]:
+        """ Texts of the text blocks on the first page (for the year in PDFMiner.get_year_and_fy) """
+
+    @abstractmethod
+    def get_page_order(self, priority_terms: List[str]) -> List[int]:
+        """ Pages ranked by the outline and the page labels (see D_Search/PagePriority.py) """
+
+    def close(self):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+
+class PDFMinerBackend(ExtractionBackend):
+    """ Reference backend: pdfminer.six with the LayoutOptions (and the layout engine) in config.ini """
+
+    name = BACKEND_PDFMINER
+
+    def __init__(self, path: str, conf_log: ConfLog, data: bytes or None = None):
+        ExtractionBackend.__init__(self, path=path, conf_log=conf_log, data=data)
+        """
+        My standard settings for layout parameters:
+        (line_overlap=0.5, char_margin=2.0, line_margin=0.75, word_margin=0.1, boxes_flow=0.0,
+                                                        detect_vertical=False, all_texts=True)
+        Default settings for layout parameters:
+        (line_overlap=0.5, char_margin=2.0, line_margin=0.5, word_margin=0.1,boxes_flow=0.5, detect_vertical=False,
+        all_texts=False)
+        Source: https://pdfminersix.readthedocs.io/en/latest/reference/composable.html#laparams """
+        self.layout_params = LAParams(line_overlap=conf_log.pdfminer_layout_line_overlap,
+                                      char_margin=conf_log.pdfminer_layout_char_margin,
+                                      line_margin=conf_log.pdfminer_layout_line_margin,
+                                      word_margin=conf_log.pdfminer_layout_word_margin,
+                                      boxes_flow=conf_log.pdfminer_layout_boxes_flow,
+                                      detect_vertical=conf_log.pdfminer_layout_detect_vertical,
+                                      all_texts=conf_log.pdfminer_layout_all_texts)
+        """ The file is opened (and memory-mapped) only once. Parser, document, resource manager, layout device and
+        interpreter of the session are shared by the search and the year detection. The parsed fonts are shared with
+        the other documents of the process. """
+        font_cache = get_font_cache(max_fonts=conf_log.find_word_font_cache_size) if \
+            conf_log.find_word_font_cache_size > 0 else None
+        self.session = DocumentSession(path=path, layout_params=self.layout_params,
+                                       layout_engine=conf_log.pdfminer_layout_engine, data=data,
+                                       font_cache=font_cache)
+
+    @property
+    def is_extractable(self) -> bool:
+        return self.session.document.is_extractable
+
+    def get_number_of_pages(self) -> int:
+        return len(self.session.get_pdf_pages())
+
+    def iter_page_texts(self, page_order: List[int] or None = None) -> Iterator[PageText]:
+        if page_order is None:
+            for page_number, layout in enumerate(self.session.iter_layouts(), start=1):
+                yield page_text_from_layout(layout=layout, page_number=page_number)
+        else:
+            for page_index, layout in zip(page_order, self.session.iter_layouts_in_order(page_order=page_order)):
+                yield page_text_from_layout(layout=layout, page_number=page_index + 1)
+
+    def get_title_texts(self) -> List[str]:
+        """ The title page is read (as before) with pdfminer's default layout parameters """
+        texts = list()
+        for page in self.session.iter_layouts(page_numbers=[0], maxpages=1, layout_params=LAParams()):
+            for layout_obj in page:
+                if isinstance(layout_obj, LTTextContainer) or isinstance(layout_obj, LTTextLine):
+                    texts.append(layout_obj.get_text())
+        return texts
+
+    def get_page_order(self, priority_terms: List[str]) -> List[int]:
+        page_objids = [pdf_page.pageid for pdf_page in self.session.get_pdf_pages()]
+        return get_page_order(document=self.session.document, page_objids=page_objids, priority_terms=priority_terms)
+
+    def close(self):
+        self.session.close()
+
+
+class PyMuPDFBackend(ExtractionBackend):
+    """ PyMuPDF (MuPDF) backend. MuPDF builds blocks, lines and characters (and inserts the spaces between words)
+    itself, the LayoutOptions in config.ini are NOT used. """
+
+    name = BACKEND_PYMUPDF
+
+    def __init__(self, path: str, conf_log: ConfLog, data: bytes or None = None):
+        ExtractionBackend.__init__(self, path=path, conf_log=conf_log, data=data)
+        try:
+            import pymupdf
+        except ImportError as e:
+            raise ImportError('The backend "pymupdf" needs PyMuPDF: pip install pymupdf') from e
+        self.pymupdf = pymupdf
+        self.document = pymupdf.open(path) if data is None else pymupdf.open(stream=data, filetype='pdf')
+        """ Like pdfminer's all_texts: text in figures (form xobjects) is extracted, images are not needed """
+        self.text_flags = pymupdf.TEXTFLAGS_RAWDICT & ~pymupdf.TEXT_PRESERVE_IMAGES
+
+    @property
+    def is_extractable(self) -> bool:
+        return not self.document.is_encrypted or bool(self.document.permissions & self.pymupdf.PDF_PERM_COPY)
+
+    def get_number_of_pages(self) -> int:
+        return self.document.page_count
+
+    def iter_page_texts(self, page_order: List[int] or None = None) -> Iterator[PageText]:
+        for page_index in range(self.document.page_count) if page_order is None else page_order:
+            yield self.get_page_text(page_index=page_index)
+
+    def get_page_text(self, page_index: int) -> PageText:
+        """ MuPDF's coordinates have their origin top left, PageText's (like pdfminer's) bottom left """
+        page = self.document.load_page(page_index)
+        height = page.rect.height
+        blocks = list()
+        for block in page.get_text('rawdict', flags=self.text_flags)['blocks']:
+            if block.get('type') != 0:
+                continue
+            lines = list()
+            for line in block['lines']:
+                items = [(char['c'], (char['bbox'][0], height - char['bbox'][3], char['bbox'][2],
+                                      height - char['bbox'][1])) for span in line['spans'] for char in span['chars']]
+                if len(items) > 0:
+                    """ Like pdfminer, every line ends with a line break """
+                    items.append(('\n', None))
+                    lines.append(TextLine(items=items))
+            if len(lines) > 0:
+                blocks.append(TextBlock(lines=lines))
+        return PageText(page_number=page_index + 1, width=page.rect.width, height=height, blocks=blocks)
+
+    def get_title_texts(self) -> List[str]:
+        if self.document.page_count == 0:
+            return list()
+        return [block.get_text() for block in self.get_page_text(page_index=0)]
+
+    def get_page_order(self, priority_terms: List[str]) -> List[int]:
+        number_of_pages = self.document.page_count
+        """ get_toc: [level (starting with 1), title, page (starting with 1)] """
+        outline_entries = [(level, title, page - 1) for level, title, page in self.document.get_toc(simple=True) if
+                           0 < page <= number_of_pages]
+        page_labels = [self.document[page_index].get_label() for page_index in range(number_of_pages)] if \
+            self.document.get_page_labels() else list()
+        return get_page_order_from_scores(scores=get_page_scores(outline_entries=outline_entries,
+                                                                 page_labels=page_labels,
+                                                                 number_of_pages=number_of_pages,
+                                                                 priority_terms=priority_terms))
+
+    def close(self):
+        self.document.close()
+
+
+BACKENDS = {BACKEND_PDFMINER: PDFMinerBackend, BACKEND_PYMUPDF: PyMuPDFBackend}
+
+
+def get_backend(path: str, conf_log: ConfLog, backend: str or None = None,
+                data: bytes or None = None) -> ExtractionBackend:
+    """ backend=None: the backend set in config.ini """
+    backend = conf_log.find_word_backend if backend is None else backend
+    if backend not in BACKENDS:
+        raise ValueError(f'Unknown backend: {backend} ! Use one of {list(BACKENDS.keys())}. ')
+    return BACKENDS[backend](path=path, conf_log=conf_log, data=data)
+
+
+def get_parity_report(paths: List[str], conf_log: ConfLog,
+                      backends: tuple = (BACKEND_PDFMINER, BACKEND_PYMUPDF)) -> Dict[str, dict]:
+    """ Runs the search on every pdf doc with every backend and compares the findings of the other backends with the
+    ones of the first (reference) backend: per document and per backend the run time (in seconds) and per scope and
+    approach (neighbour, table, text) the values found by both, only by the reference and only by the other backend.
+    The detected year (table_keywords) is compared as well, as every table lookup depends on it. The summary counts
+    the documents whose year and findings are identical. """
+    from D_Search.PDFMiner import PDFMiner
+    reference = backends[0]
+    report = {'documents': dict(), 'summary': {backend: {'seconds': 0.0, 'identical_documents': 0} for backend in
+                                               backends}}
+    for path in paths:
+        values_of_backends = dict()
+        table_keywords_of_backends = dict()
+        document_report = dict()
+        for backend_name in backends:
+            start = time.perf_counter()
+            miner = PDFMiner(path=path, conf_log=conf_log, backend=backend_name)
+            try:
+                table_keywords = miner.get_year_and_fy()
+                findings = miner.find_word(keywords_dict_of_list=conf_log.keyword_dict_of_lists,
+                                           search_word_list=conf_log.search_word_list,
+                                           neighbour_x_tolerance=conf_log.find_word_neighbour_x_tolerance,
+                                           neighbour_y_tolerance=conf_log.find_word_neighbour_y_tolerance,
+                                           table_keywords=table_keywords,
+                                           table_x_tolerance=conf_log.find_word_table_x_tolerance,
+                                           table_y_tolerance=conf_log.find_word_table_y_tolerance,
+                                           decimals=conf_log.find_word_decimals)
+            finally:
+                miner.close()
+            seconds = time.perf_counter() - start
+            report['summary'][backend_name]['seconds'] += seconds
+            values = dict()
+            for page_findings in findings:
+                for scope, scope_findings in page_findings.items():
+                    if isinstance(scope_findings, dict):
+                        for approach, approach_values in scope_findings.items():
+                            if isinstance(approach_values, dict):
+                                """ table_values_by_year (multi-year mode) """
+                                for year, values_of_year in approach_values.items():
+                                    values.setdefault((scope, f'{approach}.{year}'), set()).update(values_of_year)
+                            else:
+                                values.setdefault((scope, approach), set()).update(approach_values)
+            values_of_backends[backend_name] = values
+            table_keywords_of_backends[backend_name] = table_keywords
+            document_report[backend_name] = {'seconds': round(seconds, 4), 'year': table_keywords[0],
+                                             'pages_with_findings': len(findings)}
+        for backend_name in backends[1:]:
+            differences = dict()
+            if table_keywords_of_backends[reference] != table_keywords_of_backends[backend_name]:
+                differences['table_keywords'] = {reference: table_keywords_of_backends[reference],
+                                                 backend_name: table_keywords_of_backends[backend_name]}
+            for scope, approach in sorted(set(values_of_backends[reference]) | set(values_of_backends[backend_name])):
+                reference_values = values_of_backends[reference].get((scope, approach), set())
+                other_values = values_of_backends[backend_name].get((scope, approach), set())
+                if reference_values != other_values:
+                    differences[f'{scope}.{approach}'] = {
+                        'both': sorted(reference_values & other_values),
+                        f'only_{reference}': sorted(reference_values - other_values),
+                        f'only_{backend_name}': sorted(other_values - reference_values)}
+            document_report[backend_name]['differences'] = differences
+            if len(differences) == 0:
+                report['summary'][backend_name]['identical_documents'] += 1
+        report['documents'][path] = document_report
+    report['summary'][reference]['identical_documents'] = len(paths)
+    return report
+
+
+if __name__ == '__main__':
+    """ Usage: python -m D_Search.Backend report1.pdf report2.pdf ... """
+    import json
+    print(json.dumps(get_parity_report(paths=sys.argv[1:], conf_log=ConfLog()), indent=2, default=str))
@@ -0,0 +1,282 @@
+import os
+import json
+import pickle
+import sqlite3
+import zlib
+from typing import List, Dict, Set, Tuple, Iterable, Iterator
+
+from A_Configuration_and_Logs.conf_and_log import ConfLog
+from D_Search.PageText import PageText
+from D_Search.FindingsStore import get_document_hash, get_fingerprint
+from D_Search.Sources import is_archive_member, read_document, get_document_name
+from D_Search.PDFMiner import PDFMiner, PageSearch, get_first_last_indices_of_all_words_in_string, \
+    get_first_last_indices_of_keyword_in_string
+
+""" Corpus wide inverted index (sqlite): every word of every indexed pdf doc is stored with its document, page, line
+    and bbox, every text block (for the sentences) and every page as extracted (PageText) are stored as well.
+    New search terms (e.g. new keywords in keyword_dict_of_lists) can then be located, their neighbours looked up and
+    their sentences found (or the whole search be run) without reading the pdf docs again:
+
+        index = CorpusIndex(path=conf_log.find_word_corpus_index_path)
+        index_documents(paths=[...], conf_log=conf_log, corpus_index=index)
+        index.find_keyword('Scope 3 Category 1')
+        index.search(keywords_dict_of_list={'Methane': ['methane', 'CH4']}, ...)
+
+    The index depends on the extraction (backend and LayoutOptions), not on the search settings in [D_Search].
+"""
+
+
+def get_extraction_fingerprint(conf_log: ConfLog) -> str:
+    """ Everything the extracted pages depend on """
+    return get_fingerprint(conf_log.find_word_backend,
+                           conf_log.get_section_settings('D_Search.PDFMiner.LayoutOptions'))
+
+
+class CorpusIndex:
+
+    def __init__(self, path: str):
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self.path = path
+        self.connection = sqlite3.connect(path, timeout=30, check_same_thread=False)
+        self.connection.execute('PRAGMA journal_mode=WAL')
+        self.connection.executescript('''
+            CREATE TABLE IF NOT EXISTS documents (document_id INTEGER PRIMARY KEY, name TEXT, document_hash TEXT,
+                extraction_fingerprint TEXT, table_keywords TEXT, UNIQUE (document_hash, extraction_fingerprint));
+            CREATE TABLE IF NOT EXISTS pages (document_id INTEGER, page_number INTEGER, width REAL, height REAL,
+                page_text BLOB, PRIMARY KEY (document_id, page_number));
+            CREATE TABLE IF NOT EXISTS blocks (document_id INTEGER, page_number INTEGER, block_index INTEGER,
+                text TEXT, clean_text TEXT, PRIMARY KEY (document_id, page_number, block_index));
+            CREATE TABLE IF NOT EXISTS lines (line_id INTEGER PRIMARY KEY, document_id INTEGER, page_number INTEGER,
+                block_index INTEGER, line_index INTEGER, text TEXT);
+            CREATE TABLE IF NOT EXISTS tokens (token TEXT, word TEXT, document_id INTEGER, page_number INTEGER,
+                line_id INTEGER, word_index INTEGER, x0 REAL, y0 REAL, x1 REAL, y1 REAL);
+            CREATE INDEX IF NOT EXISTS tokens_by_token ON tokens (token);
+            CREATE INDEX IF NOT EXISTS tokens_by_page ON tokens (document_id, page_number, y0);
+            CREATE INDEX IF NOT EXISTS tokens_by_line ON tokens (line_id, word_index);
+        ''')
+        self.connection.commit()
+
+    def get_document_id(self, document_hash: str, extraction_fingerprint: str) -> int or None:
+        row = self.connection.execute('SELECT document_id FROM documents WHERE document_hash = ? AND '
+                                      'extraction_fingerprint = ?', (document_hash, extraction_fingerprint)).fetchone()
+        return row[0] if row is not None else None
+
+    def add_document(self, name: str, document_hash: str, extraction_fingerprint: str, table_keywords: List[str],
+                     page_texts: Iterable[PageText]) -> int:
+        """ Replaces the document if it was already indexed with the same extraction. One transaction: if a page
+        fails (e.g. a damaged pdf doc) nothing of the document is added and an indexed version is kept """
+        with self.connection:
+            document_id = self.get_document_id(document_hash=document_hash,
+                                               extraction_fingerprint=extraction_fingerprint)
+            if document_id is not None:
+                self._delete_document(document_id=document_id)
+            cursor = self.connection.execute('INSERT INTO documents (name, document_hash, extraction_fingerprint, '
+                                             'table_keywords) VALUES (?, ?, ?, ?)',
+                                             (name, document_hash, extraction_fingerprint, json.dumps(table_keywords)))
+            document_id = cursor.lastrowid
+            for page_text in page_texts:
+                self.add_page(document_id=document_id, page_text=page_text)
+        return document_id
+
+    def add_page(self, document_id: int, page_text: PageText):
+        page_number = page_text.page_number
+        self.connection.execute('INSERT INTO pages VALUES (?, ?, ?, ?, ?)',
+                                (document_id, page_number, page_text.width, page_text.height,
+                                 zlib.compress(pickle.dumps(page_text, protocol=pickle.HIGHEST_PROTOCOL))))
+        tokens = list()
+        for block_index, text_block in enumerate(page_text.blocks):
+            self.connection.execute('INSERT INTO blocks VALUES (?, ?, ?, ?, ?)',
+                                    (document_id, page_number, block_index, text_block.get_text(),
+                                     ' '.join(text_block.get_text().split())))
+            for line_index, text_line in enumerate(text_block.lines):
+                line_id = self.connection.execute('INSERT INTO lines (document_id, page_number, block_index, '
+                                                  'line_index, text) VALUES (?, ?, ?, ?, ?)',
+                                                  (document_id, page_number, block_index, line_index,
+                                                   text_line.text)).lastrowid
+                """ Words and their bboxes like in PageSearch.get_coordinates_of_word_in_text_line (not rounded) """
+                for word_index, (start, end) in enumerate(
+                        get_first_last_indices_of_all_words_in_string(sentence=text_line.text)):
+                    first_bbox, last_bbox = text_line.items[start][1], text_line.items[end - 1][1]
+                    if first_bbox is None or last_bbox is None:
+                        continue
+                    word = text_line.text[start:end]
+                    tokens.append((word.lower(), word, document_id, page_number, line_id, word_index,
+                                   first_bbox[0], first_bbox[1], last_bbox[2], last_bbox[3]))
+        self.connection.executemany('INSERT INTO tokens VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)', tokens)
+
+    def remove_document(self, document_id: int):
+        with self.connection:
+            self._delete_document(document_id=document_id)
+
+    def _delete_document(self, document_id: int):
+        for table in ('tokens', 'lines', 'blocks', 'pages', 'documents'):
+            self.connection.execute(f'DELETE FROM {table} WHERE document_id = ?', (document_id,))
+
+    def get_documents(self) -> List[Tuple[int, str, List[str]]]:
+        """ (document_id, name, table_keywords) of all indexed documents """
+        return [(document_id, name, json.loads(table_keywords)) for document_id, name, table_keywords in
+                self.connection.execute('SELECT document_id, name, table_keywords FROM documents ORDER BY name')]
+
+    def find_keyword(self, keyword: str, document_id: int or None = None) -> List[dict]:
+        """ All occurrences of a keyword (one or more words, case-insensitive) with document, page and bbox. The first
+        word is looked up in the index, the following ones are checked in the same line. """
+        words = keyword.lower().split()
+        if len(words) == 0:
+            return list()
+        query = 'SELECT t.document_id, d.name, t.page_number, t.line_id, t.word_index, t.x0, t.y0, t.x1, t.y1 ' \
+                'FROM tokens t JOIN documents d ON d.document_id = t.document_id WHERE t.token = ?'
+        parameters = [words[0]]
+        if document_id is not None:
+            query += ' AND t.document_id = ?'
+            parameters.append(document_id)
+        occurrences = list()
+        for found_document_id, name, page_number, line_id, word_index, x0, y0, x1, y1 in \
+                self.connection.execute(query, parameters).fetchall():
+            if len(words) > 1:
+                following = self.connection.execute(
+                    'SELECT token, x1, y0, y1 FROM tokens WHERE line_id = ? AND word_index > ? AND word_index <= ? '
+                    'ORDER BY word_index', (line_id, word_index, word_index + len(words) - 1)).fetchall()
+                if [token for token, _, _, _ in following] != words[1:]:
+                    continue
+                x1 = following[-1][1]
+                y0 = min([y0] + [row[2] for row in following])
+                y1 = max([y1] + [row[3] for row in following])
+            occurrences.append({'document_id': found_document_id, 'name': name, 'page_number': page_number,
+                                'line_id': line_id, 'bbox': (x0, y0, x1, y1)})
+        return occurrences
+
+    def get_words_in_area(self, document_id: int, page_number: int, x0: float, y0: float, x1: float,
+                          y1: float) -> List[Tuple[float, float, float, float, str]]:
+        """ All words on the page that lie completely within the area """
+        return self.connection.execute('SELECT x0, y0, x1, y1, word FROM tokens WHERE document_id = ? AND '
+                                       'page_number = ? AND y0 >= ? AND y1 <= ? AND x0 >= ? AND x1 <= ?',
+                                       (document_id, page_number, y0, y1, x0, x1)).fetchall()
+
+    def get_neighbours(self, keyword: str, neighbour_x_tolerance: float, neighbour_y_tolerance: float,
+                       document_id: int or None = None) -> List[dict]:
+        """ The words around every occurrence of the keyword, with the same search frame as XYWordMatch in
+        PDFMiner.py (width/height of the keyword times the tolerance on each side) """
+        results = list()
+        for occurrence in self.find_keyword(keyword=keyword, document_id=document_id):
+            x0, y0, x1, y1 = occurrence['bbox']
+            x_tolerance = (x1 - x0) * neighbour_x_tolerance
+            y_tolerance = (y1 - y0) * neighbour_y_tolerance
+            words = self.get_words_in_area(document_id=occurrence['document_id'],
+                                           page_number=occurrence['page_number'],
+                                           x0=x0 - x_tolerance, y0=y0 - y_tolerance,
+                                           x1=x1 + x_tolerance, y1=y1 + y_tolerance)
+            results.append({**occurrence, 'neighbours': words})
+        return results
+
+    def find_sentences(self, keywords: List[str], search_words: List[str], document_id: int or None = None) -> \
+            List[dict]:
+        """ Text blocks that contain any of the keywords AND any of the search words (like the matching sentences
+        of the search). Candidate blocks are found with the index, then the texts are checked. """
+        candidates = set()
+        for keyword in keywords:
+            for occurrence in self.find_keyword(keyword=keyword, document_id=document_id):
+                candidates.add((occurrence['document_id'], occurrence['page_number'], occurrence['line_id']))
+        results = list()
+        seen_blocks = set()
+        for candidate_document_id, page_number, line_id in sorted(candidates):
+            block_index = self.connection.execute('SELECT block_index FROM lines WHERE line_id = ?',
+                                                  (line_id,)).fetchone()[0]
+            if (candidate_document_id, page_number, block_index) in seen_blocks:
+                continue
+            seen_blocks.add((candidate_document_id, page_number, block_index))
+            name, text = self.connection.execute(
+                'SELECT d.name, b.text FROM blocks b JOIN documents d ON d.document_id = b.document_id WHERE '
+                'b.document_id = ? AND b.page_number = ? AND b.block_index = ?',
+                (candidate_document_id, page_number, block_index)).fetchone()
+            clean_text = ' '.join(text.split())
+            if any(get_first_last_indices_of_keyword_in_string(sentence=clean_text, keyword=search_word) for
+                   search_word in search_words):
+                results.append({'document_id': candidate_document_id, 'name': name, 'page_number': page_number,
+                                'text': clean_text})
+        return results
+
+    def get_candidate_pages(self, keywords: Iterable[str], document_id: int) -> List[int]:
+        """ Pages of the document with any keyword in any text block (case-insensitive, so rather too many pages than
+        too few). All other pages can not have any findings for these keywords. """
+        patterns = sorted(set('%' + ' '.join(keyword.split()).replace('\\', '\\\\').replace('%', '\\%').replace(
+            '_', '\\_') + '%' for keyword in keywords if keyword.split()))
+        if len(patterns) == 0:
+            return list()
+        conditions = ' OR '.join("clean_text LIKE ? ESCAPE '\\'" for _ in patterns)
+        return [row[0] for row in self.connection.execute(
+            f'SELECT DISTINCT page_number FROM blocks WHERE document_id = ? AND ({conditions}) ORDER BY page_number',
+            [document_id] + patterns)]
+
+    def iter_page_texts(self, document_id: int, page_numbers: Iterable[int] or None = None) -> Iterator[PageText]:
+        if page_numbers is None:
+            rows = self.connection.execute('SELECT page_text FROM pages WHERE document_id = ? ORDER BY page_number',
+                                           (document_id,))
+            for row in rows.fetchall():
+                yield pickle.loads(zlib.decompress(row[0]))
+        else:
+            for page_number in page_numbers:
+                row = self.connection.execute('SELECT page_text FROM pages WHERE document_id = ? AND page_number = ?',
+                                              (document_id, page_number)).fetchone()
+                if row is not None:
+                    yield pickle.loads(zlib.decompress(row[0]))
+
+    def search(self, keywords_dict_of_list: Dict[str, List[str]], search_word_list: List[str],
+               neighbour_x_tolerance: float, neighbour_y_tolerance: float, table_x_tolerance: float = 3.50,
+               table_y_tolerance: float = 0.25, decimals: int = 1, conf_log: ConfLog = None) -> \
+            Iterator[Tuple[str, List[str], List[dict], Set[str]]]:
+        """ The full search (neighbour, table and text values) of every indexed document, but only on the pages that
+        contain any keyword. Yields (name, table_keywords, findings, matching sentences) like search_pdf in
+        F_Extract/Extract.py. """
+        keywords = [keyword for keywords_list in keywords_dict_of_list.values() for keyword in keywords_list]
+        for document_id, name, table_keywords in self.get_documents():
+            page_search = PageSearch(conf_log=conf_log)
+            """ Keywords with OCR errors are not found by the (exact) candidate pages """
+            page_numbers = None if page_search.conf_log.find_word_approximate else \
+                self.get_candidate_pages(keywords=keywords, document_id=document_id)
+            findings = page_search.find_word_in_pages(
+                page_texts=self.iter_page_texts(document_id=document_id, page_numbers=page_numbers),
+                keywords_dict_of_list=keywords_dict_of_list, search_word_list=search_word_list,
+                neighbour_x_tolerance=neighbour_x_tolerance, neighbour_y_tolerance=neighbour_y_tolerance,
+                table_keywords=table_keywords, table_x_tolerance=table_x_tolerance,
+                table_y_tolerance=table_y_tolerance, decimals=decimals)
+            yield name, table_keywords, findings, page_search.matching_sentences
+
+    def get_stats(self) -> Dict[str, int]:
+        return {table: self.connection.execute(f'SELECT COUNT(*) FROM {table}').fetchone()[0] for table in
+                ('documents', 'pages', 'lines', 'tokens')}
+
+    def close(self):
+        self.connection.close()
+
+
+def index_documents(paths: List[str], conf_log: ConfLog, corpus_index: CorpusIndex, reindex: bool = False) -> \
+        Dict[str, int]:
+    """ Extracts every pdf doc once and adds it to the index. Documents that are already indexed with the same
+    extraction are skipped (unless reindex). Returns the number of indexed and skipped documents. """
+    extraction_fingerprint = get_extraction_fingerprint(conf_log=conf_log)
+    stats = {'indexed': 0, 'skipped': 0, 'failed': 0}
+    for path in paths:
+        try:
+            data = read_document(path=path) if is_archive_member(path=path) else None
+            document_hash = get_document_hash(path=path, data=data)
+            if not reindex and corpus_index.get_document_id(document_hash=document_hash,
+                                                            extraction_fingerprint=extraction_fingerprint) is not None:
+                stats['skipped'] += 1
+                continue
+            miner = PDFMiner(path=path, conf_log=conf_log, data=data)
+            try:
+                table_keywords = miner.get_year_and_fy()
+                """ The pages are indexed in document order (no page priority) """
+                corpus_index.add_document(name=get_document_name(path=path), document_hash=document_hash,
+                                          extraction_fingerprint=extraction_fingerprint,
+                                          table_keywords=table_keywords,
+                                          page_texts=miner.backend.iter_page_texts())
+            finally:
+                miner.close()
+            stats['indexed'] += 1
+        except Exception as e:
+            stats['failed'] += 1
+            conf_log.logging.error(e, exc_info=True)
+    return stats
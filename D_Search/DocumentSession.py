@@ -0,0 +1,109 @@
+import io
+import mmap
+from typing import Iterator, Dict, Container, Tuple, List
+from pdfminer.layout import LAParams, LTPage
+from pdfminer.pdfpage import PDFPage
+from pdfminer.pdfinterp import PDFResourceManager, PDFPageInterpreter
+from pdfminer.converter import PDFPageAggregator
+from pdfminer.pdfdocument import PDFDocument
+from pdfminer.pdfparser import PDFParser
+from D_Search.LayoutDevice import GlyphLineAggregator, LAYOUT_ENGINE_PDFMINER, LAYOUT_ENGINE_GLYPH_LINES
+from D_Search.FontCache import FontCache, SharedFontResourceManager
+
+
+class DocumentSession:
+    """ Opens a pdf document exactly ONCE and memory-maps it. The parser, the document, the layout device and the
+    interpreter are all built on this single buffer and shared by every consumer (find_word, get_year_and_fy, ...).
+    Before, the file was opened three times (PDFMiner.__init__, extract_pages and get_year_and_fy) and every open
+    built its own parser, document and resource manager. """
+
+    def __init__(self, path: str, layout_params: LAParams, layout_engine: str = LAYOUT_ENGINE_PDFMINER,
+                 data: bytes or None = None, font_cache: FontCache or None = None):
+        """ data: the content of the pdf doc if it was already read into memory (e.g. by F_Extract/Prefetch.py),
+        then the file is not opened at all. font_cache: fonts shared with the other documents of the process (see
+        D_Search/FontCache.py), None: the fonts are only cached within this document """
+        self.path = path
+        self.layout_params = layout_params
+        if layout_engine not in (LAYOUT_ENGINE_PDFMINER, LAYOUT_ENGINE_GLYPH_LINES):
+            raise ValueError(f'Unknown layout engine: {layout_engine} ! ')
+        self.layout_engine = layout_engine
+        if data is not None:
+            self._file = None
+            self.buffer = io.BytesIO(data)
+        else:
+            self._file = open(path, 'rb')
+            try:
+                """ The buffer is read-only and shared: the OS pages in only what the parser really touches """
+                self.buffer = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+            except (ValueError, OSError):
+                self._file.close()
+                raise
+        self.parser = PDFParser(self.buffer)
+        self.document = PDFDocument(self.parser)
+        self.resource_manager = PDFResourceManager(caching=True) if font_cache is None else \
+            SharedFontResourceManager(font_cache=font_cache)
+        if layout_engine == LAYOUT_ENGINE_GLYPH_LINES:
+            self.page_aggregator = GlyphLineAggregator(rsrcmgr=self.resource_manager, laparams=self.layout_params)
+        else:
+            self.page_aggregator = PDFPageAggregator(rsrcmgr=self.resource_manager, laparams=self.layout_params)
+        self.interpreter = PDFPageInterpreter(self.resource_manager, self.page_aggregator)
+        """ Interpreters for other layout parameters (e.g. pdfminer's defaults for the title page in get_year_and_fy) 
+        are only built when they are asked for and then share the parser, document and resource manager above """
+        self._other_interpreters: Dict[str, Tuple[PDFPageInterpreter, PDFPageAggregator]] = dict()
+        self._pdf_pages = None
+
+    def iter_pdf_pages(self) -> Iterator[PDFPage]:
+        return PDFPage.create_pages(self.document)
+
+    def get_pdf_pages(self) -> List[PDFPage]:
+        """ All pages (only the page objects, nothing is laid out), for access in any order """
+        if self._pdf_pages is None:
+            self._pdf_pages = list(self.iter_pdf_pages())
+        return self._pdf_pages
+
+    def _get_interpreter_and_aggregator(self, layout_params: LAParams or None) -> \
+            Tuple[PDFPageInterpreter, PDFPageAggregator]:
+        if layout_params is None or layout_params is self.layout_params:
+            return self.interpreter, self.page_aggregator
+        key = repr(layout_params)
+        if key not in self._other_interpreters:
+            page_aggregator = PDFPageAggregator(rsrcmgr=self.resource_manager, laparams=layout_params)
+            interpreter = PDFPageInterpreter(self.resource_manager, page_aggregator)
+            self._other_interpreters[key] = (interpreter, page_aggregator)
+        return self._other_interpreters[key]
+
+    def get_layout(self, page: PDFPage, layout_params: LAParams or None = None) -> LTPage:
+        interpreter, page_aggregator = self._get_interpreter_and_aggregator(layout_params=layout_params)
+        interpreter.process_page(page)
+        return page_aggregator.get_result()
+
+    def iter_layouts(self, page_numbers: Container[int] or None = None, maxpages: int = 0,
+                     layout_params: LAParams or None = None) -> Iterator[LTPage]:
+        """ page_numbers are zero-indexed (like in pdfminer's extract_pages) """
+        for page_index, page in enumerate(self.iter_pdf_pages()):
+            if maxpages and page_index >= maxpages:
+                break
+            if page_numbers is not None and page_index not in page_numbers:
+                continue
+            yield self.get_layout(page=page, layout_params=layout_params)
+
+    def iter_layouts_in_order(self, page_order: List[int], layout_params: LAParams or None = None) -> \
+            Iterator[LTPage]:
+        """ Lays out the pages in the given order (zero-indexed), e.g. the order of D_Search.PagePriority """
+        pdf_pages = self.get_pdf_pages()
+        for page_index in page_order:
+            yield self.get_layout(page=pdf_pages[page_index], layout_params=layout_params)
+
+    def close(self):
+        self._other_interpreters.clear()
+        self._pdf_pages = None
+        if not self.buffer.closed:
+            self.buffer.close()
+        if self._file is not None and not self._file.closed:
+            self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
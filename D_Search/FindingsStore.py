@@ -0,0 +1,180 @@
+import os
+import json
+import sqlite3
+import hashlib
+import threading
+from typing import Dict, Set, Tuple, Iterable, List
+from D_Search.PageText import PageText
+
+""" Local stores (sqlite) for findings that were already computed under the same configuration. A store can be
+    shared by several threads (its connection is used by one thread at a time). """
+
+""" Version of the search (find_word) and of the format of the stored findings. It is part of every config fingerprint
+    of the stores: increase it whenever a change of the code changes the findings or their format, otherwise the stores
+    return the (stale) findings of the old code. """
+FINDINGS_VERSION = 1
+
+
+def get_fingerprint(*parts) -> str:
+    """ Stable hash of any json-serializable parts (e.g. config settings and find_word arguments) """
+    serialized = json.dumps(parts, sort_keys=True, default=lambda obj: sorted(obj) if isinstance(obj, set) else str(obj))
+    return hashlib.blake2b(serialized.encode('utf-8'), digest_size=16).hexdigest()
+
+
+def get_page_fingerprint(page_text: PageText, grid: float = 2.0) -> str:
+    """ Fingerprint of a page: the normalized text of every text line plus its coarse position. Positions are
+    relative to the upper left corner of all text on the page and snapped to a grid (in points), so that the same
+    page in a web and a print version (or inside another report) gets the same fingerprint. """
+    lines = list()
+    for text_line in page_text.lines:
+        text = ' '.join(text_line.text.split())
+        if text and text_line.bbox is not None:
+            lines.append((text, text_line.x0, text_line.y1))
+    if len(lines) == 0:
+        return get_fingerprint('empty page', round(page_text.width / grid), round(page_text.height / grid))
+    min_x0 = min(x0 for _, x0, _ in lines)
+    max_y1 = max(y1 for _, _, y1 in lines)
+    coarse_lines = sorted((text, round((x0 - min_x0) / grid), round((max_y1 - y1) / grid)) for text, x0, y1 in lines)
+    return get_fingerprint(coarse_lines)
+
+
+def _values_to_json(values: set or dict) -> list or dict:
+    """ table_values_by_year (multi-year mode) is a dict: year -> values """
+    if isinstance(values, dict):
+        return {year: sorted(values_of_year) for year, values_of_year in values.items()}
+    return sorted(values)
+
+
+def _values_from_json(values: list or dict) -> set or dict:
+    if isinstance(values, dict):
+        return {year: set(values_of_year) for year, values_of_year in values.items()}
+    return set(values)
+
+
+def findings_to_json(page_findings: dict) -> str:
+    return json.dumps({key: ({value_key: _values_to_json(values) for value_key, values in value.items()} if
+                             isinstance(value, dict) else value) for key, value in page_findings.items()})
+
+
+def findings_from_json(text: str) -> dict:
+    return {key: ({value_key: _values_from_json(values) for value_key, values in value.items()} if
+                  isinstance(value, dict) else value) for key, value in json.loads(text).items()}
+
+
+class PageFindingsStore:
+    """ Page level deduplication across documents: the findings (and matching sentences) of a page are stored under
+    (config fingerprint, page fingerprint). A page that was already analyzed under the same configuration, e.g. the
+    same sustainability annex in the annual report, is not searched again. Hits and misses are counted per run. """
+
+    def __init__(self, path: str):
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self.path = path
+        self.connection = sqlite3.connect(path, timeout=30, check_same_thread=False)
+        self.connection.execute('PRAGMA journal_mode=WAL')
+        self.connection.execute('CREATE TABLE IF NOT EXISTS page_findings (config_fingerprint TEXT, '
+                                'page_fingerprint TEXT, findings TEXT, matching_sentences TEXT, '
+                                'PRIMARY KEY (config_fingerprint, page_fingerprint))')
+        self.connection.commit()
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, config_fingerprint: str, page_fingerprint: str) -> Tuple[dict, Set[str]] or None:
+        with self.lock:
+            row = self.connection.execute('SELECT findings, matching_sentences FROM page_findings WHERE '
+                                          'config_fingerprint = ? AND page_fingerprint = ?',
+                                          (config_fingerprint, page_fingerprint)).fetchone()
+            if row is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+        return findings_from_json(row[0]), set(json.loads(row[1]))
+
+    def put(self, config_fingerprint: str, page_fingerprint: str, page_findings: dict,
+            matching_sentences: Iterable[str]):
+        """ The page number is not stored: the same page can have a different number in another document """
+        page_findings = {key: value for key, value in page_findings.items() if key != 'page_number'}
+        row = (config_fingerprint, page_fingerprint, findings_to_json(page_findings),
+               json.dumps(sorted(matching_sentences)))
+        with self.lock:
+            self.connection.execute('INSERT OR REPLACE INTO page_findings VALUES (?, ?, ?, ?)', row)
+            self.connection.commit()
+
+    def get_hit_rate(self) -> float:
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups > 0 else 0.0
+
+    def get_stats(self) -> Dict[str, float]:
+        return {'page_lookups': self.hits + self.misses, 'page_hits': self.hits, 'page_misses': self.misses,
+                'page_hit_rate': round(self.get_hit_rate(), 4)}
+
+    def reset_stats(self):
+        self.hits = 0
+        self.misses = 0
+
+    def close(self):
+        self.connection.close()
+
+
+def get_document_hash(path: str, chunk_size: int = 1 << 20, data: bytes or None = None) -> str:
+    """ data: the content of the file if it was already read into memory """
+    if data is not None:
+        return hashlib.blake2b(data, digest_size=16).hexdigest()
+    document_hash = hashlib.blake2b(digest_size=16)
+    with open(path, 'rb') as stream:
+        for chunk in iter(lambda: stream.read(chunk_size), b''):
+            document_hash.update(chunk)
+    return document_hash.hexdigest()
+
+
+class DocumentFindingsStore:
+    """ Memoization of the raw output of D_Search for a whole document: table_keywords (year), the findings of
+    find_word and the matching sentences are stored under (document hash, fingerprint of the D_Search settings).
+    If neither the document nor the D_Search settings changed, only E_Collect/F_Extract need to run again, e.g. when
+    tuning the weights in [F_Extract]. """
+
+    def __init__(self, path: str):
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self.path = path
+        self.connection = sqlite3.connect(path, timeout=30, check_same_thread=False)
+        self.connection.execute('PRAGMA journal_mode=WAL')
+        self.connection.execute('CREATE TABLE IF NOT EXISTS document_findings (document_hash TEXT, '
+                                'config_fingerprint TEXT, table_keywords TEXT, findings TEXT, matching_sentences TEXT, '
+                                'PRIMARY KEY (document_hash, config_fingerprint))')
+        self.connection.commit()
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, document_hash: str, config_fingerprint: str) -> Tuple[List[str], List[dict], Set[str]] or None:
+        with self.lock:
+            row = self.connection.execute('SELECT table_keywords, findings, matching_sentences FROM '
+                                          'document_findings WHERE document_hash = ? AND config_fingerprint = ?',
+                                          (document_hash, config_fingerprint)).fetchone()
+            if row is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+        return json.loads(row[0]), [findings_from_json(page_findings) for page_findings in json.loads(row[1])], \
+            set(json.loads(row[2]))
+
+    def put(self, document_hash: str, config_fingerprint: str, table_keywords: List[str], findings: List[dict],
+            matching_sentences: Iterable[str]):
+        row = (document_hash, config_fingerprint, json.dumps(table_keywords),
+               json.dumps([findings_to_json(page_findings) for page_findings in findings]),
+               json.dumps(sorted(matching_sentences)))
+        with self.lock:
+            self.connection.execute('INSERT OR REPLACE INTO document_findings VALUES (?, ?, ?, ?, ?)', row)
+            self.connection.commit()
+
+    def get_stats(self) -> Dict[str, float]:
+        lookups = self.hits + self.misses
+        return {'document_lookups': lookups, 'document_hits': self.hits, 'document_misses': self.misses,
+                'document_hit_rate': round(self.hits / lookups, 4) if lookups > 0 else 0.0}
+
+    def close(self):
+        self.connection.close()
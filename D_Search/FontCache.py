@@ -0,0 +1,171 @@
+import hashlib
+import threading
+from collections import OrderedDict
+from typing import Mapping, Dict, List
+from pdfminer.pdffont import PDFFont
+from pdfminer.pdfinterp import PDFResourceManager
+from pdfminer.pdftypes import PDFObjRef, PDFStream
+from pdfminer.psparser import PSLiteral, PSKeyword
+
+""" Fonts shared by all pdf docs that are analyzed in the same (worker) process. pdfminer's PDFResourceManager caches
+    the fonts of ONE document by their object id, so the fonts (embedded font programs, ToUnicode CMaps, widths) of
+    every document are parsed again, although reports of the same publisher or template embed the very same fonts.
+    Object ids can not be used across documents (object 12 is a different font in every document), the fonts are
+    therefore cached by a hash of their content: the font dictionary with all its references resolved and the raw
+    data of its streams. The cache is bounded (least recently used fonts are evicted).
+
+    The predefined CMaps (e.g. for Japanese or Chinese fonts) are already cached per process by pdfminer's CMapDB.
+
+    The cache is thread safe: in the thread mode of the scheduled analysis (see F_Extract/Extract.py) all threads share
+    the font cache of the process. A parsed PDFFont is only read after it was built, so it can be used by several
+    documents (threads) at the same time.
+"""
+
+MAX_KEY_DEPTH = 12
+
+
+def _update_key(digest, obj, depth: int, visited_objids: tuple):
+    if depth > MAX_KEY_DEPTH:
+        raise ValueError('Font spec too deep')
+    if isinstance(obj, PDFObjRef):
+        if obj.objid in visited_objids:
+            digest.update(b'C')
+            return
+        _update_key(digest, obj.resolve(), depth + 1, visited_objids + (obj.objid,))
+    elif isinstance(obj, PDFStream):
+        data = obj.get_rawdata()
+        digest.update(b'S' if data is not None else b'D')
+        _update_key(digest, obj.attrs, depth + 1, visited_objids)
+        data = data if data is not None else obj.data or b''
+        digest.update(len(data).to_bytes(8, 'little'))
+        digest.update(data)
+    elif isinstance(obj, dict):
+        digest.update(b'{')
+        for key in sorted(obj, key=str):
+            digest.update(str(key).encode('utf-8', 'surrogatepass') + b'=')
+            _update_key(digest, obj[key], depth + 1, visited_objids)
+        digest.update(b'}')
+    elif isinstance(obj, (list, tuple)):
+        digest.update(b'[')
+        for item in obj:
+            _update_key(digest, item, depth + 1, visited_objids)
+        digest.update(b']')
+    elif isinstance(obj, bytes):
+        digest.update(b'B' + len(obj).to_bytes(8, 'little') + obj)
+    elif isinstance(obj, (PSLiteral, PSKeyword)):
+        digest.update(b'/' + repr(obj.name).encode('utf-8', 'surrogatepass'))
+    else:
+        digest.update(b'V' + repr(obj).encode('utf-8', 'surrogatepass'))
+
+
+def get_font_key(spec: Mapping[str, object]) -> str or None:
+    """ Content hash of a font spec. None if the font must not be shared: Type3 fonts (their glyphs are content
+    streams with their own resources) and specs that can not be resolved. """
+    try:
+        if isinstance(spec.get('Subtype'), PSLiteral) and spec['Subtype'].name == 'Type3':
+            return None
+        digest = hashlib.blake2b(digest_size=20)
+        _update_key(digest, spec, 0, tuple())
+        return digest.hexdigest()
+    except Exception:
+        return None
+
+
+class FontCache:
+    """ LRU cache of the parsed fonts (content hash -> PDFFont) with hit and miss counters (thread safe) """
+
+    def __init__(self, max_fonts: int = 256):
+        self.lock = threading.Lock()
+        self.max_fonts = max_fonts
+        self.fonts: Dict[str, PDFFont] = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.uncacheable = 0
+
+    def get(self, key: str) -> PDFFont or None:
+        with self.lock:
+            font = self.fonts.get(key)
+            if font is None:
+                self.misses += 1
+                return None
+            self.fonts.move_to_end(key)
+            self.hits += 1
+            return font
+
+    def put(self, key: str, font: PDFFont):
+        """ Two threads may parse the same font at the same time, the font that is put last is kept """
+        with self.lock:
+            self.fonts[key] = font
+            self.fonts.move_to_end(key)
+            while len(self.fonts) > self.max_fonts:
+                self.fonts.popitem(last=False)
+                self.evictions += 1
+
+    def count_uncacheable(self):
+        with self.lock:
+            self.uncacheable += 1
+
+    def get_hit_rate(self) -> float:
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups > 0 else 0.0
+
+    def get_stats(self) -> Dict[str, float]:
+        with self.lock:
+            return {'font_lookups': self.hits + self.misses, 'font_hits': self.hits, 'font_misses': self.misses,
+                    'font_hit_rate': round(self.get_hit_rate(), 4), 'fonts_cached': len(self.fonts),
+                    'font_evictions': self.evictions, 'fonts_not_shared': self.uncacheable}
+
+    def reset_stats(self):
+        with self.lock:
+            self.hits = self.misses = self.evictions = self.uncacheable = 0
+
+
+class SharedFontResourceManager(PDFResourceManager):
+    """ Resource manager of ONE document (its fonts by object id, like pdfminer's) that takes the fonts from the
+    FontCache of the process if another document already used the same font """
+
+    def __init__(self, font_cache: FontCache):
+        PDFResourceManager.__init__(self, caching=True)
+        self.font_cache = font_cache
+
+    def get_font(self, objid: object, spec: Mapping[str, object]) -> PDFFont:
+        if objid and objid in self._cached_fonts:
+            return self._cached_fonts[objid]
+        key = get_font_key(spec=spec)
+        font = self.font_cache.get(key) if key is not None else None
+        if font is None:
+            """ pdfminer parses the font (objid None: the font is only cached here and in the FontCache) """
+            font = PDFResourceManager.get_font(self, None, spec)
+            if key is not None:
+                self.font_cache.put(key, font)
+            else:
+                self.font_cache.count_uncacheable()
+        if objid:
+            self._cached_fonts[objid] = font
+        return font
+
+
+""" The font cache of this process (one per worker process, shared by all threads of the process) """
+_font_cache = None
+_font_cache_lock = threading.Lock()
+
+
+def get_font_cache(max_fonts: int or None = None) -> FontCache:
+    """ max_fonts=None: the size is not changed (256 if the cache is new) """
+    global _font_cache
+    with _font_cache_lock:
+        if _font_cache is None:
+            _font_cache = FontCache()
+        if max_fonts is not None:
+            _font_cache.max_fonts = max_fonts
+        return _font_cache
+
+
+def sum_font_cache_stats(stats_of_processes: List[Dict[str, float]]) -> Dict[str, float]:
+    """ Font cache stats of all worker processes together """
+    total = {key: sum(stats[key] for stats in stats_of_processes) for key in
+             ('font_lookups', 'font_hits', 'font_misses', 'fonts_cached', 'font_evictions', 'fonts_not_shared')}
+    total['font_hit_rate'] = round(total['font_hits'] / total['font_lookups'], 4) if total['font_lookups'] > 0 else 0.0
+    total['processes'] = len(stats_of_processes)
+    return total
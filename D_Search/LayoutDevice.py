@@ -0,0 +1,153 @@
+import sys
+import time
+from typing import List, Iterator, Dict
+from pdfminer.layout import LAParams, LTPage, LTChar, LTFigure, LTAnno, LTContainer, LTTextLineHorizontal, \
+    LTTextBoxHorizontal, LTLayoutContainer
+from pdfminer.pdfinterp import PDFResourceManager
+from pdfminer.converter import PDFLayoutAnalyzer
+
+""" Lightweight alternative to pdfminer's layout analysis (LAParams).
+    pdfminer's LTPage.analyze() groups characters into lines, lines into text boxes and then text boxes
+    hierarchically into a tree (boxes_flow) which is used for the reading order only. With all_texts=True the same is
+    done for every figure. The search in PDFMiner.find_word only needs words (with their coordinates) grouped into
+    lines, and lines grouped into blocks for the matching sentences. The GlyphLineAggregator below builds exactly these
+    objects (LTTextBoxHorizontal -> LTTextLineHorizontal -> LTChar/LTAnno) directly from the glyphs, so the existing
+    neighbour, table and text search can use them without any change.
+"""
+
+LAYOUT_ENGINE_PDFMINER = 'pdfminer'
+LAYOUT_ENGINE_GLYPH_LINES = 'glyph_lines'
+
+
+class GlyphLineAggregator(PDFLayoutAnalyzer):
+    """ pdfminer device that groups LTChars into words and lines by using char_margin, word_margin and line_overlap
+    (and line_margin for the blocks) of the given LAParams. Hierarchical box grouping (boxes_flow) is skipped and
+    only horizontal text is detected. Curves, rectangles and images are not needed for the search and thus are not
+    created at all. """
+
+    def __init__(self, rsrcmgr: PDFResourceManager, laparams: LAParams, pageno: int = 1):
+        """ laparams=None for the parent class: pdfminer's own analysis is NOT executed in end_page """
+        PDFLayoutAnalyzer.__init__(self, rsrcmgr, pageno=pageno, laparams=None)
+        self.line_params = laparams
+        self.result = None
+
+    def paint_path(self, gstate, stroke, fill, evenodd, path):
+        pass
+
+    def render_image(self, name, stream):
+        pass
+
+    def receive_layout(self, ltpage: LTPage):
+        chars = list(self.iter_chars(layout_container=ltpage))
+        lines = self.group_chars_into_lines(chars=chars)
+        page = LTPage(ltpage.pageid, ltpage.bbox, ltpage.rotate)
+        for text_box in self.group_lines_into_boxes(lines=lines):
+            page.add(text_box)
+        self.result = page
+
+    def get_result(self) -> LTPage:
+        return self.result
+
+    def iter_chars(self, layout_container: LTLayoutContainer) -> Iterator[LTChar]:
+        """ Chars in figures are only taken into account if all_texts is set (like in pdfminer) """
+        for obj in layout_container:
+            if isinstance(obj, LTChar):
+                yield obj
+            elif isinstance(obj, LTFigure) and self.line_params.all_texts:
+                yield from self.iter_chars(layout_container=obj)
+
+    def group_chars_into_lines(self, chars: List[LTChar]) -> List[LTTextLineHorizontal]:
+        """ Chars are rendered in content stream order. Two consecutive chars are on the same line if they overlap
+        vertically by more than line_overlap (of the smaller height) and their horizontal distance is smaller than
+        char_margin (of the wider char). Words within the line are separated by LTTextLineHorizontal itself, which
+        inserts a LTAnno(' ') whenever the gap between two chars is larger than word_margin. """
+        lines = list()
+        line = None
+        previous_char = None
+        for char in chars:
+            if previous_char is not None and line is not None and \
+                    previous_char.is_voverlap(char) and \
+                    min(previous_char.height, char.height) * self.line_params.line_overlap < \
+                    previous_char.voverlap(char) and \
+                    previous_char.hdistance(char) < max(previous_char.width, char.width) * self.line_params.char_margin:
+                line.add(char)
+            else:
+                if line is not None:
+                    lines.append(line)
+                line = LTTextLineHorizontal(self.line_params.word_margin)
+                line.add(char)
+            previous_char = char
+        if line is not None:
+            lines.append(line)
+        for line in lines:
+            LTContainer.add(line, LTAnno('\n'))
+        return lines
+
+    def group_lines_into_boxes(self, lines: List[LTTextLineHorizontal]) -> List[LTTextBoxHorizontal]:
+        """ One pass from top to bottom: a line is added to an open box if it is (nearly) of the same height as the
+        last line of that box, aligned with it (left, right or centre) and not further below than line_margin (of the
+        taller line). Otherwise, it opens a new box. There is NO hierarchical grouping of the boxes afterwards. """
+        open_boxes = list()
+        all_boxes = list()
+        for line in sorted(lines, key=lambda text_line: (-text_line.y1, text_line.x0)):
+            target_box = None
+            still_open_boxes = list()
+            for text_box, last_line in open_boxes:
+                """ Like in pdfminer, the taller line of the two determines the search distance """
+                distance = self.line_params.line_margin * max(last_line.height, line.height)
+                if last_line.y0 - line.y1 > distance:
+                    """ All following lines are even lower, this box cannot grow anymore """
+                    continue
+                still_open_boxes.append((text_box, last_line))
+                if target_box is None and abs(last_line.height - line.height) <= distance and \
+                        (abs(last_line.x0 - line.x0) <= distance or abs(last_line.x1 - line.x1) <= distance or
+                         abs((last_line.x0 + last_line.x1) / 2 - (line.x0 + line.x1) / 2) <= distance):
+                    target_box = text_box
+            open_boxes = still_open_boxes
+            if target_box is None:
+                target_box = LTTextBoxHorizontal()
+                all_boxes.append(target_box)
+            else:
+                open_boxes = [(text_box, last_line) for text_box, last_line in open_boxes if text_box is not target_box]
+            target_box.add(line)
+            open_boxes.append((target_box, line))
+        return all_boxes
+
+
+def benchmark_layout_engines(paths: List[str], layout_params: LAParams, repeat: int = 1) -> Dict[str, dict]:
+    """ Lays out all pages of the given pdf docs with both layout engines and returns the run times (in seconds),
+    the number of pages and text lines per engine. The pdf docs are parsed by both engines in the same way, so the
+    difference is the layout analysis only. """
+    from D_Search.DocumentSession import DocumentSession
+    results = dict()
+    for layout_engine in (LAYOUT_ENGINE_PDFMINER, LAYOUT_ENGINE_GLYPH_LINES):
+        best_seconds = None
+        number_of_pages = number_of_lines = 0
+        for _ in range(repeat):
+            number_of_pages = number_of_lines = 0
+            start = time.perf_counter()
+            for path in paths:
+                with DocumentSession(path=path, layout_params=layout_params, layout_engine=layout_engine) as session:
+                    for layout in session.iter_layouts():
+                        number_of_pages += 1
+                        number_of_lines += sum(len(text_box) for text_box in layout if
+                                               isinstance(text_box, LTTextBoxHorizontal))
+            seconds = time.perf_counter() - start
+            best_seconds = seconds if best_seconds is None else min(best_seconds, seconds)
+        results[layout_engine] = {'seconds': best_seconds, 'pages': number_of_pages, 'lines': number_of_lines}
+    results['speedup'] = results[LAYOUT_ENGINE_PDFMINER]['seconds'] / results[LAYOUT_ENGINE_GLYPH_LINES]['seconds']
+    return results
+
+
+if __name__ == '__main__':
+    """ Usage: python -m D_Search.LayoutDevice report1.pdf report2.pdf ... """
+    from A_Configuration_and_Logs.conf_and_log import ConfLog
+    conf_log = ConfLog()
+    params = LAParams(line_overlap=conf_log.pdfminer_layout_line_overlap,
+                      char_margin=conf_log.pdfminer_layout_char_margin,
+                      line_margin=conf_log.pdfminer_layout_line_margin,
+                      word_margin=conf_log.pdfminer_layout_word_margin,
+                      boxes_flow=conf_log.pdfminer_layout_boxes_flow,
+                      detect_vertical=conf_log.pdfminer_layout_detect_vertical,
+                      all_texts=conf_log.pdfminer_layout_all_texts)
+    print(benchmark_layout_engines(paths=sys.argv[1:], layout_params=params, repeat=3))
@@ -1,18 +1,17 @@
-from io import StringIO
-from pdfminer.layout import LAParams, LTTextBox, LTTextContainer, LTTextLine, LTTextLineHorizontal, LTChar
-from pdfminer.pdfpage import PDFPage, PDFTextExtractionNotAllowed
-from pdfminer.pdfinterp import PDFResourceManager
-from pdfminer.pdfinterp import PDFPageInterpreter
-from pdfminer.converter import PDFPageAggregator, PDFConverter
-from pdfminer.converter import TextConverter
-from pdfminer.pdfdocument import PDFDocument
-from pdfminer.pdfparser import PDFParser
-from pdfminer.high_level import extract_pages
-from typing import List, Dict, Set, Tuple
+from pdfminer.layout import LTTextContainer
+from pdfminer.pdfpage import PDFTextExtractionNotAllowed
+from typing import List, Dict, Set, Tuple, Iterable, Iterator
 import re
 import math
-from itertools import islice
 from A_Configuration_and_Logs.conf_and_log import ConfLog
+from A_Configuration_and_Logs.log_setup import set_log_context
+from D_Search.Backend import get_backend, PDFMinerBackend
+from D_Search.TableIndex import PageTableIndex, get_year_header_coordinates
+from D_Search.ApproximateMatch import ApproximateMatcher
+from D_Search.SentenceCorpus import get_sentences_by_scope
+from D_Search.SentenceIndex import PageSentenceIndex
+from D_Search.PageText import PageText, TextLine
+from D_Search.FindingsStore import PageFindingsStore, get_fingerprint, get_page_fingerprint, FINDINGS_VERSION
 
 """ Documentation is here:
     https://pdfminersix.readthedocs.io/en/latest/index.html
@@ -38,6 +37,8 @@ class XYWordMatch:
         self.neighbour_values = list()
         self.text_values = list()
         self.table_values = list()
+        """ Multi-year mode: year -> values in the column of that year """
+        self.table_values_by_year = dict()
 
     @property
     def x_coordinates(self) -> tuple:
@@ -77,6 +78,9 @@ class XYWordMatch:
     def add_table_values(self, text: str):
         self.table_values.append(text)
 
+    def add_table_value_of_year(self, year: str, text: str):
+        self.table_values_by_year.setdefault(year, list()).append(text)
+
     def _calc_y_neighbour_tolerance(self, y0: float, y1: float) -> tuple:
         y_tolerance = (y1 - y0) * self.neighbour_y_tolerance
         y0_lower = y0 - y_tolerance
@@ -118,187 +122,216 @@ class XYWordMatch:
         return y_within_bounds
 
 
-class PDFMiner:
+class PageSearch:
+    """ The search for neighbour, table and text values on the tokenized text of pages (PageText). It does not need
+    the pdf document itself, so the very same pages can be searched again with other settings (see
+    F_Extract/Sweep.py). PDFMiner below adds the pdf document. """
 
-    def __init__(self, path: str):
-        self.path = path
-        self.conf_log = ConfLog()
-        self.stream = open(path, 'rb')
-        self.parser = PDFParser(self.stream)
-        self.document = PDFDocument(self.parser)
-        self.doc_is_extractable = self.document.is_extractable
-        self.resource_manager = PDFResourceManager()
-        """ 
-        My standard settings for layout parameters:
-        (line_overlap=0.5, char_margin=2.0, line_margin=0.75, word_margin=0.1, boxes_flow=0.0,
-                                                        detect_vertical=False, all_texts=True)
-        Default settings for layout parameters:
-        (line_overlap=0.5, char_margin=2.0, line_margin=0.5, word_margin=0.1,boxes_flow=0.5, detect_vertical=False, 
-        all_texts=False)
-        Source: https://pdfminersix.readthedocs.io/en/latest/reference/composable.html#laparams """
-        self.layout_params = LAParams(line_overlap=self.conf_log.pdfminer_layout_line_overlap,
-                                      char_margin=self.conf_log.pdfminer_layout_char_margin,
-                                      line_margin=self.conf_log.pdfminer_layout_line_margin,
-                                      word_margin=self.conf_log.pdfminer_layout_word_margin,
-                                      boxes_flow=self.conf_log.pdfminer_layout_boxes_flow,
-                                      detect_vertical=self.conf_log.pdfminer_layout_detect_vertical,
-                                      all_texts=self.conf_log.pdfminer_layout_all_texts)
-        self.device = TextConverter(rsrcmgr=self.resource_manager, outfp=StringIO(), laparams=self.layout_params)
-        self.page_aggregator = PDFPageAggregator(rsrcmgr=self.resource_manager, laparams=self.layout_params)
-        self.interpreter = PDFPageInterpreter(self.resource_manager, self.device)
-        self.pages = PDFPage.get_pages(fp=self.stream, pagenos=None, maxpages=0, password='',
-                                       caching=True, check_extractable=False)
-        self.pages = extract_pages(pdf_file=path, laparams=self.layout_params)
+    def __init__(self, conf_log: ConfLog = None, page_store: PageFindingsStore = None):
+        self.conf_log = ConfLog() if conf_log is None else conf_log
+        """ Optional store for page level deduplication (shared by all documents of a run) """
+        self.page_store = page_store
         self.matching_sentences = set()
-
-    def process_pages(self):
-        page_number = 0
-        for page in self.pages:
-            page_number += 1
-            print('Processing next page...')
-            self.interpreter.process_page(page)
-            layout = self.page_aggregator.get_result()
-            for lobj in layout:
-                if isinstance(lobj, LTTextContainer):
-                    print('Type is:', type(lobj))
-                    one, two, three, four, text = lobj.bbox[0], lobj.bbox[1], lobj.bbox[2], lobj.bbox[
-                        3], lobj.get_text()
-                    print(f'At {one}, {two}, {three}, {four} text is: {text}')
-
-    def find_word(self, keywords_dict_of_list: Dict[str, List[str]], search_word_list: List[str],
-                  neighbour_x_tolerance: float, neighbour_y_tolerance: float,
-                  table_keywords: List[str], table_x_tolerance: float = 3.50, table_y_tolerance: float = 0.25,
-                  decimals: int = 1):
-        if not self.doc_is_extractable:
-            raise PDFTextExtractionNotAllowed('The pdf document does not allow extraction ! ')
-        findings = list()
-        page_number = 0
+        """ Optional: called with (page number, scope -> matching sentences) of every page, e.g. the sink of a
+        SentenceCorpus (see D_Search/SentenceCorpus.py) """
+        self.sentence_sink = None
+        """ ApproximateMatcher per keyword list (approximate mode only) """
+        self._approximate_matchers = dict()
+
+    def find_word_in_pages(self, page_texts: Iterable[PageText], keywords_dict_of_list: Dict[str, List[str]],
+                           search_word_list: List[str], neighbour_x_tolerance: float, neighbour_y_tolerance: float,
+                           table_keywords: List[str], table_x_tolerance: float = 3.50, table_y_tolerance: float = 0.25,
+                           decimals: int = 1) -> List[dict]:
+        return list(self.iter_findings_in_pages(page_texts=page_texts, keywords_dict_of_list=keywords_dict_of_list,
+                                                search_word_list=search_word_list,
+                                                neighbour_x_tolerance=neighbour_x_tolerance,
+                                                neighbour_y_tolerance=neighbour_y_tolerance,
+                                                table_keywords=table_keywords, table_x_tolerance=table_x_tolerance,
+                                                table_y_tolerance=table_y_tolerance, decimals=decimals))
+
+    def iter_findings_in_pages(self, page_texts: Iterable[PageText], keywords_dict_of_list: Dict[str, List[str]],
+                               search_word_list: List[str], neighbour_x_tolerance: float,
+                               neighbour_y_tolerance: float, table_keywords: List[str],
+                               table_x_tolerance: float = 3.50, table_y_tolerance: float = 0.25,
+                               decimals: int = 1) -> Iterator[dict]:
+        """ Yields the findings of every page (with any findings) as soon as the page is searched. Pages are only
+        read and searched as far as the caller consumes the generator, so the caller can stop early. """
+        """ Pages can only be reused from the page store if they were analyzed with the same settings (and the same
+        version of the search code) """
+        config_fingerprint = None
+        if self.page_store is not None:
+            config_fingerprint = get_fingerprint(
+                FINDINGS_VERSION, self.conf_log.get_section_settings('D_Search', 'D_Search.PDFMiner.LayoutOptions'),
+                keywords_dict_of_list, search_word_list, neighbour_x_tolerance, neighbour_y_tolerance,
+                table_keywords, table_x_tolerance, table_y_tolerance, decimals)
         """ I. Iterate over all pages: """
-        for all_layout_objects_on_one_page in self.pages:
-            page_number += 1
-            page_findings = dict()
-            """ II. Iterate over all keyword_lists in the keyword_list_of_lists: """
-            for keywords_key, keywords_list in keywords_dict_of_list.items():
-                list_of_word_match_objects = list()
-                set_of_table_keyword_coordinate_tuples = set()
-                set_of_matching_sentences_in_text_container = set()
-                """ III. Iterate over all LTTextContainer objects (called: text_container) on a page: """
-                for text_container in all_layout_objects_on_one_page:
-                    if isinstance(text_container, LTTextContainer) or isinstance(text_container, LTTextLine):
-                        """ III.A. Get matching text of text container for word2vec analysis """
-                        text_in_text_container = text_container.get_text()
-                        clean_text_in_text_container = ' '.join(text_in_text_container.split())
-                        """ Find sentences that contain both, any one keyword AND any one search_word """
-                        matching_sentences_in_text_container = \
-                            get_sentences_if_they_contain_words_of_two_search_lists(text_string=clean_text_in_text_container,
-                                                                                  word_list_one=keywords_list,
-                                                                                  word_list_two=search_word_list)
-                        for sentence in matching_sentences_in_text_container:
-                            set_of_matching_sentences_in_text_container.add(sentence)
-
-                        """ III.B. Get XY-Coordinates of keywords and table headings (table_keywords) ... """
-                        for text_line in text_container:
-                            """ Get xy-coordinates of keywords """
-                            keyword_coordinates_in_text_line = self.get_coordinates_of_keyword(
-                                text_line_object=text_line,
-                                keywords_list=keywords_list)
-                            if keyword_coordinates_in_text_line is not None:
-                                for x0, y0, x1, y1 in keyword_coordinates_in_text_line:
-                                    """ If keyword matches content of this Text object, then initiate the data carrier object
-                                    (XYWordMatch-instance) and store position data there: """
-                                    word_match = XYWordMatch(x0=x0, x1=x1, y0=y0, y1=y1,
-                                                             neighbour_x_tolerance=neighbour_x_tolerance,
-                                                             neighbour_y_tolerance=neighbour_y_tolerance,
-                                                             table_x_tolerance=table_x_tolerance,
-                                                             table_y_tolerance=table_y_tolerance)
-                                    list_of_word_match_objects.append(word_match)
-                            """ Get xy-coordinates of table_keywords """
-                            table_keyword_coordinates_in_text_line = self.get_coordinates_of_keyword(
-                                text_line_object=text_line,
-                                keywords_list=table_keywords)
-                            if table_keyword_coordinates_in_text_line is not None:
-                                set_of_table_keyword_coordinate_tuples.update(table_keyword_coordinates_in_text_line)
-
-                """III.B. ... and set xy-coordinates for potential table_keyword-values (with these coordinates) 
-                later """
-                list_of_word_match_objects = self.set_x_coordinates_of_table_keyword_values(
-                    set_of_table_keyword_coordinate_tuples=set_of_table_keyword_coordinate_tuples,
-                    list_of_word_match_objects=list_of_word_match_objects,
-                    decimals=decimals)
-
-                """ IV. Get all the values """
-                for text_container in all_layout_objects_on_one_page:
-                    if isinstance(text_container, LTTextContainer):
-                        for text_line in text_container:
-                            if isinstance(text_line, LTTextLine):
-                                """ IV.A. Get neighbour values """
-                                list_of_word_match_objects = \
-                                    self.get_neighbour_values(text_line_object=text_line,
-                                                              list_of_word_match_objects=list_of_word_match_objects,
-                                                              decimals=decimals)
-                                """ IV.B. Get table values """
-                                list_of_word_match_objects = \
-                                    self.get_table_values(text_line_object=text_line,
-                                                          list_of_word_match_objects=list_of_word_match_objects,
-                                                          decimals=decimals)
-
-                """ Collect all data for each keyword_list """
-                if len(list_of_word_match_objects) > 0 or len(set_of_matching_sentences_in_text_container) > 0:
-                    container_findings = dict()
-                    container_findings['text_values'] = set()
-                    container_findings['neighbour_values'] = set()
-                    container_findings['table_values'] = set()
-                    if len(set_of_matching_sentences_in_text_container) > 0:
-                        for sentence in set_of_matching_sentences_in_text_container:
-                            """ Found text is stored in PDFMiner instance """
-                            self.matching_sentences.add(sentence)
-                            numbers = self.text_filter(sentence=sentence)
-                            for number in numbers:
-                                if number is not None:
-                                    container_findings['text_values'].add(number)
-                    for word_match_object in list_of_word_match_objects:
-                        if len(word_match_object.neighbour_values) > 0:
-                            for neighbour_value in word_match_object.neighbour_values:
-                                val = self.neighbour_and_table_value_filter(value=neighbour_value)
-                                if val is not None:
-                                    container_findings['neighbour_values'].add(val)
-                        if len(word_match_object.table_values) > 0:
-                            for table_value in word_match_object.table_values:
-                                val = self.neighbour_and_table_value_filter(value=table_value)
-                                if val is not None:
-                                    container_findings['table_values'].add(val)
-                    page_findings['page_number'] = page_number
-                    page_findings[keywords_key] = container_findings
-
-            """ Finally, append all keyword_list findings to an aggregated list ("findings"):"""
+        for page_text in page_texts:
+            set_log_context(page=page_text.page_number)
+            page_findings = self.get_page_findings(page_text=page_text,
+                                                   config_fingerprint=config_fingerprint,
+                                                   keywords_dict_of_list=keywords_dict_of_list,
+                                                   search_word_list=search_word_list,
+                                                   neighbour_x_tolerance=neighbour_x_tolerance,
+                                                   neighbour_y_tolerance=neighbour_y_tolerance,
+                                                   table_keywords=table_keywords,
+                                                   table_x_tolerance=table_x_tolerance,
+                                                   table_y_tolerance=table_y_tolerance,
+                                                   decimals=decimals)
             if page_findings:
-                findings.append(page_findings)
-        return findings
-
-    def get_year_and_fy(self) -> list or None:
-        standard_year = self.conf_log.find_word_standard_year_if_year_not_found
-        """ First, try to get year from file name """
-        match = re.match(self.conf_log.find_word_year_regex, self.path)
-        if match:
-            year = match.group(1)
-            return [year, 'FY' + year[-2:], 'FY' + year]
-        """ Second, try to get year from first page (title) """
-        pages = extract_pages(self.path, page_numbers=[0], maxpages=1)
-        for page in pages:
-            for layout_obj in page:
-                if isinstance(layout_obj, LTTextContainer) or isinstance(layout_obj, LTTextLine):
-                    text = layout_obj.get_text()
-                    year_list = text.split()
-                    for year in year_list:
-                        if len(year) == 4 and is_digit(year) and year.startswith('20'):
-                            return [year, 'FY' + year[-2:], 'FY' + year]
-        """ If all fails, take standard year defined in config.ini """
-        return [standard_year, 'FY' + standard_year[-2:], 'FY' + standard_year]
-
-    def get_coordinates_of_keyword(self, text_line_object: LTTextLine, keywords_list: list, decimals: int = 1) -> \
-            Set[Tuple] or None:
-        if isinstance(text_line_object, LTTextLine) and text_line_object is not None and keywords_list is not None:
-            text_in_line = text_line_object.get_text()
+                yield page_findings
+
+    def get_page_findings(self, page_text: PageText, config_fingerprint: str or None, **find_word_kwargs) -> dict:
+        """ Returns the findings of the page from the page store if the very same page was already analyzed under the
+        same config (config_fingerprint). Otherwise, the page is searched and its findings are stored. """
+        if self.page_store is None or config_fingerprint is None:
+            return self.find_word_on_page(page_text=page_text, **find_word_kwargs)
+        page_fingerprint = get_page_fingerprint(page_text=page_text,
+                                                grid=self.conf_log.find_word_page_fingerprint_grid)
+        stored = self.page_store.get(config_fingerprint=config_fingerprint, page_fingerprint=page_fingerprint)
+        if stored is not None:
+            page_findings, matching_sentences_on_page = stored
+            self.matching_sentences.update(matching_sentences_on_page)
+            if self.sentence_sink is not None and len(matching_sentences_on_page) > 0:
+                self.sentence_sink(page_text.page_number, get_sentences_by_scope(
+                    sentences=matching_sentences_on_page,
+                    keywords_dict_of_list=find_word_kwargs['keywords_dict_of_list'],
+                    search_word_list=find_word_kwargs['search_word_list'],
+                    keyword_matchers=self.get_keyword_matchers(
+                        keywords_dict_of_list=find_word_kwargs['keywords_dict_of_list'])))
+            if page_findings:
+                page_findings['page_number'] = page_text.page_number
+            return page_findings
+        matching_sentences_on_page = set()
+        page_findings = self.find_word_on_page(page_text=page_text, matching_sentences=matching_sentences_on_page,
+                                               **find_word_kwargs)
+        self.matching_sentences.update(matching_sentences_on_page)
+        self.page_store.put(config_fingerprint=config_fingerprint, page_fingerprint=page_fingerprint,
+                            page_findings=page_findings, matching_sentences=matching_sentences_on_page)
+        return page_findings
+
+    def find_word_on_page(self, page_text: PageText, keywords_dict_of_list: Dict[str, List[str]],
+                          search_word_list: List[str],
+                          neighbour_x_tolerance: float, neighbour_y_tolerance: float,
+                          table_keywords: List[str], table_x_tolerance: float = 3.50, table_y_tolerance: float = 0.25,
+                          decimals: int = 1, matching_sentences: Set[str] = None) -> dict:
+        """ The matching sentences of the page are added to matching_sentences (default: self.matching_sentences) """
+        if matching_sentences is None:
+            matching_sentences = self.matching_sentences
+        page_findings = dict()
+        text_containers = page_text.blocks
+        text_lines = page_text.lines
+        """ The coordinates of all words and the table index of the page are only built if any keyword was found on 
+        this page and then only ONCE for all keyword groups: """
+        word_coordinates_on_page = None
+        table_index = None
+        year_table_index = None
+        sentences_by_scope = dict()
+        """ The sentences of all text containers, tagged with their keyword groups and search words, ONCE for all
+        keyword groups """
+        sentence_index = PageSentenceIndex(texts=[text_container.get_text() for text_container in text_containers],
+                                           keywords_dict_of_list=keywords_dict_of_list,
+                                           search_word_list=search_word_list,
+                                           segmentation=self.conf_log.find_word_sentence_segmentation,
+                                           keyword_matchers=self.get_keyword_matchers(
+                                               keywords_dict_of_list=keywords_dict_of_list))
+        """ II. Iterate over all keyword_lists in the keyword_list_of_lists: """
+        for keywords_key, keywords_list in keywords_dict_of_list.items():
+            list_of_word_match_objects = list()
+            """ III.A. Get matching text of text container for word2vec analysis: sentences that contain both, any one
+            keyword AND any one search_word """
+            set_of_matching_sentences_in_text_container = sentence_index.get_matching_sentences(
+                keywords_key=keywords_key)
+
+            """ III.B. Get XY-Coordinates of keywords """
+            for text_line in text_lines:
+                keyword_coordinates_in_text_line = self.get_coordinates_of_keyword(text_line_object=text_line,
+                                                                                   keywords_list=keywords_list)
+                if keyword_coordinates_in_text_line is not None:
+                    for x0, y0, x1, y1 in keyword_coordinates_in_text_line:
+                        """ If keyword matches content of this Text object, then initiate the data carrier object
+                        (XYWordMatch-instance) and store position data there: """
+                        word_match = XYWordMatch(x0=x0, x1=x1, y0=y0, y1=y1,
+                                                 neighbour_x_tolerance=neighbour_x_tolerance,
+                                                 neighbour_y_tolerance=neighbour_y_tolerance,
+                                                 table_x_tolerance=table_x_tolerance,
+                                                 table_y_tolerance=table_y_tolerance)
+                        list_of_word_match_objects.append(word_match)
+
+            """ IV. Get all the values """
+            if len(list_of_word_match_objects) > 0:
+                if word_coordinates_on_page is None:
+                    word_coordinates_on_page = self.get_coordinates_of_words_on_page(text_lines=text_lines,
+                                                                                     decimals=decimals)
+                    table_index = self.get_table_index(text_lines=text_lines,
+                                                       word_coordinates_on_page=word_coordinates_on_page,
+                                                       table_keywords=table_keywords,
+                                                       table_x_tolerance=table_x_tolerance, decimals=decimals)
+                    if self.conf_log.find_word_multi_year:
+                        year_table_index = self.get_year_table_index(
+                            word_coordinates_on_page=word_coordinates_on_page, table_x_tolerance=table_x_tolerance,
+                            decimals=decimals)
+                """ IV.A. Get neighbour values """
+                list_of_word_match_objects = \
+                    self.get_neighbour_values(word_coordinates_list=word_coordinates_on_page,
+                                              list_of_word_match_objects=list_of_word_match_objects)
+                """ IV.B. Get table values """
+                list_of_word_match_objects = \
+                    self.get_table_values(table_index=table_index,
+                                          list_of_word_match_objects=list_of_word_match_objects)
+                """ IV.C. Get table values of every year (multi-year mode) """
+                if year_table_index is not None:
+                    self.get_table_values_by_year(year_table_index=year_table_index,
+                                                  list_of_word_match_objects=list_of_word_match_objects)
+
+            """ Collect all data for each keyword_list """
+            if len(list_of_word_match_objects) > 0 or len(set_of_matching_sentences_in_text_container) > 0:
+                container_findings = dict()
+                container_findings['text_values'] = set()
+                container_findings['neighbour_values'] = set()
+                container_findings['table_values'] = set()
+                if self.conf_log.find_word_multi_year:
+                    container_findings['table_values_by_year'] = dict()
+                if len(set_of_matching_sentences_in_text_container) > 0:
+                    sentences_by_scope[keywords_key] = set_of_matching_sentences_in_text_container
+                    for sentence in set_of_matching_sentences_in_text_container:
+                        """ Found text is stored in PDFMiner instance """
+                        matching_sentences.add(sentence)
+                        numbers = self.text_filter(sentence=sentence)
+                        for number in numbers:
+                            if number is not None:
+                                container_findings['text_values'].add(number)
+                for word_match_object in list_of_word_match_objects:
+                    if len(word_match_object.neighbour_values) > 0:
+                        for neighbour_value in word_match_object.neighbour_values:
+                            val = self.neighbour_and_table_value_filter(value=neighbour_value)
+                            if val is not None:
+                                container_findings['neighbour_values'].add(val)
+                    if len(word_match_object.table_values) > 0:
+                        for table_value in word_match_object.table_values:
+                            val = self.neighbour_and_table_value_filter(value=table_value)
+                            if val is not None:
+                                container_findings['table_values'].add(val)
+                    for year, table_values_of_year in sorted(word_match_object.table_values_by_year.items()):
+                        for table_value in table_values_of_year:
+                            val = self.neighbour_and_table_value_filter(value=table_value)
+                            if val is not None:
+                                container_findings['table_values_by_year'].setdefault(year, set()).add(val)
+                page_findings['page_number'] = page_text.page_number
+                page_findings[keywords_key] = container_findings
+        if self.sentence_sink is not None and len(sentences_by_scope) > 0:
+            self.sentence_sink(page_text.page_number, sentences_by_scope)
+        return page_findings
+
+    def get_coordinates_of_keyword(self, text_line_object: TextLine, keywords_list: list, decimals: int = 1,
+                                   include_keyword: bool = False) -> Set[Tuple] or None:
+        """ Returns (x0, y0, x1, y1) of every keyword occurrence or (x0, y0, x1, y1, keyword) if include_keyword """
+        if isinstance(text_line_object, TextLine) and keywords_list is not None and \
+                self.conf_log.find_word_approximate:
+            return self.get_approximate_coordinates_of_keyword(text_line_object=text_line_object,
+                                                               keywords_list=keywords_list, decimals=decimals,
+                                                               include_keyword=include_keyword)
+        if isinstance(text_line_object, TextLine) and keywords_list is not None:
+            text_in_line = text_line_object.text
             if any(word in text_in_line for word in keywords_list):
                 keyword_coordinates_in_text_line = set()
                 for keyword in keywords_list:
@@ -308,14 +341,45 @@ class PDFMiner:
                         (x0, y0, x1, y1, word) = self.get_coordinates_and_word(text_line_object=text_line_object,
                                                                                start=start, end=end, decimals=decimals)
                         if all((x0, y0, x1, y1)):
-                            keyword_coordinates_in_text_line.add((x0, y0, x1, y1))
+                            keyword_coordinates_in_text_line.add((x0, y0, x1, y1, keyword) if include_keyword else
+                                                                 (x0, y0, x1, y1))
                 return keyword_coordinates_in_text_line if len(keyword_coordinates_in_text_line) > 0 else None
             else:
                 return None
 
-    def get_coordinates_of_word_in_text_line(self, text_line_object: LTTextLine, decimals: int) -> Set[Tuple] or None:
-        if isinstance(text_line_object, LTTextLine) and text_line_object is not None:
-            text_in_line = text_line_object.get_text()
+    def get_approximate_coordinates_of_keyword(self, text_line_object: TextLine, keywords_list: list,
+                                               decimals: int = 1, include_keyword: bool = False) -> Set[Tuple] or None:
+        """ Like get_coordinates_of_keyword, but the keywords also match with OCR errors (see
+        D_Search/ApproximateMatch.py) """
+        keyword_coordinates_in_text_line = set()
+        for keyword, start, end in self.get_approximate_matcher(keywords_list=keywords_list).find(
+                line=text_line_object.text):
+            (x0, y0, x1, y1, word) = self.get_coordinates_and_word(text_line_object=text_line_object,
+                                                                   start=start, end=end, decimals=decimals)
+            if all((x0, y0, x1, y1)):
+                keyword_coordinates_in_text_line.add((x0, y0, x1, y1, keyword) if include_keyword else
+                                                     (x0, y0, x1, y1))
+        return keyword_coordinates_in_text_line if len(keyword_coordinates_in_text_line) > 0 else None
+
+    def get_approximate_matcher(self, keywords_list: List[str]) -> ApproximateMatcher:
+        key = tuple(keywords_list)
+        if key not in self._approximate_matchers:
+            self._approximate_matchers[key] = ApproximateMatcher(
+                keywords=keywords_list, max_errors=self.conf_log.find_word_approximate_max_errors,
+                min_length=self.conf_log.find_word_approximate_min_length)
+        return self._approximate_matchers[key]
+
+    def get_keyword_matchers(self, keywords_dict_of_list: Dict[str, List[str]]) -> \
+            Dict[str, ApproximateMatcher] or None:
+        """ keywords_key -> ApproximateMatcher for the keywords of the matching sentences (approximate mode only) """
+        if not self.conf_log.find_word_approximate:
+            return None
+        return {keywords_key: self.get_approximate_matcher(keywords_list=keywords_list) for keywords_key, keywords_list
+                in keywords_dict_of_list.items()}
+
+    def get_coordinates_of_word_in_text_line(self, text_line_object: TextLine, decimals: int) -> Set[Tuple] or None:
+        if isinstance(text_line_object, TextLine):
+            text_in_line = text_line_object.text
             word_coordinates_in_text_line = set()
             start_end_indices = get_first_last_indices_of_all_words_in_string(sentence=text_in_line)
             for start, end in start_end_indices:
@@ -327,37 +391,48 @@ class PDFMiner:
         else:
             return None
 
-    def get_coordinates_and_word(self, text_line_object: LTTextLine, start: int, end: int,
+    def get_coordinates_and_word(self, text_line_object: TextLine, start: int, end: int,
                                  decimals: int) -> tuple or None:
-        word_start_and_end = list(islice(text_line_object, start, end))
+        word_start_and_end = text_line_object.items[start:end]
         """ There are some issues with strange fond types in some pdf docs in which case None is returned """
         if word_start_and_end is not None and len(word_start_and_end) > 0 \
-                and isinstance(word_start_and_end[0],LTChar) and isinstance(word_start_and_end[-1], LTChar):
-            x0 = round(word_start_and_end[0].bbox[0], decimals)
-            y0 = round(word_start_and_end[0].bbox[1], decimals)
-            x1 = round(word_start_and_end[-1].bbox[2], decimals)
-            y1 = round(word_start_and_end[-1].bbox[3], decimals)
+                and word_start_and_end[0][1] is not None and word_start_and_end[-1][1] is not None:
+            x0 = round(word_start_and_end[0][1][0], decimals)
+            y0 = round(word_start_and_end[0][1][1], decimals)
+            x1 = round(word_start_and_end[-1][1][2], decimals)
+            y1 = round(word_start_and_end[-1][1][3], decimals)
             word = ''
-            for char in word_start_and_end:
-                word += char.get_text()
+            for char, _ in word_start_and_end:
+                word += char
             return x0, y0, x1, y1, word
         else:
             return None, None, None, None, None
 
-    def set_x_coordinates_of_table_keyword_values(self, set_of_table_keyword_coordinate_tuples: set,
-                                                  list_of_word_match_objects: List[XYWordMatch],
-                                                  decimals: int) -> List[XYWordMatch]:
-        """ Now set x-coordinates for potential table_keyword-values (with these coordinates) later """
-        for x0, _, x1, _ in set_of_table_keyword_coordinate_tuples:
-            for word_match_in_list in list_of_word_match_objects:
-                word_match_in_list.set_table_keyword_value_x_coordinates_plus_tolerance(x0=round(x0, decimals),
-                                                                                        x1=round(x1, decimals))
-        return list_of_word_match_objects
-
-    def get_neighbour_values(self, text_line_object: LTTextLine, list_of_word_match_objects: List[XYWordMatch],
-                             decimals: int) -> List[XYWordMatch]:
-        word_coordinates_list = self.get_coordinates_of_word_in_text_line(
-            text_line_object=text_line_object, decimals=decimals)
+    def get_coordinates_of_words_on_page(self, text_lines: List[TextLine], decimals: int) -> Set[Tuple]:
+        word_coordinates_on_page = set()
+        for text_line in text_lines:
+            word_coordinates_in_text_line = self.get_coordinates_of_word_in_text_line(text_line_object=text_line,
+                                                                                      decimals=decimals)
+            if word_coordinates_in_text_line is not None:
+                word_coordinates_on_page.update(word_coordinates_in_text_line)
+        return word_coordinates_on_page
+
+    def get_table_index(self, text_lines: List[TextLine], word_coordinates_on_page: Set[Tuple],
+                        table_keywords: List[str], table_x_tolerance: float, decimals: int) -> PageTableIndex:
+        """ The table_keywords (e.g. the reporting year) are the column headers of the table index """
+        table_keyword_coordinates_on_page = set()
+        for text_line in text_lines:
+            table_keyword_coordinates_in_text_line = self.get_coordinates_of_keyword(text_line_object=text_line,
+                                                                                     keywords_list=table_keywords,
+                                                                                     include_keyword=True)
+            if table_keyword_coordinates_in_text_line is not None:
+                table_keyword_coordinates_on_page.update(table_keyword_coordinates_in_text_line)
+        return PageTableIndex(word_coordinates=word_coordinates_on_page,
+                              table_keyword_coordinates=table_keyword_coordinates_on_page,
+                              table_x_tolerance=table_x_tolerance, decimals=decimals)
+
+    def get_neighbour_values(self, word_coordinates_list: Set[Tuple],
+                             list_of_word_match_objects: List[XYWordMatch]) -> List[XYWordMatch]:
         if list_of_word_match_objects is not None:
             for word_match_in_list in list_of_word_match_objects:
                 if word_coordinates_list is not None:
@@ -387,20 +462,142 @@ class PDFMiner:
                 numbers.append(float(word))
         return numbers
 
-    def get_table_values(self, text_line_object: LTTextLine, list_of_word_match_objects: List[XYWordMatch],
-                         decimals: int) -> List[XYWordMatch]:
-        word_coordinates_list = self.get_coordinates_of_word_in_text_line(
-            text_line_object=text_line_object, decimals=decimals)
-        if list_of_word_match_objects is not None:
+    def get_table_values(self, table_index: PageTableIndex,
+                         list_of_word_match_objects: List[XYWordMatch]) -> List[XYWordMatch]:
+        """ The keyword is the row label: all values in its y-band (and in any table_keyword column) are looked up 
+        in the table index of the page """
+        if list_of_word_match_objects is not None and table_index is not None and not table_index.is_empty():
             for word_match_in_list in list_of_word_match_objects:
-                if word_coordinates_list is not None:
-                    for x0, y0, x1, y1, word in word_coordinates_list:
-                        if word_match_in_list.are_table_keyword_x_coordinates_within_tolerance(xx0=x0, xx1=x1) and \
-                                word_match_in_list.are_table_keyword_y_coordinates_within_tolerance(yy0=y0, yy1=y1):
-                            word_match_in_list.add_table_values(word)
+                for y0, y1 in word_match_in_list.yy_coordinates_table_keyword_values_plus_tolerance:
+                    for word in table_index.get_values(y0=y0, y1=y1):
+                        word_match_in_list.add_table_values(word)
+        return list_of_word_match_objects
+
+    def get_year_table_index(self, word_coordinates_on_page: Set[Tuple], table_x_tolerance: float,
+                             decimals: int) -> PageTableIndex or None:
+        """ Table index whose columns are ALL years in the year header rows of the page (e.g. 2020, 2019, 2018 side
+        by side), not only the reporting year of the table_keywords. None if the page has no such header row. """
+        year_header_coordinates = get_year_header_coordinates(
+            word_coordinates=word_coordinates_on_page, min_years_in_row=self.conf_log.find_word_multi_year_min_years)
+        if len(year_header_coordinates) == 0:
+            return None
+        return PageTableIndex(word_coordinates=word_coordinates_on_page,
+                              table_keyword_coordinates=year_header_coordinates,
+                              table_x_tolerance=table_x_tolerance, decimals=decimals)
+
+    def get_table_values_by_year(self, year_table_index: PageTableIndex,
+                                 list_of_word_match_objects: List[XYWordMatch]) -> List[XYWordMatch]:
+        """ Like get_table_values, but the values are kept per column (year) """
+        if list_of_word_match_objects is not None and not year_table_index.is_empty():
+            for word_match_in_list in list_of_word_match_objects:
+                for y0, y1 in word_match_in_list.yy_coordinates_table_keyword_values_plus_tolerance:
+                    for year, words in year_table_index.get_row(y0=y0, y1=y1).items():
+                        for word in words:
+                            word_match_in_list.add_table_value_of_year(year=year, text=word)
         return list_of_word_match_objects
 
 
+class PDFMiner(PageSearch):
+
+    def __init__(self, path: str, page_store: PageFindingsStore = None, conf_log: ConfLog = None,
+                 backend: str or None = None, data: bytes or None = None):
+        PageSearch.__init__(self, conf_log=conf_log, page_store=page_store)
+        self.path = path
+        """ The pdf document is read by an extraction backend (see D_Search/Backend.py), pdfminer by default.
+        backend=None: the backend set in config.ini. data: the content of the pdf doc if it was already read into 
+        memory (the year is still taken from the file name in path) """
+        self.backend = get_backend(path=path, conf_log=self.conf_log, backend=backend, data=data)
+        self.doc_is_extractable = self.backend.is_extractable
+        if isinstance(self.backend, PDFMinerBackend):
+            """ The pdfminer objects of the session (e.g. for process_pages) """
+            self.layout_params = self.backend.layout_params
+            self.session = self.backend.session
+            self.document = self.session.document
+            self.resource_manager = self.session.resource_manager
+            self.page_aggregator = self.session.page_aggregator
+            self.interpreter = self.session.interpreter
+            self.pages = self.session.iter_layouts()
+
+    def close(self):
+        self.backend.close()
+
+    def process_pages(self):
+        page_number = 0
+        for layout in self.pages:
+            page_number += 1
+            set_log_context(page=page_number)
+            self.conf_log.logging.debug('Processing next page...')
+            for lobj in layout:
+                if isinstance(lobj, LTTextContainer):
+                    self.conf_log.logging.debug('Type is: %s', type(lobj))
+                    one, two, three, four, text = lobj.bbox[0], lobj.bbox[1], lobj.bbox[2], lobj.bbox[
+                        3], lobj.get_text()
+                    self.conf_log.logging.debug('At %s, %s, %s, %s text is: %s', one, two, three, four, text)
+
+    def get_page_order(self) -> List[int] or None:
+        """ Zero-indexed pages ranked by the outline and the page labels (see D_Search/PagePriority.py), None for the
+        document order """
+        if not self.conf_log.find_word_page_priority:
+            return None
+        try:
+            return self.backend.get_page_order(priority_terms=self.conf_log.find_word_page_priority_terms)
+        except Exception as e:
+            self.conf_log.logging.warning('Page priority not available, pages are searched in document order: %s', e)
+            return None
+
+    def iter_page_texts(self) -> Iterator[PageText]:
+        """ Extracts the pages one by one as PageText objects for the search """
+        return self.backend.iter_page_texts(page_order=self.get_page_order())
+
+    def find_word(self, keywords_dict_of_list: Dict[str, List[str]], search_word_list: List[str],
+                  neighbour_x_tolerance: float, neighbour_y_tolerance: float,
+                  table_keywords: List[str], table_x_tolerance: float = 3.50, table_y_tolerance: float = 0.25,
+                  decimals: int = 1):
+        """ The findings are returned in document order, even if the pages were searched in another order """
+        return sorted(self.iter_findings(keywords_dict_of_list=keywords_dict_of_list,
+                                       search_word_list=search_word_list,
+                                       neighbour_x_tolerance=neighbour_x_tolerance,
+                                       neighbour_y_tolerance=neighbour_y_tolerance,
+                                       table_keywords=table_keywords,
+                                       table_x_tolerance=table_x_tolerance,
+                                       table_y_tolerance=table_y_tolerance,
+                                       decimals=decimals), key=lambda page_findings: page_findings['page_number'])
+
+    def iter_findings(self, keywords_dict_of_list: Dict[str, List[str]], search_word_list: List[str],
+                      neighbour_x_tolerance: float, neighbour_y_tolerance: float,
+                      table_keywords: List[str], table_x_tolerance: float = 3.50, table_y_tolerance: float = 0.25,
+                      decimals: int = 1) -> Iterator[dict]:
+        """ Streaming version of find_word: yields the findings page by page. Pages after the caller stops consuming
+        (e.g. with E_Collect.Collect.FindingsCollector.is_complete) are not even laid out. """
+        if not self.doc_is_extractable:
+            raise PDFTextExtractionNotAllowed('The pdf document does not allow extraction ! ')
+        yield from self.iter_findings_in_pages(page_texts=self.iter_page_texts(),
+                                               keywords_dict_of_list=keywords_dict_of_list,
+                                               search_word_list=search_word_list,
+                                               neighbour_x_tolerance=neighbour_x_tolerance,
+                                               neighbour_y_tolerance=neighbour_y_tolerance,
+                                               table_keywords=table_keywords,
+                                               table_x_tolerance=table_x_tolerance,
+                                               table_y_tolerance=table_y_tolerance,
+                                               decimals=decimals)
+
+    def get_year_and_fy(self) -> list or None:
+        standard_year = self.conf_log.find_word_standard_year_if_year_not_found
+        """ First, try to get year from file name """
+        match = re.match(self.conf_log.find_word_year_regex, self.path)
+        if match:
+            year = match.group(1)
+            return [year, 'FY' + year[-2:], 'FY' + year]
+        """ Second, try to get year from first page (title) """
+        for text in self.backend.get_title_texts():
+            year_list = text.split()
+            for year in year_list:
+                if len(year) == 4 and is_digit(year) and year.startswith('20'):
+                    return [year, 'FY' + year[-2:], 'FY' + year]
+        """ If all fails, take standard year defined in config.ini """
+        return [standard_year, 'FY' + standard_year[-2:], 'FY' + standard_year]
+
+
 def get_places_of_keyword_in_string(sentence: str, keyword: str, separator: str = ' ') -> list:
     """ This function will NOT return the index of the first word character in the sentence,
     but the x-th place(s) of a WORD in a sentence of words that are seperated by white spaces """
@@ -436,8 +633,9 @@ def is_digit(word: str) -> bool:
 
 
 def num_of_int_digits(word: str or float) -> int:
+    """ Negative numbers (e.g. "-12" in a table of changes) have as many int digits as positive ones """
     if float(word) != 0:
-        return int(math.log10(float(word))) + 1
+        return int(math.log10(abs(float(word)))) + 1
     else:
         return 0
 
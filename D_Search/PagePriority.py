@@ -0,0 +1,123 @@
+import re
+import itertools
+from typing import List, Dict, Tuple, Iterable
+from pdfminer.pdfdocument import PDFDocument, PDFNoOutlines, PDFNoPageLabels, PDFDestinationNotFound
+from pdfminer.pdftypes import PDFObjRef, resolve1
+from pdfminer.psparser import PSLiteral
+
+""" Order in which the pages of a pdf doc are searched. Emission tables are nearly always in the sustainability or
+    non-financial section of an annual report, which most reports mark in their outline (bookmarks) and sometimes in
+    their page labels (e.g. "NFS-12"). Pages in sections whose titles contain one of the priority terms are searched
+    first, the more specific (deeper) the section, the earlier. Combined with early stopping (see
+    E_Collect.Collect.FindingsCollector.is_complete) the rest of a long report is often not read at all.
+"""
+
+
+def normalize_title(title: str) -> str:
+    return ' '.join(re.sub(r'[^\w]+', ' ', title.lower()).split())
+
+
+def title_matches_terms(title: str, priority_terms: Iterable[str]) -> bool:
+    title = normalize_title(title)
+    return any(normalize_title(term) in title for term in priority_terms)
+
+
+def get_page_index_of_dest(document: PDFDocument, dest, page_indices_by_objid: Dict[int, int]) -> int or None:
+    """ A destination is an explicit array [page, /XYZ, ...], a named destination (name or string) or a dict
+    with the key 'D'. Returns the zero-indexed page or None if it can not be resolved. """
+    for _ in range(5):
+        if isinstance(dest, PDFObjRef) and dest.objid in page_indices_by_objid:
+            return page_indices_by_objid[dest.objid]
+        dest = resolve1(dest)
+        if isinstance(dest, (PSLiteral, bytes, str)):
+            name = dest.name if isinstance(dest, PSLiteral) else dest
+            try:
+                dest = document.get_dest(name)
+            except (PDFDestinationNotFound, KeyError, TypeError):
+                return None
+        elif isinstance(dest, dict):
+            dest = dest.get('D')
+        elif isinstance(dest, list) and len(dest) > 0:
+            page = dest[0]
+            if isinstance(page, PDFObjRef):
+                return page_indices_by_objid.get(page.objid)
+            """ Some writers (wrongly) use the page number instead of the page object """
+            return page if isinstance(page, int) else None
+        else:
+            return None
+    return None
+
+
+def get_outline_entries(document: PDFDocument, page_indices_by_objid: Dict[int, int], number_of_pages: int) -> \
+        List[Tuple[int, str, int]]:
+    """ (level, title, zero-indexed page) of every outline entry of a pdfminer document """
+    entries = list()
+    try:
+        for level, title, dest, action, _ in document.get_outlines():
+            if dest is None and action is not None:
+                action = resolve1(action)
+                dest = action.get('D') if isinstance(action, dict) else None
+            page_index = get_page_index_of_dest(document=document, dest=dest,
+                                                page_indices_by_objid=page_indices_by_objid)
+            if page_index is not None and 0 <= page_index < number_of_pages:
+                entries.append((level, title, page_index))
+    except PDFNoOutlines:
+        return list()
+    return entries
+
+
+def get_outline_sections(entries: List[Tuple[int, str, int]], number_of_pages: int) -> \
+        List[Tuple[int, str, int, int]]:
+    """ (level, title, first page, end page (exclusive)) of every outline entry. A section ends where the next entry
+    of the same or a higher level starts. """
+    sections = list()
+    for entry_index, (level, title, first_page) in enumerate(entries):
+        end_page = number_of_pages
+        for next_level, _, next_first_page in entries[entry_index + 1:]:
+            if next_level <= level:
+                end_page = next_first_page
+                break
+        sections.append((level, title, first_page, max(end_page, first_page + 1)))
+    return sections
+
+
+def get_page_labels(document: PDFDocument, number_of_pages: int) -> List[str]:
+    try:
+        return list(itertools.islice(document.get_page_labels(), number_of_pages))
+    except PDFNoPageLabels:
+        return list()
+
+
+def get_page_scores(outline_entries: List[Tuple[int, str, int]], page_labels: List[str], number_of_pages: int,
+                    priority_terms: List[str]) -> List[float]:
+    """ Every matching outline section adds 1 + its level (deeper sections like "GHG emissions" below
+    "Sustainability" are more specific) to all of its pages. A page label with a matching prefix adds 1. """
+    scores = [0.0] * number_of_pages
+    for level, title, first_page, end_page in get_outline_sections(entries=outline_entries,
+                                                                   number_of_pages=number_of_pages):
+        if title_matches_terms(title=title, priority_terms=priority_terms):
+            for page_index in range(first_page, end_page):
+                scores[page_index] += 1 + level
+    for page_index, label in enumerate(page_labels[:number_of_pages]):
+        label_prefix = re.sub(r'[\d\W]+$', '', label)
+        if label_prefix and title_matches_terms(title=label_prefix, priority_terms=priority_terms):
+            scores[page_index] += 1
+    return scores
+
+
+def get_page_order_from_scores(scores: List[float]) -> List[int]:
+    """ Zero-indexed pages: the ranked pages (highest score first, then in document order), then all other pages in
+    document order """
+    return sorted(range(len(scores)), key=lambda page_index: (-scores[page_index], page_index))
+
+
+def get_page_order(document: PDFDocument, page_objids: List[int], priority_terms: List[str]) -> List[int]:
+    """ Page order of a pdfminer document (page_objids: the object ids of its pages in document order) """
+    page_indices_by_objid = {objid: page_index for page_index, objid in enumerate(page_objids)}
+    number_of_pages = len(page_objids)
+    outline_entries = get_outline_entries(document=document, page_indices_by_objid=page_indices_by_objid,
+                                          number_of_pages=number_of_pages)
+    page_labels = get_page_labels(document=document, number_of_pages=number_of_pages)
+    return get_page_order_from_scores(scores=get_page_scores(outline_entries=outline_entries, page_labels=page_labels,
+                                                             number_of_pages=number_of_pages,
+                                                             priority_terms=priority_terms))
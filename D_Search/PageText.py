@@ -0,0 +1,74 @@
+from typing import List, Tuple, Iterator
+from pdfminer.layout import LTPage, LTTextContainer, LTTextLine, LTChar
+
+""" Tokenized text of a page that is independent of pdfminer's layout objects (LTPage, LTTextBox, ...).
+    A page is parsed and laid out once and then converted into these plain (and picklable) objects, which can be
+    searched again and again (e.g. with other tolerances) or be sent to other processes.
+"""
+
+
+class TextLine:
+    """ One line of text. items holds one (text, bbox) tuple per layout item of the line (in pdfminer: per LTChar or
+    LTAnno), the bbox is None for spaces and line breaks that were inserted by the layout analysis. """
+
+    def __init__(self, items: List[Tuple[str, Tuple[float, float, float, float] or None]]):
+        self.items = items
+        self.text = ''.join(text for text, _ in items)
+        boxes = [bbox for _, bbox in items if bbox is not None]
+        if len(boxes) > 0:
+            self.bbox = (min(bbox[0] for bbox in boxes), min(bbox[1] for bbox in boxes),
+                         max(bbox[2] for bbox in boxes), max(bbox[3] for bbox in boxes))
+        else:
+            self.bbox = None
+
+    @property
+    def x0(self) -> float:
+        return self.bbox[0]
+
+    @property
+    def y1(self) -> float:
+        return self.bbox[3]
+
+    def get_text(self) -> str:
+        return self.text
+
+
+class TextBlock:
+    """ A block of text lines (in pdfminer: a LTTextBox), the unit for the matching sentences """
+
+    def __init__(self, lines: List[TextLine], text: str or None = None):
+        self.lines = lines
+        self.text = ''.join(line.text for line in lines) if text is None else text
+
+    def __iter__(self) -> Iterator[TextLine]:
+        return iter(self.lines)
+
+    def get_text(self) -> str:
+        return self.text
+
+
+class PageText:
+
+    def __init__(self, page_number: int, width: float, height: float, blocks: List[TextBlock]):
+        self.page_number = page_number
+        self.width = width
+        self.height = height
+        self.blocks = blocks
+
+    @property
+    def lines(self) -> List[TextLine]:
+        return [line for block in self.blocks for line in block.lines]
+
+    def __iter__(self) -> Iterator[TextBlock]:
+        return iter(self.blocks)
+
+
+def page_text_from_layout(layout: LTPage, page_number: int) -> PageText:
+    blocks = list()
+    for text_container in layout:
+        if isinstance(text_container, LTTextContainer):
+            lines = [TextLine(items=[(item.get_text(), item.bbox if isinstance(item, LTChar) else None)
+                                     for item in text_line])
+                     for text_line in text_container if isinstance(text_line, LTTextLine)]
+            blocks.append(TextBlock(lines=lines, text=text_container.get_text()))
+    return PageText(page_number=page_number, width=layout.width, height=layout.height, blocks=blocks)
@@ -0,0 +1,217 @@
+import io
+import os
+import gzip
+import json
+import math
+import zlib
+import hashlib
+import logging
+import threading
+from typing import Dict, Set, List, Callable, Iterable, BinaryIO
+
+from D_Search.SentenceIndex import contains_keyword
+
+""" Export of the matching sentences (sentences with a keyword AND a search word, see PageSearch.find_word_on_page) as
+    a corpus for downstream models (e.g. word2vec): gzip-compressed JSON Lines, one record per sentence
+
+        {"document": "Report_2020.pdf", "page": 12, "scopes": ["Scope1", "Scope1und2"], "sentence": "..."}
+
+    The records are written while the pages are searched, nothing is kept in memory. A sentence is only written once
+    (in the whole corpus, also over several runs): the sentences that were already written are remembered in a Bloom
+    filter of fixed size (expected_sentences, false_positive_rate), which is saved next to the corpus
+    ("<path>.bloom") when the corpus is closed. If the filter is missing or does not belong to the corpus as it is (e.g.
+    the run was killed before it was closed, or expected_sentences was changed), it is rebuilt from the sentences in
+    the corpus. A damaged end of the corpus (a killed run) is cut off before new sentences are appended, its complete
+    sentences are written again. A false positive drops a new sentence (with probability false_positive_rate), a
+    duplicate is never written twice. 10 million sentences at a rate of 0.001 need about 18 MB.
+"""
+
+
+def normalize_sentence(sentence: str) -> str:
+    return ' '.join(sentence.split())
+
+
+def get_sentences_by_scope(sentences: Iterable[str], keywords_dict_of_list: Dict[str, List[str]],
+                           search_word_list: List[str], keyword_matchers: Dict[str, object] = None) -> \
+        Dict[str, Set[str]]:
+    """ The scopes of sentences that were stored without them (page and document stores): a matching sentence
+    contains any keyword of the scope (see PageSentenceIndex for the keyword_matchers) and any search word """
+    keyword_matchers = dict() if keyword_matchers is None else keyword_matchers
+    sentences_by_scope = dict()
+    for sentence in sentences:
+        if any(word in sentence for word in search_word_list):
+            for keywords_key, keywords_list in keywords_dict_of_list.items():
+                if contains_keyword(sentence=sentence, keywords_list=keywords_list,
+                                    keyword_matcher=keyword_matchers.get(keywords_key)):
+                    sentences_by_scope.setdefault(keywords_key, set()).add(sentence)
+    return sentences_by_scope
+
+
+def read_gzip_lines(stream: BinaryIO, on_line: Callable[[bytes], None], chunk_size: int = 1 << 20) -> int:
+    """ Calls on_line with every complete line of a gzip stream of one or more members, up to its end or up to the
+    first damage. Returns the end of the last complete member (the stream is undamaged up to this offset) """
+    decompressor = zlib.decompressobj(wbits=31)
+    offset, end_of_members, rest = 0, 0, b''
+    chunk = stream.read(chunk_size)
+    while chunk:
+        try:
+            data = decompressor.decompress(chunk)
+        except zlib.error:
+            break
+        lines = (rest + data).split(b'\n')
+        rest = lines.pop()
+        for line in lines:
+            on_line(line)
+        if decompressor.eof:
+            offset += len(chunk) - len(decompressor.unused_data)
+            end_of_members = offset
+            chunk = decompressor.unused_data or stream.read(chunk_size)
+            decompressor = zlib.decompressobj(wbits=31)
+        else:
+            offset += len(chunk)
+            chunk = stream.read(chunk_size)
+    return end_of_members
+
+
+class BloomFilter:
+
+    def __init__(self, expected_items: int, false_positive_rate: float = 0.001):
+        expected_items = max(expected_items, 1)
+        self.size = max(int(-expected_items * math.log(false_positive_rate) / math.log(2) ** 2), 8)
+        self.hash_count = max(int(round(self.size / expected_items * math.log(2))), 1)
+        self.bits = bytearray((self.size + 7) // 8)
+        self.count = 0
+        """ Saved and loaded with the filter (e.g. the size of the corpus it belongs to) """
+        self.metadata = dict()
+
+    def _get_positions(self, item: str) -> List[int]:
+        """ Double hashing: the k positions are derived from two 64 bit hashes """
+        digest = hashlib.blake2b(item.encode('utf-8', 'surrogatepass'), digest_size=16).digest()
+        first, second = int.from_bytes(digest[:8], 'little'), int.from_bytes(digest[8:], 'little') | 1
+        return [(first + index * second) % self.size for index in range(self.hash_count)]
+
+    def __contains__(self, item: str) -> bool:
+        return all(self.bits[position >> 3] & (1 << (position & 7)) for position in self._get_positions(item))
+
+    def add(self, item: str) -> bool:
+        """ Returns False if the item was (probably) already added """
+        added = False
+        for position in self._get_positions(item):
+            if not self.bits[position >> 3] & (1 << (position & 7)):
+                self.bits[position >> 3] |= 1 << (position & 7)
+                added = True
+        self.count += added
+        return added
+
+    def save(self, path: str, metadata: dict = None):
+        """ Atomic: the file is written under another name first and then replaces the old one """
+        self.metadata = dict() if metadata is None else metadata
+        temporary_path = path + '.tmp'
+        with open(temporary_path, 'wb') as stream:
+            stream.write(json.dumps({'size': self.size, 'hash_count': self.hash_count, 'count': self.count,
+                                     'metadata': self.metadata}).encode() + b'\n')
+            stream.write(self.bits)
+        os.replace(temporary_path, path)
+
+    def load(self, path: str) -> bool:
+        """ Loads the filter saved in path if it has the same size and number of hashes (False otherwise) """
+        with open(path, 'rb') as stream:
+            header = json.loads(stream.readline())
+            if header['size'] != self.size or header['hash_count'] != self.hash_count:
+                return False
+            self.bits = bytearray(stream.read())
+            self.count = header['count']
+            self.metadata = header.get('metadata', dict())
+        return True
+
+
+class SentenceCorpus:
+    """ Writer of the corpus (thread safe). Documents that are searched in worker processes collect their records
+    with a SentenceRecorder, the records are then written by the SentenceCorpus of the main process. """
+
+    def __init__(self, path: str, expected_sentences: int = 1000000, false_positive_rate: float = 0.001):
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self.path = path
+        self.bloom_path = path + '.bloom'
+        self.expected_sentences = expected_sentences
+        self.false_positive_rate = false_positive_rate
+        self.seen = BloomFilter(expected_items=expected_sentences, false_positive_rate=false_positive_rate)
+        if os.path.exists(path) and not self._load_filter():
+            self.rebuild_filter()
+        """ Appending starts a new gzip member, the file remains one valid gzip stream """
+        self.stream = gzip.open(path, 'at', encoding='utf-8')
+        self.lock = threading.Lock()
+        self.written = 0
+        self.duplicates = 0
+
+    def _load_filter(self) -> bool:
+        """ False if there is no filter or if it does not belong to the corpus as it is """
+        if not os.path.exists(self.bloom_path) or not self.seen.load(path=self.bloom_path):
+            return False
+        return self.seen.metadata.get('corpus_size') == os.path.getsize(self.path)
+
+    def rebuild_filter(self):
+        """ A new filter with all sentences of the corpus. A damaged end (the run was killed while the corpus was
+        written) is cut off: new members appended after it could not be read. The complete lines of the damaged end
+        are written again as a new member. """
+        self.seen = BloomFilter(expected_items=self.expected_sentences, false_positive_rate=self.false_positive_rate)
+        with open(self.path, 'r+b') as stream:
+            end_of_members = read_gzip_lines(stream=stream,
+                                             on_line=lambda line: self.seen.add(json.loads(line)['sentence']))
+            stream.seek(end_of_members)
+            damaged_end = stream.read()
+            if len(damaged_end) == 0:
+                return
+            stream.truncate(end_of_members)
+        logging.warning('Sentence corpus %s: the damaged end (%d bytes) is cut off', self.path, len(damaged_end))
+        with gzip.open(self.path, 'ab') as corpus:
+            read_gzip_lines(stream=io.BytesIO(damaged_end), on_line=lambda line: corpus.write(line + b'\n'))
+
+    def add(self, document: str, page_number: int or None, sentences_by_scope: Dict[str, Set[str]]):
+        """ page_number None: the sentences of a document from the document store (without page) """
+        scopes_of_sentences = dict()
+        for keywords_key, sentences in sentences_by_scope.items():
+            for sentence in sentences:
+                scopes_of_sentences.setdefault(normalize_sentence(sentence), list()).append(keywords_key)
+        with self.lock:
+            for sentence in sorted(scopes_of_sentences):
+                if len(sentence) == 0 or not self.seen.add(sentence):
+                    self.duplicates += 1
+                    continue
+                self.stream.write(json.dumps({'document': document, 'page': page_number,
+                                              'scopes': scopes_of_sentences[sentence], 'sentence': sentence},
+                                             ensure_ascii=False) + '\n')
+                self.written += 1
+
+    def add_records(self, records: List[tuple]):
+        for document, page_number, sentences_by_scope in records:
+            self.add(document=document, page_number=page_number, sentences_by_scope=sentences_by_scope)
+
+    def get_sink(self, document: str) -> Callable[[int, Dict[str, Set[str]]], None]:
+        """ The sentence_sink of a PageSearch that searches document """
+        return lambda page_number, sentences_by_scope: self.add(document=document, page_number=page_number,
+                                                                sentences_by_scope=sentences_by_scope)
+
+    def get_stats(self) -> Dict[str, int]:
+        return {'sentences_written': self.written, 'sentence_duplicates': self.duplicates,
+                'sentences_in_corpus': self.seen.count}
+
+    def close(self):
+        with self.lock:
+            if self.stream is not None:
+                self.stream.close()
+                self.stream = None
+                self.seen.save(path=self.bloom_path, metadata={'corpus_size': os.path.getsize(self.path)})
+
+
+class SentenceRecorder:
+    """ Collects the records of one document (in a worker process) for SentenceCorpus.add_records """
+
+    def __init__(self):
+        self.records = list()
+
+    def get_sink(self, document: str) -> Callable[[int, Dict[str, Set[str]]], None]:
+        return lambda page_number, sentences_by_scope: self.records.append((document, page_number,
+                                                                            sentences_by_scope))
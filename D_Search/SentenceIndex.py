@@ -0,0 +1,81 @@
+import re
+from typing import List, Dict, Set, Iterable, Tuple, FrozenSet
+
+""" The sentences of ONE page, built once and then looked up by every keyword group (scope) in find_word_on_page.
+
+    Segmentation "rules": a sentence ends with ".", "!" or "?" that is followed by a white space (or the end of the
+    text block), unless the word before is an abbreviation ("approx.", "e.g.", "z.B.", "Mio.", ...) or the next word
+    starts with a lower case letter. Decimal numbers ("1.5 million", "12.345,6 t") and abbreviations therefore stay in
+    their sentence. Segmentation "period": every "." ends a sentence (as before, for comparisons).
+
+    Every sentence is tagged with the search words it contains and - if it contains any - with the keyword groups
+    whose keywords it contains (exactly, or with OCR errors if there are keyword_matchers, see
+    D_Search/ApproximateMatch.py). The matching sentences of a keyword group (any keyword AND any search word) are then
+    only looked up.
+"""
+
+SENTENCE_SEGMENTATION_RULES = 'rules'
+SENTENCE_SEGMENTATION_PERIOD = 'period'
+
+ABBREVIATIONS = {'e.g.', 'i.e.', 'etc.', 'approx.', 'appr.', 'ca.', 'incl.', 'excl.', 'no.', 'nos.', 'nr.', 'fig.',
+                 'figs.', 'vs.', 'resp.', 'corp.', 'inc.', 'ltd.', 'co.', 'mr.', 'mrs.', 'ms.', 'dr.', 'prof.', 'st.',
+                 'p.', 'pp.', 'cf.', 'z.b.', 'd.h.', 'u.a.', 'bzw.', 'ggf.', 'inkl.', 'exkl.', 'mio.', 'mrd.', 'tsd.',
+                 'bzgl.', 'vgl.', 'usw.', 'sog.', 'abs.', 'ziff.', 'gem.', 'lt.', 'gj.', 'fy.'}
+
+_SENTENCE_END = re.compile(r'[.!?]+(?=\s|$)')
+
+
+def split_sentences(text: str, segmentation: str = SENTENCE_SEGMENTATION_RULES) -> List[str]:
+    """ The sentences of a (white space normalized) text, without the punctuation at their end """
+    if segmentation == SENTENCE_SEGMENTATION_PERIOD:
+        return text.split('.')
+    if segmentation != SENTENCE_SEGMENTATION_RULES:
+        raise ValueError(f'Unknown sentence segmentation: {segmentation} ! ')
+    sentences = list()
+    start = 0
+    for match in _SENTENCE_END.finditer(text):
+        following = text[match.end():].lstrip()[:1]
+        if following:
+            """ without an opening bracket or quote: "(z.B." is an abbreviation too """
+            word = text[text.rfind(' ', start, match.start()) + 1:match.end()].lstrip('([{"\'„“‚‘')
+            if word.lower() in ABBREVIATIONS or following.islower():
+                continue
+        sentences.append(text[start:match.start()].strip())
+        start = match.end()
+    if start < len(text):
+        sentences.append(text[start:].strip())
+    return [sentence for sentence in sentences if sentence]
+
+
+def contains_keyword(sentence: str, keywords_list: List[str], keyword_matcher=None) -> bool:
+    """ Any keyword of the list in the sentence: exactly or with the keyword_matcher (an ApproximateMatcher) """
+    if keyword_matcher is not None:
+        return len(keyword_matcher.find(line=sentence)) > 0
+    return any(keyword in sentence for keyword in keywords_list)
+
+
+class PageSentenceIndex:
+
+    def __init__(self, texts: Iterable[str], keywords_dict_of_list: Dict[str, List[str]], search_word_list: List[str],
+                 segmentation: str = SENTENCE_SEGMENTATION_RULES, keyword_matchers: Dict[str, object] = None):
+        """ texts: the texts of the text blocks of the page. keyword_matchers: keywords_key -> ApproximateMatcher
+        (approximate mode only) """
+        keyword_matchers = dict() if keyword_matchers is None else keyword_matchers
+        """ (sentence, search words, keyword groups) of every sentence of the page """
+        self.sentences: List[Tuple[str, FrozenSet[str], FrozenSet[str]]] = list()
+        self.sentences_by_scope: Dict[str, Set[str]] = dict()
+        for text in texts:
+            for sentence in split_sentences(text=' '.join(text.split()), segmentation=segmentation):
+                search_words = frozenset(word for word in search_word_list if word in sentence)
+                """ Without a search word the sentence matches no keyword group, its keywords are not looked up """
+                scopes = frozenset(keywords_key for keywords_key, keywords_list in keywords_dict_of_list.items() if
+                                   contains_keyword(sentence=sentence, keywords_list=keywords_list,
+                                                    keyword_matcher=keyword_matchers.get(keywords_key))) if \
+                    search_words else frozenset()
+                self.sentences.append((sentence, search_words, scopes))
+                for keywords_key in scopes:
+                    self.sentences_by_scope.setdefault(keywords_key, set()).add(sentence)
+
+    def get_matching_sentences(self, keywords_key: str) -> Set[str]:
+        """ Sentences that contain any keyword of the keyword group AND any search word """
+        return self.sentences_by_scope.get(keywords_key, set())
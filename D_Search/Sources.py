@@ -0,0 +1,136 @@
+import os
+import tarfile
+import threading
+import zipfile
+from typing import List, Dict, Tuple
+
+""" Pdf docs as they are delivered by the data vendors: single files or members of ZIP/TAR archives (also .tar.gz,
+    .tgz, .tar.bz2, .tar.xz) in path_to_reports_for_analysis_directory. The archives are NOT unpacked to disk, a member
+    is read into memory and handed to PDFMiner as bytes (data).
+
+    A member is addressed by a plain string, "<path of the archive>::<name of the member>" (see get_member_path), so
+    it can be used like the path of a file: as key of the run history and of the stores, in the year regex and as
+    argument of a worker process (it is pickled as a string, every worker opens the archive itself). The name of the
+    document in the results (NamePDF) is "<name of the archive>::<name of the member>".
+
+    Workers read a member of a ZIP or an uncompressed TAR archive directly (the position of every member is read once
+    per process and shared by its threads). A compressed TAR archive has to be decompressed up to the member, ZIP
+    archives (or uncompressed TAR archives) are therefore better suited for the parallel analysis of very large
+    deliveries.
+"""
+
+ARCHIVE_MEMBER_SEPARATOR = '::'
+ZIP_SUFFIXES = ('.zip',)
+TAR_SUFFIXES = ('.tar', '.tar.gz', '.tgz', '.tar.bz2', '.tbz2', '.tar.xz', '.txz')
+PDF_SUFFIX = '.pdf'
+
+""" Per process: path of an uncompressed tar archive -> member name -> (offset, size) of its data """
+_tar_member_positions: Dict[str, Dict[str, Tuple[int, int]]] = dict()
+_tar_member_positions_lock = threading.Lock()
+""" Per process: (path, size, modification time) of an archive -> name -> (size, identity) of its pdf docs """
+_archive_member_stats: Dict[tuple, Dict[str, Tuple[int, str]]] = dict()
+_archive_member_stats_lock = threading.Lock()
+
+
+def is_archive(path: str) -> bool:
+    return path.lower().endswith(ZIP_SUFFIXES + TAR_SUFFIXES)
+
+
+def get_member_path(archive_path: str, member_name: str) -> str:
+    return archive_path + ARCHIVE_MEMBER_SEPARATOR + member_name
+
+
+def split_member_path(path: str) -> Tuple[str, str or None]:
+    """ (path of the archive, name of the member) or (path, None) if path is not a member of an archive """
+    archive_path, separator, member_name = path.partition(ARCHIVE_MEMBER_SEPARATOR)
+    if separator and is_archive(archive_path):
+        return archive_path, member_name
+    return path, None
+
+
+def is_archive_member(path: str) -> bool:
+    return split_member_path(path=path)[1] is not None
+
+
+def get_document_name(path: str) -> str:
+    """ NamePDF: the name of the file or "<name of the archive>::<name of the member>" """
+    archive_path, member_name = split_member_path(path=path)
+    if member_name is None:
+        return os.path.basename(path)
+    return get_member_path(archive_path=os.path.basename(archive_path), member_name=member_name)
+
+
+def _get_archive_member_stats(archive_path: str) -> Dict[str, Tuple[int, str]]:
+    """ name -> (size, identity) of the pdf docs in the archive (in the order of the archive), from its listing. The
+    identity of a ZIP member is its size and CRC, the one of a TAR member its size and modification time. """
+    archive_stat = os.stat(archive_path)
+    key = (archive_path, archive_stat.st_size, archive_stat.st_mtime_ns)
+    with _archive_member_stats_lock:
+        if key not in _archive_member_stats:
+            if archive_path.lower().endswith(ZIP_SUFFIXES):
+                with zipfile.ZipFile(archive_path) as archive:
+                    member_stats = {info.filename: (info.file_size, f'{info.file_size}:{info.CRC:08x}') for info in
+                                    archive.infolist() if not info.is_dir() and
+                                    info.filename.lower().endswith(PDF_SUFFIX)}
+            else:
+                with tarfile.open(archive_path, mode='r:*') as archive:
+                    member_stats = {info.name: (info.size, f'{info.size}:{info.mtime}') for info in archive if
+                                    info.isfile() and info.name.lower().endswith(PDF_SUFFIX)}
+            _archive_member_stats[key] = member_stats
+        return _archive_member_stats[key]
+
+
+def get_archive_member_paths(archive_path: str) -> List[str]:
+    """ The pdf docs in the archive (in the order of the archive) """
+    return [get_member_path(archive_path=archive_path, member_name=member_name) for member_name in
+            _get_archive_member_stats(archive_path=archive_path)]
+
+
+def _read_tar_member(archive_path: str, member_name: str) -> bytes:
+    with open(archive_path, 'rb') as stream:
+        is_compressed = stream.read(262)[257:262] != b'ustar'
+    if is_compressed:
+        with tarfile.open(archive_path, mode='r:*') as archive:
+            member = archive.extractfile(member_name)
+            if member is None:
+                raise KeyError(f'{member_name} is not a file in {archive_path} ! ')
+            return member.read()
+    with _tar_member_positions_lock:
+        if archive_path not in _tar_member_positions:
+            with tarfile.open(archive_path, mode='r:') as archive:
+                _tar_member_positions[archive_path] = {info.name: (info.offset_data, info.size) for info in archive
+                                                       if info.isfile()}
+        offset, size = _tar_member_positions[archive_path][member_name]
+    with open(archive_path, 'rb') as stream:
+        stream.seek(offset)
+        return stream.read(size)
+
+
+def read_document(path: str) -> bytes:
+    """ The content of a pdf doc (file or member of an archive) """
+    archive_path, member_name = split_member_path(path=path)
+    if member_name is None:
+        with open(path, 'rb') as stream:
+            return stream.read()
+    if archive_path.lower().endswith(ZIP_SUFFIXES):
+        with zipfile.ZipFile(archive_path) as archive:
+            return archive.read(member_name)
+    return _read_tar_member(archive_path=archive_path, member_name=member_name)
+
+
+def get_document_size(path: str) -> int:
+    """ Size in bytes (uncompressed size of an archive member, from the listing of the archive) """
+    archive_path, member_name = split_member_path(path=path)
+    if member_name is None:
+        return os.path.getsize(path)
+    return _get_archive_member_stats(archive_path=archive_path)[member_name][0]
+
+
+def get_document_identity(path: str) -> str:
+    """ Identifies a pdf doc without reading it: name, size and modification time of a file, name and the identity
+    of an archive member (see _get_archive_member_stats) """
+    archive_path, member_name = split_member_path(path=path)
+    if member_name is None:
+        stat = os.stat(path)
+        return f'{os.path.basename(path)}:{stat.st_size}:{stat.st_mtime_ns}'
+    return f'{get_document_name(path=path)}:{_get_archive_member_stats(archive_path=archive_path)[member_name][1]}'
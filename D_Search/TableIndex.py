@@ -0,0 +1,113 @@
+import re
+from bisect import bisect_left, bisect_right
+from typing import List, Dict, Set, Tuple, Iterable
+
+
+class PageTableIndex:
+    """ Table structure of ONE page that is built once and then serves the table search of every keyword group.
+
+    Columns: every occurrence of a table_keyword (e.g. the reporting year "2020" in a table header) opens a column
+             band (x0 - width * table_x_tolerance, x1 + width * table_x_tolerance). Numeric tokens on the page are
+             clustered into the column(s) whose band contains them. The column label is the table_keyword itself.
+    Rows:    the numeric tokens of all columns are grouped by their (rounded) y-coordinates.
+
+    A keyword (e.g. "Scope 1") is the row label of a table row. Its y-band (y0 - height * table_y_tolerance,
+    y1 + height * table_y_tolerance) selects the rows, the column label selects the year. Lookups are cached, so
+    every keyword group (and every year) gets its values from the same index without scanning the page again.
+    The matching rules are the same as in XYWordMatch (are_table_keyword_x/y_coordinates_within_tolerance).
+    """
+
+    def __init__(self, word_coordinates: Iterable[Tuple[float, float, float, float, str]],
+                 table_keyword_coordinates: Iterable[Tuple[float, float, float, float, str]],
+                 table_x_tolerance: float, decimals: int, thousands_separator: str = ','):
+        self.table_x_tolerance = table_x_tolerance
+        self.decimals = decimals
+        self.column_bands = self._get_column_bands(table_keyword_coordinates=table_keyword_coordinates)
+        """ rows: (y0, y1) -> column label -> words """
+        self.rows: Dict[Tuple[float, float], Dict[str, Set[str]]] = dict()
+        for x0, y0, x1, y1, word in word_coordinates:
+            if not is_numeric_token(word=word, thousands_separator=thousands_separator):
+                continue
+            for column_label in self.get_column_labels_of_x_coordinates(x0=x0, x1=x1):
+                self.rows.setdefault((y0, y1), dict()).setdefault(column_label, set()).add(word)
+        self._row_keys = sorted(self.rows.keys())
+        self._row_y0s = [y0 for y0, _ in self._row_keys]
+        self._lookup_cache: Dict[Tuple[float, float], Dict[str, Set[str]]] = dict()
+
+    def _get_column_bands(self, table_keyword_coordinates: Iterable[Tuple[float, float, float, float, str]]) -> \
+            Dict[str, List[Tuple[float, float]]]:
+        column_bands = dict()
+        for x0, _, x1, _, column_label in table_keyword_coordinates:
+            x0, x1 = round(x0, self.decimals), round(x1, self.decimals)
+            x_tolerance = (x1 - x0) * self.table_x_tolerance
+            column_bands.setdefault(column_label, set()).add((x0 - x_tolerance, x1 + x_tolerance))
+        return {column_label: sorted(bands) for column_label, bands in column_bands.items()}
+
+    @property
+    def column_labels(self) -> List[str]:
+        return list(self.column_bands.keys())
+
+    def is_empty(self) -> bool:
+        return len(self.rows) == 0
+
+    def get_column_labels_of_x_coordinates(self, x0: float, x1: float) -> List[str]:
+        return [column_label for column_label, bands in self.column_bands.items() if
+                any(x0 >= band_x0 and x1 <= band_x1 for band_x0, band_x1 in bands)]
+
+    def get_row(self, y0: float, y1: float) -> Dict[str, Set[str]]:
+        """ All (column label -> values) of the rows that lie within the y-band (y0, y1) of a row label """
+        key = (y0, y1)
+        if key not in self._lookup_cache:
+            row = dict()
+            for row_key in self._row_keys[bisect_left(self._row_y0s, y0):bisect_right(self._row_y0s, y1)]:
+                if row_key[1] <= y1:
+                    for column_label, words in self.rows[row_key].items():
+                        row.setdefault(column_label, set()).update(words)
+            self._lookup_cache[key] = row
+        return self._lookup_cache[key]
+
+    def get_values(self, y0: float, y1: float, column_label: str or None = None) -> Set[str]:
+        """ Values of one column (column_label) or of all columns (column_label=None) in the y-band (y0, y1) """
+        row = self.get_row(y0=y0, y1=y1)
+        if column_label is not None:
+            return row.get(column_label, set())
+        return set(word for words in row.values() for word in words)
+
+
+def is_numeric_token(word: str, thousands_separator: str = ',') -> bool:
+    try:
+        float(word.replace(thousands_separator, ''))
+        return True
+    except ValueError:
+        return False
+
+
+YEAR_HEADER_PATTERNS = (re.compile(r'^(?:FY|GJ)?(20[0-9]{2})$'), re.compile(r'^(?:FY|GJ)([0-9]{2})$'))
+
+
+def get_year_of_header(word: str) -> str or None:
+    """ "2020", "FY2020", "FY20" -> "2020" """
+    for pattern in YEAR_HEADER_PATTERNS:
+        match = pattern.match(word)
+        if match:
+            year = match.group(1)
+            return year if len(year) == 4 else '20' + year
+    return None
+
+
+def get_year_header_coordinates(word_coordinates: Iterable[Tuple[float, float, float, float, str]],
+                                min_years_in_row: int = 2) -> Set[Tuple[float, float, float, float, str]]:
+    """ (x0, y0, x1, y1, year) of the year column headers of a page: years (see get_year_of_header) that stand in one
+    row (overlapping y-coordinates) with at least min_years_in_row different years, like the header of an emissions
+    table with the years side by side. Single years in the running text are no headers. """
+    years = sorted((y0, y1, x0, x1, year) for x0, y0, x1, y1, word in word_coordinates for year in
+                   [get_year_of_header(word=word)] if year is not None)
+    rows = list()
+    for y0, y1, x0, x1, year in years:
+        """ The years are sorted by y0: a year belongs to the current row if it starts below the row's top """
+        if len(rows) > 0 and y0 < min(row_y1 for _, row_y1, _, _, _ in rows[-1]):
+            rows[-1].append((y0, y1, x0, x1, year))
+        else:
+            rows.append([(y0, y1, x0, x1, year)])
+    return {(x0, y0, x1, y1, year) for row in rows if len({year for _, _, _, _, year in row}) >= min_years_in_row
+            for y0, y1, x0, x1, year in row}
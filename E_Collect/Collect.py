@@ -6,24 +6,74 @@ def get_most_common_values_2(values: list or set, num_of_return_values: int) ->
     return [word for word, word_count in Counter(values).most_common(num_of_return_values)]
 
 
+class FindingsCollector:
+    """ Collects the findings of find_word page by page (e.g. from PDFMiner.iter_findings), so the values and pages of
+    every scope are available at any time during the search and the search can be stopped early (is_complete).
+    The order of the values is the same as if all findings were collected first, thus ties in the most common values
+    are resolved in the same way. """
+
+    def __init__(self, keyword_dict_of_lists: Dict[str, List[str]],
+                 search_result_dict_key_names: tuple = ('neighbour_values', 'table_values', 'text_values')):
+        self.keyword_dict_of_lists = keyword_dict_of_lists
+        self.search_result_dict_key_names = search_result_dict_key_names
+        self.findings = list()
+        self.values = {key_name: {key: Counter() for key in keyword_dict_of_lists.keys()} for key_name in
+                       search_result_dict_key_names}
+        self.pages = {key_name: {key: list() for key in keyword_dict_of_lists.keys()} for key_name in
+                      search_result_dict_key_names}
+
+    def add(self, page_findings: dict):
+        self.findings.append(page_findings)
+        for key in self.keyword_dict_of_lists.keys():
+            if key in page_findings:
+                for key_name in self.search_result_dict_key_names:
+                    value = page_findings[key][key_name]
+                    if len(value) > 0:
+                        self.values[key_name][key].update(value)
+                        self.pages[key_name][key].append(page_findings['page_number'])
+
+    def get_values_and_page_numbers(self, num_of_return_values: int, search_result_dict_key_name: str) -> dict:
+        results = dict()
+        for key in self.keyword_dict_of_lists.keys():
+            results[key] = dict()
+            results[key]['values'] = [word for word, word_count in
+                                      self.values[search_result_dict_key_name][key].most_common(num_of_return_values)]
+            results[key]['pages'] = list(self.pages[search_result_dict_key_name][key])
+        return results
+
+    def is_complete(self, min_num_of_values: int = 1,
+                    confident_key_names: tuple = ('neighbour_values', 'table_values')) -> bool:
+        """ True if every scope has at least min_num_of_values (different) neighbour or table values """
+        for key in self.keyword_dict_of_lists.keys():
+            values = set()
+            for key_name in confident_key_names:
+                values.update(self.values[key_name][key].keys())
+            if len(values) < min_num_of_values:
+                return False
+        return True
+
+
 def get_values_and_page_numbers(search_result_list: List[Dict], keyword_dict_of_lists: Dict[str, List[str]],
                                 num_of_return_values: int, search_result_dict_key_name: str):
-    results = dict()
-    for key in keyword_dict_of_lists.keys():
-        values = list()
-        pages = list()
-        for dictionary in search_result_list:
+    collector = FindingsCollector(keyword_dict_of_lists=keyword_dict_of_lists,
+                                  search_result_dict_key_names=(search_result_dict_key_name,))
+    for dictionary in search_result_list:
+        collector.add(page_findings=dictionary)
+    return collector.get_values_and_page_numbers(num_of_return_values=num_of_return_values,
+                                                 search_result_dict_key_name=search_result_dict_key_name)
+
+
+def get_values_by_year(search_result_list: List[Dict], keyword_dict_of_lists: Dict[str, List[str]],
+                       num_of_return_values: int, search_result_dict_key_name: str = 'table_values_by_year') -> dict:
+    """ Multi-year mode: scope -> year -> most common table values of that year (years in ascending order) """
+    values = {key: dict() for key in keyword_dict_of_lists.keys()}
+    for dictionary in search_result_list:
+        for key in keyword_dict_of_lists.keys():
             if key in dictionary:
-                value = dictionary[key][search_result_dict_key_name]
-                page = dictionary['page_number']
-                if len(value) > 0:
-                    values.extend(value)
-                    pages.append(page)
-        values = get_most_common_values_2(values=values, num_of_return_values=num_of_return_values)
-        results[key] = dict()
-        results[key]['values'] = values
-        results[key]['pages'] = pages
-    return results
+                for year, values_of_year in dictionary[key].get(search_result_dict_key_name, dict()).items():
+                    values[key].setdefault(year, Counter()).update(values_of_year)
+    return {key: {year: [word for word, word_count in values[key][year].most_common(num_of_return_values)] for year
+                  in sorted(values[key])} for key in keyword_dict_of_lists.keys()}
 
 
 def extract_number_from_short_text_set(list_of_strings: list, keyword_dict_of_lists: Dict[str, List[str]],
@@ -0,0 +1,118 @@
+from typing import List, Dict, Iterable, Tuple
+import numpy as np
+import pandas as pd
+
+""" The findings of find_word of many documents in ONE long-format table (one row per value):
+
+        document | page | scope | method | value | position
+
+    method: 'neighbour_values', 'table_values' or 'text_values'. position: the order in which the values were found
+    (documents, pages, scopes and methods in the order of the findings), it breaks ties like Counter.most_common does
+    (first found first). The most common values per document, scope and method and then the most common of these
+    values per document and scope (the "aggregation pot" of F_Extract) are computed with group-bys over the whole
+    batch, so a batch (or the whole corpus) is aggregated in one operation instead of document by document and scope
+    by scope. The results are the same as with E_Collect.Collect.get_values_and_page_numbers and
+    F_Extract.Extract.aggregate_results.
+"""
+
+METHODS = ('neighbour_values', 'table_values', 'text_values')
+""" The methods whose pages are listed in AbsSeiten """
+PAGE_METHODS = ('neighbour_values', 'table_values')
+COLUMNS = ['document', 'page', 'scope', 'method', 'value', 'position']
+
+
+def get_findings_frame(search_results: Iterable[Tuple[object, List[dict]]], scopes: List[str],
+                       methods: tuple = METHODS) -> pd.DataFrame:
+    """ search_results: (document, findings of find_word) of every document of the batch """
+    """ The columns are filled value set by value set (not value by value) """
+    columns = {column: list() for column in COLUMNS if column != 'position'}
+    for document, search_result in search_results:
+        for page_findings in search_result:
+            page_number = page_findings['page_number']
+            for scope_code, scope in enumerate(scopes):
+                scope_findings = page_findings.get(scope)
+                if scope_findings is None:
+                    continue
+                for method_code, method in enumerate(methods):
+                    values = scope_findings[method]
+                    if len(values) == 0:
+                        continue
+                    columns['value'].extend(values)
+                    for column, key in (('document', document), ('page', page_number), ('scope', scope_code),
+                                        ('method', method_code)):
+                        columns[column].extend([key] * len(values))
+    """ scope and method are categories: the group-bys work on their integer codes instead of strings """
+    return pd.DataFrame({'document': columns['document'], 'page': columns['page'],
+                         'scope': pd.Categorical.from_codes(columns['scope'], categories=list(scopes)),
+                         'method': pd.Categorical.from_codes(columns['method'], categories=list(methods)),
+                         'value': columns['value'], 'position': np.arange(len(columns['value']))}, columns=COLUMNS)
+
+
+def get_most_common(frame: pd.DataFrame, by: List[str], num_of_return_values: pd.Series or int) -> pd.DataFrame:
+    """ The num_of_return_values most common values per group (by) with their rank: by count, ties by position (the
+    value found first comes first). num_of_return_values: one number for all groups or a Series aligned with frame
+    (e.g. one number per method) """
+    frame = frame.assign(limit=num_of_return_values)
+    counts = frame.groupby(by + ['value'], sort=False, observed=True).agg(
+        count=('position', 'size'), position=('position', 'min'), limit=('limit', 'first')).reset_index()
+    counts = counts.sort_values(by + ['count', 'position'], ascending=[True] * len(by) + [False, True],
+                                kind='mergesort')
+    counts['rank'] = counts.groupby(by, sort=False, observed=True).cumcount()
+    return counts[counts['rank'] < counts['limit']].drop(columns='limit')
+
+
+def aggregate_findings(frame: pd.DataFrame, num_of_return_values_of_methods: Dict[str, int],
+                       num_of_return_values: int, methods: tuple = METHODS) -> pd.DataFrame:
+    """ Per document and scope: the num_of_return_values most common values of the most common values of every
+    method (in the order of methods, like the "aggregation pot" of aggregate_results). Columns: document, scope,
+    value, rank """
+    """ map on the strings: the map of a categorical with distinct results is again a categorical (not comparable with
+    the ranks) """
+    top_of_methods = get_most_common(
+        frame=frame, by=['document', 'scope', 'method'],
+        num_of_return_values=frame['method'].astype(str).map(num_of_return_values_of_methods).astype(int))
+    """ Position in the pot: the values of the first method first, each in the order of its rank """
+    method_order = {method: index for index, method in enumerate(methods)}
+    pot_size = max(num_of_return_values_of_methods.values(), default=0) + 1
+    top_of_methods['position'] = top_of_methods['method'].astype(str).map(method_order).astype(int) * pot_size + \
+        top_of_methods['rank']
+    return get_most_common(frame=top_of_methods[['document', 'scope', 'value', 'position']],
+                           by=['document', 'scope'], num_of_return_values=num_of_return_values)
+
+
+def get_pages(frame: pd.DataFrame, methods: tuple = PAGE_METHODS) -> Dict[Tuple[object, str, str], List[int]]:
+    """ (document, scope, method) -> pages with any value (in the order of the findings) """
+    pages = frame[frame['method'].isin(methods)].drop_duplicates(subset=['document', 'scope', 'method', 'page'])
+    return _group_to_lists(keys=zip(pages['document'].tolist(), pages['scope'].tolist(), pages['method'].tolist()),
+                           values=pages['page'].tolist())
+
+
+def _group_to_lists(keys: Iterable[tuple], values: List[object]) -> Dict[tuple, list]:
+    """ key -> its values (in the order of the rows). One pass over plain lists, much faster than iterating over the
+    groups of a group-by """
+    lists = dict()
+    for key, value in zip(keys, values):
+        lists.setdefault(key, list()).append(value)
+    return lists
+
+
+def get_number_and_pages_dicts(search_results: List[Tuple[object, List[dict]]], scopes: List[str],
+                               num_of_return_values_of_methods: Dict[str, int], num_of_return_values: int) -> \
+        Dict[object, dict]:
+    """ document -> {scope: most common values, ..., 'AbsSeiten': pages of every scope} (the number_and_pages_dict
+    of F_Extract.Extract.extract_results) for all documents of the batch """
+    frame = get_findings_frame(search_results=search_results, scopes=scopes)
+    aggregated = aggregate_findings(frame=frame, num_of_return_values_of_methods=num_of_return_values_of_methods,
+                                    num_of_return_values=num_of_return_values)
+    """ aggregated is sorted by rank within every document and scope """
+    values = _group_to_lists(keys=zip(aggregated['document'].tolist(), aggregated['scope'].tolist()),
+                             values=aggregated['value'].tolist())
+    pages = get_pages(frame=frame)
+    number_and_pages_dicts = dict()
+    for document, _ in search_results:
+        number_and_pages_dict = {scope: values.get((document, scope), list()) for scope in scopes}
+        number_and_pages_dict['AbsSeiten'] = [list(set([page for method in PAGE_METHODS for page in
+                                                        pages.get((document, scope, method), list())]))
+                                              for scope in scopes]
+        number_and_pages_dicts[document] = number_and_pages_dict
+    return number_and_pages_dicts
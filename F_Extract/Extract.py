@@ -1,14 +1,31 @@
 import os
 import re
+import time
+import logging
 import pandas as pd
 from collections import Counter
 from operator import itemgetter
-from typing import Set, List, Tuple
+from typing import Set, List, Tuple, Dict, Callable
+from contextlib import nullcontext
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, as_completed
 
 from A_Configuration_and_Logs.conf_and_log import ConfLog
+from A_Configuration_and_Logs.log_setup import log_context, configure_worker_logging, get_log_queue
 from D_Search.PDFMiner import PDFMiner
+from D_Search.FindingsStore import PageFindingsStore, DocumentFindingsStore, get_fingerprint, get_document_hash, \
+    FINDINGS_VERSION
+from D_Search.Sources import is_archive_member, read_document, get_document_name
+from D_Search.SentenceCorpus import SentenceCorpus, SentenceRecorder, get_sentences_by_scope
+from D_Search.ApproximateMatch import get_keyword_matchers
+from D_Search.CorpusIndex import CorpusIndex, index_documents
+from D_Search.FontCache import get_font_cache, sum_font_cache_stats
+from F_Extract.Prefetch import DocumentPrefetcher, get_pdf_paths
+from F_Extract.Profiling import DocumentProfiler
+from F_Extract.Scheduler import RunHistory, estimate_jobs, get_lpt_order, get_run_report, get_report_summary, \
+    get_peak_rss_mb, is_gil_enabled, EXECUTION_MODE_PROCESS, EXECUTION_MODE_THREAD, EXECUTION_MODES
 # from D_Search.HelperFunctions import get_first_last_indices_of_keyword_in_string
-from E_Collect.Collect import get_values_and_page_numbers
+from E_Collect.Collect import get_values_by_year, FindingsCollector
+from E_Collect.FindingsFrame import get_number_and_pages_dicts
 
 
 # def get_most_common_values(values: list or set, num_of_return_values: int) -> list or set:
@@ -87,61 +104,460 @@ def add_descriptive_data(number_and_pages_dict: dict, year: str, name_of_pdf: st
 
 
 def create_result_dataframe(result_dict: dict, result_dataframe: pd.DataFrame = None) -> pd.DataFrame:
+    return create_result_dataframe_of_dicts(result_dicts=[result_dict], result_dataframe=result_dataframe)
+
+
+def create_result_dataframe_of_dicts(result_dicts: List[dict], result_dataframe: pd.DataFrame = None) -> \
+        pd.DataFrame or None:
+    """ The rows of all result_dicts are added at once (one concat instead of one append per row) """
+    if len(result_dicts) == 0:
+        return result_dataframe
+    new_rows = pd.DataFrame(result_dicts)
     if result_dataframe is None or result_dataframe.empty:
-        result_dataframe = pd.DataFrame([result_dict])
-    else:
-        result_dataframe = result_dataframe.append(result_dict, ignore_index=True)
-    return result_dataframe
+        return new_rows
+    return pd.concat([result_dataframe, new_rows], ignore_index=True)
+
+
+def get_find_word_settings(conf_log: ConfLog) -> dict:
+    """ Arguments of find_word (except table_keywords) as set in config.ini """
+    return dict(keywords_dict_of_list=conf_log.keyword_dict_of_lists,
+                search_word_list=conf_log.search_word_list,
+                neighbour_x_tolerance=conf_log.find_word_neighbour_x_tolerance,
+                neighbour_y_tolerance=conf_log.find_word_neighbour_y_tolerance,
+                table_x_tolerance=conf_log.find_word_table_x_tolerance,
+                table_y_tolerance=conf_log.find_word_table_y_tolerance,
+                decimals=conf_log.find_word_decimals)
+
+
+def search_pdf(path: str, conf_log: ConfLog, page_store: PageFindingsStore = None, data: bytes or None = None,
+               sentence_sink: Callable[[int, Dict[str, Set[str]]], None] = None) -> \
+        Tuple[List[str], List[dict], Set[str]]:
+    """ D_Search: returns the table_keywords (year), the findings of find_word and the matching sentences.
+    data: the content of the pdf doc if it was already read into memory (see F_Extract/Prefetch.py).
+    sentence_sink: receives the matching sentences of every page (see D_Search/SentenceCorpus.py) """
+    miner = PDFMiner(path=path, page_store=page_store, conf_log=conf_log, data=data)
+    miner.sentence_sink = sentence_sink
+    try:
+        table_keywords = miner.get_year_and_fy()
+        # print('table_keywords:', table_keywords)
+        if conf_log.find_word_early_stop:
+            """ The search stops as soon as every scope has enough neighbour or table values """
+            collector = FindingsCollector(keyword_dict_of_lists=conf_log.keyword_dict_of_lists)
+            for page_findings in miner.iter_findings(table_keywords=table_keywords,
+                                                     **get_find_word_settings(conf_log=conf_log)):
+                collector.add(page_findings=page_findings)
+                if collector.is_complete(min_num_of_values=conf_log.find_word_early_stop_min_num_of_values):
+                    conf_log.logging.info('Early stop after page %s', page_findings['page_number'])
+                    break
+            """ In document order, even if the pages were searched in another order (page priority) """
+            search_result = sorted(collector.findings, key=lambda page_findings: page_findings['page_number'])
+        else:
+            search_result = miner.find_word(table_keywords=table_keywords, **get_find_word_settings(conf_log=conf_log))
+    finally:
+        miner.close()
+    """ The matching sentences (for potential word2vec) are stored in miner.matching_sentences """
+    return table_keywords, search_result, miner.matching_sentences
+
+
+def extract_results(search_result: List[dict], matching_sentences: Set[str], table_keywords: List[str],
+                    name_of_pdf: str, conf_log: ConfLog) -> dict:
+    """ E_Collect and F_Extract: only these steps depend on the settings in [F_Extract] """
+    return extract_results_of_documents(documents=[{'search_result': search_result,
+                                                    'matching_sentences': matching_sentences,
+                                                    'table_keywords': table_keywords, 'name': name_of_pdf}],
+                                        conf_log=conf_log)[0]
+
+
+def extract_results_of_documents(documents: List[dict], conf_log: ConfLog) -> List[dict]:
+    """ extract_results for a whole batch of documents (dicts with search_result, matching_sentences,
+    table_keywords and name): the values of all documents are aggregated at once in one long-format table (see
+    E_Collect/FindingsFrame.py). Returns the result_dict of every document (in the order of documents). """
+    number_and_pages_dicts = get_number_and_pages_dicts(
+        search_results=list(enumerate(document['search_result'] for document in documents)),
+        scopes=list(conf_log.keyword_dict_of_lists.keys()),
+        num_of_return_values_of_methods={'neighbour_values': conf_log.extract_number_of_neighbour_vals_to_include,
+                                         'table_values': conf_log.extract_number_of_table_vals_to_include,
+                                         'text_values': conf_log.extract_number_of_text_vals_to_include},
+        num_of_return_values=conf_log.extract_number_of_vals_to_include)
+    results = list()
+    for index, document in enumerate(documents):
+        most_likely_unit = get_most_likely_unit(set_of_strings=document['matching_sentences'],
+                                                unit_list=conf_log.find_word_unit_list)
+        number_and_pages_dict = number_and_pages_dicts[index]
+        if conf_log.find_word_multi_year:
+            """ Multi-year mode: the table values of every year column (scope -> year -> values) """
+            number_and_pages_dict['WerteNachJahr'] = get_values_by_year(
+                search_result_list=document['search_result'], keyword_dict_of_lists=conf_log.keyword_dict_of_lists,
+                num_of_return_values=conf_log.extract_number_of_table_vals_to_include)
+        results.append(add_descriptive_data(number_and_pages_dict=number_and_pages_dict,
+                                            year=document['table_keywords'][0], name_of_pdf=document['name'],
+                                            weight_unit=most_likely_unit))
+    return results
+
+
+def add_results_of_documents(documents: List[dict], conf_log: ConfLog,
+                             result_dataframe: pd.DataFrame = None) -> pd.DataFrame or None:
+    """ E_Collect/F_Extract of a batch of searched documents (see extract_results_of_documents), the results are
+    added to result_dataframe in the order of documents. If the batch fails, its documents are extracted one by one,
+    so only the failing documents are missing. """
+    if len(documents) == 0:
+        return result_dataframe
+    with log_context(document=None, stage='extract', page=None):
+        try:
+            result_dicts = extract_results_of_documents(documents=documents, conf_log=conf_log)
+        except Exception as e:
+            conf_log.logging.error(e, exc_info=True)
+            result_dicts = list()
+            for document in documents:
+                with log_context(document=document['name']):
+                    try:
+                        result_dicts.extend(extract_results_of_documents(documents=[document], conf_log=conf_log))
+                    except Exception as e:
+                        conf_log.logging.error(e, exc_info=True)
+    return create_result_dataframe_of_dicts(result_dicts=result_dicts, result_dataframe=result_dataframe)
+
+
+def get_search_config_fingerprint(conf_log: ConfLog) -> str:
+    """ Everything that D_Search depends on: its settings and the version of its code (FINDINGS_VERSION). The
+    settings in [F_Extract] are NOT part of it. """
+    return get_fingerprint(FINDINGS_VERSION,
+                           conf_log.get_section_settings('D_Search', 'D_Search.PDFMiner.LayoutOptions'))
+
+
+def get_profiler(conf_log: ConfLog) -> DocumentProfiler or None:
+    """ The profiler of the profiling mode (see F_Extract/Profiling.py), None if the mode is off """
+    if not conf_log.profiling_enabled:
+        return None
+    return DocumentProfiler(directory=conf_log.profiling_directory, sample_rate=conf_log.profiling_sample_rate,
+                            top_n=conf_log.profiling_top_n)
+
+
+def get_sentence_corpus(conf_log: ConfLog) -> SentenceCorpus or None:
+    """ The writer of the sentence corpus (see D_Search/SentenceCorpus.py), None if the export is off """
+    if not conf_log.sentence_corpus_enabled:
+        return None
+    return SentenceCorpus(path=conf_log.sentence_corpus_path,
+                          expected_sentences=conf_log.sentence_corpus_expected_sentences,
+                          false_positive_rate=conf_log.sentence_corpus_false_positive_rate)
+
+
+def search_document(path: str, conf_log: ConfLog, search_config_fingerprint: str,
+                    page_store: PageFindingsStore = None, document_store: DocumentFindingsStore = None,
+                    data: bytes or None = None, sentence_sink: Callable[[int, Dict[str, Set[str]]], None] = None) -> \
+        Tuple[List[str], List[dict], Set[str], bool]:
+    """ search_pdf with the document memo: the last value is True if the findings were taken from the document_store
+    (documents that were already searched under the same D_Search config only run through E_Collect/F_Extract) """
+    if data is None and is_archive_member(path=path):
+        """ Members of ZIP/TAR archives are read into memory, they are never unpacked to disk """
+        data = read_document(path=path)
+    if document_store is not None:
+        document_hash = get_document_hash(path=path, data=data)
+        stored = document_store.get(document_hash=document_hash, config_fingerprint=search_config_fingerprint)
+        if stored is not None:
+            table_keywords, search_result, matching_sentences = stored
+            if sentence_sink is not None and len(matching_sentences) > 0:
+                """ The document store does not know the pages of the sentences """
+                keyword_matchers = get_keyword_matchers(
+                    keywords_dict_of_list=conf_log.keyword_dict_of_lists,
+                    max_errors=conf_log.find_word_approximate_max_errors,
+                    min_length=conf_log.find_word_approximate_min_length) if conf_log.find_word_approximate else None
+                sentence_sink(None, get_sentences_by_scope(sentences=matching_sentences,
+                                                           keywords_dict_of_list=conf_log.keyword_dict_of_lists,
+                                                           search_word_list=conf_log.search_word_list,
+                                                           keyword_matchers=keyword_matchers))
+            return table_keywords, search_result, matching_sentences, True
+    table_keywords, search_result, matching_sentences = search_pdf(path=path, conf_log=conf_log,
+                                                                   page_store=page_store, data=data,
+                                                                   sentence_sink=sentence_sink)
+    if document_store is not None:
+        document_store.put(document_hash=document_hash, config_fingerprint=search_config_fingerprint,
+                           table_keywords=table_keywords, findings=search_result,
+                           matching_sentences=matching_sentences)
+    return table_keywords, search_result, matching_sentences, False
+
+
+def get_scheduler_worker(conf_log: ConfLog, profiler: DocumentProfiler or None) -> dict:
+    """ conf_log, the stores and the profiler that a worker of the scheduled analysis searches with """
+    return {
+        'conf_log': conf_log,
+        'search_config_fingerprint': get_search_config_fingerprint(conf_log=conf_log),
+        'page_store': PageFindingsStore(path=conf_log.find_word_page_store_path) if
+        conf_log.find_word_page_dedup else None,
+        'document_store': DocumentFindingsStore(path=conf_log.find_word_document_store_path) if
+        conf_log.find_word_document_memo else None,
+        'profiler': profiler}
+
+
+def close_scheduler_worker(worker: dict):
+    for store in (worker['page_store'], worker['document_store']):
+        if store is not None:
+            store.close()
+
+
+""" conf_log and the stores of a worker process of the scheduled analysis (set once by the initializer) """
+_scheduler_worker = None
+
+
+def _init_scheduler_worker(log_queue=None, log_level: int = logging.ERROR, overrides: dict = None):
+    """ overrides: the overrides of the conf_log of the main process """
+    global _scheduler_worker
+    if log_queue is not None:
+        configure_worker_logging(queue=log_queue, level=log_level)
+    conf_log = ConfLog(overrides=overrides)
+    """ Every worker has its own connections to the (sqlite) stores """
+    _scheduler_worker = get_scheduler_worker(conf_log=conf_log, profiler=get_profiler(conf_log=conf_log))
+
+
+def _search_scheduled_document(path: str, worker: dict = None) -> dict:
+    """ Runs in a worker process (or thread): the search of one document and its run time (in seconds).
+    worker: the worker that all threads share (thread mode), None: the worker of this process """
+    worker = _scheduler_worker if worker is None else worker
+    start = time.perf_counter()
+    name_of_pdf = get_document_name(path=path)
+    profiler = worker['profiler']
+    search = None
+    from_store = False
+    """ The matching sentences are written by the SentenceCorpus of the main process (thread) """
+    sentence_recorder = SentenceRecorder() if worker['conf_log'].sentence_corpus_enabled else None
+    with log_context(document=name_of_pdf, stage='search'), \
+            profiler.profile(name=name_of_pdf) if profiler is not None else nullcontext() as profile_record:
+        try:
+            table_keywords, search_result, matching_sentences, from_store = search_document(
+                path=path, conf_log=worker['conf_log'], search_config_fingerprint=worker['search_config_fingerprint'],
+                page_store=worker['page_store'], document_store=worker['document_store'],
+                sentence_sink=sentence_recorder.get_sink(document=name_of_pdf) if sentence_recorder is not None else
+                None)
+            """ The sets are returned as lists in their iteration order: unpickled sets can iterate in another order and
+            ties in Counter.most_common (E_Collect) would then be broken differently than in the sequential analysis """
+            search_result = [{key: {key_name: {year: list(values_of_year) for year, values_of_year in values.items()}
+                                    if isinstance(values, dict) else list(values) for key_name, values in value.items()}
+                              if isinstance(value, dict) else value for key, value in page_findings.items()} for
+                             page_findings in search_result]
+            search = (table_keywords, search_result, list(matching_sentences))
+        except Exception as e:
+            worker['conf_log'].logging.error(e, exc_info=True)
+    return {'path': path, 'search': search, 'from_store': from_store, 'seconds': time.perf_counter() - start,
+            'pid': os.getpid(), 'font_cache': get_font_cache().get_stats(), 'profile': profile_record,
+            'sentences': sentence_recorder.records if sentence_recorder is not None else None,
+            'peak_rss_mb': get_peak_rss_mb()}
+
+
+def search_pdfs_scheduled(paths: List[str], conf_log: ConfLog, max_workers: int,
+                          profiler: DocumentProfiler = None, sentence_corpus: SentenceCorpus = None) -> dict:
+    """ D_Search of all documents in a process pool (or a thread pool, see [F_Extract.Scheduler] mode). The
+    documents are dispatched longest (predicted) processing time first (see F_Extract/Scheduler.py), the measured
+    times are added to the run history. Returns the searches (None if the search failed) by path; the run report
+    (predicted vs. actual) is stored under the key None. profiler: collects the profiles that the workers wrote (in the
+    profiling mode). sentence_corpus: the matching sentences of the workers are written to it as soon as a document is
+    done """
+    mode = conf_log.scheduler_mode
+    if mode not in EXECUTION_MODES:
+        raise ValueError(f'Unknown execution mode: {mode} ! ')
+    history = RunHistory(path=conf_log.scheduler_history_path)
+    worker = None
+    try:
+        jobs = get_lpt_order(jobs=estimate_jobs(paths=paths, history=history))
+        jobs_by_path = {job.path: job for job in jobs}
+        searches = dict()
+        """ The (cumulative) font cache stats and the peak memory of every worker process (from its latest
+        document) """
+        font_cache_stats = dict()
+        peak_rss_mb = dict()
+        if mode == EXECUTION_MODE_THREAD:
+            """ All threads search with the same conf_log, stores (page cache) and font cache of this process. Only
+            with a free-threaded CPython (without GIL) the threads search in parallel. cProfile can not profile several
+            threads at the same time, the documents are not profiled. """
+            if is_gil_enabled():
+                conf_log.logging.warning('Thread mode with GIL: the documents are not searched in parallel')
+            if profiler is not None:
+                conf_log.logging.warning('Thread mode: the documents are not profiled')
+            worker = get_scheduler_worker(conf_log=conf_log, profiler=None)
+            executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='Scheduler')
+        else:
+            executor = ProcessPoolExecutor(max_workers=max_workers, initializer=_init_scheduler_worker,
+                                           initargs=(get_log_queue(), logging.getLogger().level, conf_log.overrides))
+        start = time.perf_counter()
+        with executor:
+            """ The pool starts the jobs in the order in which they are submitted """
+            futures = [executor.submit(_search_scheduled_document, job.path, worker) for job in jobs]
+            for future in as_completed(futures):
+                searched = future.result()
+                job = jobs_by_path[searched['path']]
+                job.actual_seconds = searched['seconds']
+                searches[job.path] = searched['search']
+                font_cache_stats[searched['pid']] = searched['font_cache']
+                peak_rss_mb[searched['pid']] = searched['peak_rss_mb']
+                if profiler is not None and searched['profile'] is not None:
+                    profiler.add_profile(**searched['profile'])
+                if sentence_corpus is not None and searched['sentences'] is not None:
+                    sentence_corpus.add_records(records=searched['sentences'])
+                """ Documents from the document memo (or failed searches) do not tell anything about the cost """
+                if searched['search'] is not None and not searched['from_store']:
+                    history.record(document_hash=job.document_hash, name=job.name, pages=job.pages, size=job.size,
+                                   seconds=job.actual_seconds)
+        run_report = get_run_report(jobs=jobs, workers=max_workers, wall_seconds=time.perf_counter() - start)
+        run_report.attrs['mode'] = mode
+        run_report.attrs['gil_enabled'] = is_gil_enabled()
+        """ This process and its worker processes (the threads are part of this process) """
+        peak_rss_mb[os.getpid()] = get_peak_rss_mb()
+        run_report.attrs['peak_rss_mb'] = sum(peak_rss_mb.values()) if None not in peak_rss_mb.values() else None
+        searches[None] = run_report
+        conf_log.logging.info('Font cache: %s',
+                              sum_font_cache_stats(stats_of_processes=list(font_cache_stats.values())))
+    finally:
+        history.close()
+        if worker is not None:
+            close_scheduler_worker(worker=worker)
+    return searches
 
 
 def analyze_pdfs() -> pd.DataFrame:
     conf_log = ConfLog()
     df_aggregate = None
-    for pdf_doc in os.scandir(conf_log.path_to_reports_for_analysis_directory):
-        filename = os.fsdecode(pdf_doc)
-        if filename.endswith(".pdf"):
+    paths = get_pdf_paths(directory=conf_log.path_to_reports_for_analysis_directory)
+    max_workers = conf_log.scheduler_max_workers or os.cpu_count()
+    profiler = get_profiler(conf_log=conf_log)
+    """ The matching sentences of all documents are exported while the pages are searched """
+    sentence_corpus = get_sentence_corpus(conf_log=conf_log)
+    if max_workers > 1:
+        """ D_Search in parallel worker processes, E_Collect/F_Extract (fast) of all documents at once in this process
+        in the usual order """
+        searches = search_pdfs_scheduled(paths=paths, conf_log=conf_log, max_workers=max_workers, profiler=profiler,
+                                         sentence_corpus=sentence_corpus)
+        run_report = searches.pop(None)
+        conf_log.logging.info('Schedule: %s', get_report_summary(report=run_report))
+        if conf_log.scheduler_report_path:
+            run_report.to_csv(conf_log.scheduler_report_path, index=False)
+        documents = [{'search_result': searches[filename][1], 'matching_sentences': searches[filename][2],
+                      'table_keywords': searches[filename][0], 'name': get_document_name(path=filename)}
+                     for filename in paths if searches.get(filename) is not None]
+        df_aggregate = add_results_of_documents(documents=documents, conf_log=conf_log)
+        if profiler is not None:
+            conf_log.logging.info('Profiling report: %s', profiler.write_report())
+        if sentence_corpus is not None:
+            conf_log.logging.info('Sentence corpus: %s', sentence_corpus.get_stats())
+            sentence_corpus.close()
+        return df_aggregate
+    """ Pages that were already analyzed (in this or an earlier run) under the same config are reused """
+    page_store = PageFindingsStore(path=conf_log.find_word_page_store_path) if conf_log.find_word_page_dedup else None
+    """ Documents that were already searched under the same D_Search config only run through E_Collect/F_Extract """
+    document_store = DocumentFindingsStore(path=conf_log.find_word_document_store_path) if \
+        conf_log.find_word_document_memo else None
+    search_config_fingerprint = get_search_config_fingerprint(conf_log=conf_log)
+    """ The next documents are already read on a background thread while the current one is analyzed """
+    prefetcher = DocumentPrefetcher(paths=paths, depth=conf_log.prefetch_depth, mode=conf_log.prefetch_mode)
+    """ The searched documents are extracted batch_size documents at a time """
+    batch = list()
+    for prefetched_document in prefetcher:
+        filename = prefetched_document.path
+        name_of_pdf = get_document_name(path=filename)
+        with log_context(document=name_of_pdf, stage='search'), \
+                profiler.profile(name=name_of_pdf) if profiler is not None else nullcontext():
             try:
-                miner = PDFMiner(path=filename)
-                table_keywords = miner.get_year_and_fy()
-                # print('table_keywords:', table_keywords)
-                search_result = miner.find_word(keywords_dict_of_list=conf_log.keyword_dict_of_lists,
-                                                search_word_list=conf_log.search_word_list,
-                                                table_keywords=table_keywords,
-                                                neighbour_x_tolerance=conf_log.find_word_neighbour_x_tolerance,
-                                                neighbour_y_tolerance=conf_log.find_word_neighbour_y_tolerance,
-                                                table_x_tolerance=conf_log.find_word_table_x_tolerance,
-                                                table_y_tolerance=conf_log.find_word_table_y_tolerance,
-                                                decimals=conf_log.find_word_decimals)
-                print('Search Results:\n', search_result)
-                """ The matching sentences (for potential word2vec) are stored in miner.matching_sentences """
-                # print('miner.matching_sentences:', miner.matching_sentences)
-                most_likely_unit = get_most_likely_unit(set_of_strings=miner.matching_sentences, unit_list=conf_log.find_word_unit_list)
-                # print('most_likely_unit:', most_likely_unit)
-                table_numbers_and_pages = get_values_and_page_numbers(search_result_list=search_result,
-                                                                      keyword_dict_of_lists=conf_log.keyword_dict_of_lists,
-                                                                      num_of_return_values=conf_log.extract_number_of_table_vals_to_include,
-                                                                      search_result_dict_key_name='table_values')
-                #print('table_numbers_and_pages:', table_numbers_and_pages)
-                neighbour_numbers_and_pages = get_values_and_page_numbers(search_result_list=search_result,
-                                                                          keyword_dict_of_lists=conf_log.keyword_dict_of_lists,
-                                                                          num_of_return_values=conf_log.extract_number_of_neighbour_vals_to_include,
-                                                                          search_result_dict_key_name='neighbour_values')
-                #print('neighbour_numbers_and_pages:', neighbour_numbers_and_pages)
-                text_numbers_and_pages = get_values_and_page_numbers(search_result_list=search_result,
-                                                                     keyword_dict_of_lists=conf_log.keyword_dict_of_lists,
-                                                                     num_of_return_values=conf_log.extract_number_of_text_vals_to_include,
-                                                                     search_result_dict_key_name='text_values')
-                #print('text_numbers_and_pages:', text_numbers_and_pages)
-                number_and_pages_dict = aggregate_results(neighbour_numbers_and_pages=neighbour_numbers_and_pages,
-                                                          table_numbers_and_pages=table_numbers_and_pages,
-                                                          text_numbers_and_pages=text_numbers_and_pages,
-                                                          num_of_return_values=conf_log.extract_number_of_vals_to_include)
-
-                result_dict = add_descriptive_data(number_and_pages_dict=number_and_pages_dict, year=table_keywords[0],
-                                                   name_of_pdf=str(pdf_doc.name), weight_unit=most_likely_unit)
-
-                df_aggregate = create_result_dataframe(result_dict=result_dict, result_dataframe=df_aggregate)
-                miner.stream.close()
+                if prefetched_document.error is not None and is_archive_member(path=filename):
+                    """ A member that could not be read (e.g. a corrupt one) is not read a second time """
+                    raise prefetched_document.error
+                table_keywords, search_result, matching_sentences, _ = search_document(
+                    path=filename, conf_log=conf_log, search_config_fingerprint=search_config_fingerprint,
+                    page_store=page_store, document_store=document_store, data=prefetched_document.data,
+                    sentence_sink=sentence_corpus.get_sink(document=name_of_pdf) if sentence_corpus is not None else
+                    None)
+                conf_log.logging.debug('Search Results: %s', search_result)
+                batch.append({'search_result': search_result, 'matching_sentences': matching_sentences,
+                              'table_keywords': table_keywords, 'name': name_of_pdf})
             except Exception as e:
                 conf_log.logging.error(e, exc_info=True)
+        if len(batch) >= conf_log.extract_batch_size:
+            df_aggregate = add_results_of_documents(documents=batch, conf_log=conf_log, result_dataframe=df_aggregate)
+            batch = list()
+    df_aggregate = add_results_of_documents(documents=batch, conf_log=conf_log, result_dataframe=df_aggregate)
+    conf_log.logging.info('Prefetch: %s', prefetcher.get_stats())
+    conf_log.logging.info('Font cache: %s', get_font_cache().get_stats())
+    if profiler is not None:
+        conf_log.logging.info('Profiling report: %s', profiler.write_report())
+    if page_store is not None:
+        conf_log.logging.info('Page deduplication: %s', page_store.get_stats())
+        page_store.close()
+    if document_store is not None:
+        conf_log.logging.info('Document memoization: %s', document_store.get_stats())
+        document_store.close()
+    if sentence_corpus is not None:
+        conf_log.logging.info('Sentence corpus: %s', sentence_corpus.get_stats())
+        sentence_corpus.close()
     return df_aggregate
+
+
+def _benchmark_execution_mode(paths: List[str], max_workers: int, overrides: dict) -> dict:
+    """ Runs in a new process: the scheduled search of all documents with the settings in overrides """
+    conf_log = ConfLog(overrides=overrides)
+    searches = search_pdfs_scheduled(paths=paths, conf_log=conf_log, max_workers=max_workers)
+    run_report = searches.pop(None)
+    wall_seconds = run_report.attrs['wall_seconds']
+    documents = sum(search is not None for search in searches.values())
+    pages = int(run_report['pages'].fillna(0).sum())
+    return {'mode': run_report.attrs['mode'], 'gil_enabled': run_report.attrs['gil_enabled'],
+            'workers': max_workers, 'documents': documents, 'failed': len(searches) - documents, 'pages': pages,
+            'wall_seconds': wall_seconds, 'documents_per_second': documents / wall_seconds if wall_seconds else None,
+            'pages_per_second': pages / wall_seconds if wall_seconds else None,
+            'peak_rss_mb': run_report.attrs['peak_rss_mb']}
+
+
+def benchmark_execution_modes(paths: List[str] = None, max_workers: int = None, repeat: int = 1) -> pd.DataFrame:
+    """ Throughput (documents and pages per second) and memory (peak resident set size of all processes, in MB) of
+    the scheduled search in process and in thread mode, one row per run. Every run starts in a new process (cold font
+    cache, the memory is measured from the start) and the page and document stores are off, so every run searches
+    all pages. The memory of worker processes is added up, pages that they share with the main process are counted
+    in every process. paths=None: all pdf docs in path_to_reports_for_analysis_directory """
+    conf_log = ConfLog()
+    paths = get_pdf_paths(directory=conf_log.path_to_reports_for_analysis_directory) if paths is None else paths
+    max_workers = max_workers or conf_log.scheduler_max_workers or os.cpu_count()
+    rows = list()
+    for run in range(repeat):
+        for mode in EXECUTION_MODES:
+            overrides = {'F_Extract.Scheduler': {'mode': mode},
+                         'D_Search': {'page_dedup': False, 'document_memo': False},
+                         'D_Search.SentenceCorpus': {'enabled': False}}
+            with ProcessPoolExecutor(max_workers=1) as executor:
+                row = executor.submit(_benchmark_execution_mode, paths, max_workers, overrides).result()
+            row['run'] = run
+            rows.append(row)
+            conf_log.logging.info('Execution mode benchmark: %s', row)
+    return pd.DataFrame(rows)
+
+
+def index_pdfs(reindex: bool = False) -> dict:
+    """ Adds all pdf docs in path_to_reports_for_analysis_directory to the corpus index (see D_Search/CorpusIndex.py).
+    Documents that are already indexed with the same extraction settings are skipped. """
+    conf_log = ConfLog()
+    paths = get_pdf_paths(directory=conf_log.path_to_reports_for_analysis_directory)
+    corpus_index = CorpusIndex(path=conf_log.find_word_corpus_index_path)
+    try:
+        stats = index_documents(paths=paths, conf_log=conf_log, corpus_index=corpus_index, reindex=reindex)
+        stats.update(corpus_index.get_stats())
+    finally:
+        corpus_index.close()
+    conf_log.logging.info('Corpus index: %s', stats)
+    return stats
+
+
+def analyze_index() -> pd.DataFrame:
+    """ Like analyze_pdfs(), but the search runs on the corpus index (built with index_pdfs()) instead of the pdf docs,
+    so new keywords in keyword_dict_of_lists or other settings in [D_Search] and [F_Extract] can be evaluated
+    without parsing the pdf docs again """
+    conf_log = ConfLog()
+    result_dicts = list()
+    corpus_index = CorpusIndex(path=conf_log.find_word_corpus_index_path)
+    try:
+        for name_of_pdf, table_keywords, search_result, matching_sentences in \
+                corpus_index.search(conf_log=conf_log, **get_find_word_settings(conf_log=conf_log)):
+            with log_context(document=name_of_pdf, stage='extract'):
+                try:
+                    result_dict = extract_results(search_result=search_result, matching_sentences=matching_sentences,
+                                                  table_keywords=table_keywords, name_of_pdf=name_of_pdf,
+                                                  conf_log=conf_log)
+                    result_dicts.append(result_dict)
+                except Exception as e:
+                    conf_log.logging.error(e, exc_info=True)
+    finally:
+        corpus_index.close()
+    return create_result_dataframe_of_dicts(result_dicts=result_dicts)
@@ -0,0 +1,248 @@
+import os
+import time
+import asyncio
+import logging
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from typing import List, Callable, Awaitable, Dict, Tuple
+import pandas as pd
+from pdfminer.pdfpage import PDFTextExtractionNotAllowed
+
+from A_Configuration_and_Logs.conf_and_log import ConfLog
+from A_Configuration_and_Logs.log_setup import log_context, configure_worker_logging, get_log_queue
+from D_Search.PDFMiner import PDFMiner, PageSearch
+from D_Search.PageText import PageText
+from F_Extract.Extract import extract_results, get_find_word_settings, create_result_dataframe_of_dicts, \
+    get_sentence_corpus
+from D_Search.Sources import read_document, get_document_name
+from F_Extract.Prefetch import get_pdf_paths
+
+""" The analysis (A -> F) as a pipeline of stages that are connected by bounded queues (asyncio):
+
+        discovery -> read -> layout -> find_word -> extract (E_Collect/F_Extract) -> sink
+
+    Every stage works on several documents at the same time (its own concurrency in [F_Extract.Pipeline]): the pdf docs
+    are read by threads (I/O), laid out by worker processes (pdfminer, CPU bound) and searched by threads. A stage can
+    only hand over a document if there is room in the queue to the next stage, so a slow sink or a slow disk throttles
+    the stages before it (backpressure) instead of piling up documents and pages in memory. The metrics of every stage
+    (documents, busy seconds, throughput, queue depth and the seconds the stage was blocked by the next one) show where
+    the pipeline waits.
+
+    Usage:
+        df = analyze_pdfs_pipeline()                            (in a script)
+        df, metrics = await run_pipeline(paths, conf_log)       (in a notebook, the event loop is already running)
+
+    The page and document stores of analyze_pdfs are not used here, every document is laid out and searched.
+"""
+
+_END = object()
+
+""" conf_log of a layout worker process (set once by the initializer of the process pool) """
+_layout_conf_log = None
+
+
+def _init_layout_worker(log_queue=None, log_level: int = logging.ERROR):
+    global _layout_conf_log
+    if log_queue is not None:
+        configure_worker_logging(queue=log_queue, level=log_level)
+    _layout_conf_log = ConfLog()
+
+
+def layout_document(path: str, data: bytes or None = None) -> Tuple[List[str], List[PageText]]:
+    """ Runs in a layout worker: the year (table_keywords) and all pages of a pdf doc as PageText objects (in the
+    order in which PDFMiner searches them, see page_priority) """
+    conf_log = _layout_conf_log or ConfLog()
+    with log_context(document=get_document_name(path=path), stage='layout'):
+        miner = PDFMiner(path=path, conf_log=conf_log, data=data)
+        try:
+            if not miner.doc_is_extractable:
+                raise PDFTextExtractionNotAllowed('The pdf document does not allow extraction ! ')
+            return miner.get_year_and_fy(), list(miner.iter_page_texts())
+        finally:
+            miner.close()
+
+
+class StageMetrics:
+
+    def __init__(self, name: str, concurrency: int):
+        self.name = name
+        self.concurrency = concurrency
+        self.documents = 0
+        self.failed = 0
+        self.busy_seconds = 0.0
+        """ Seconds the stage could not hand over a document because the queue to the next stage was full """
+        self.blocked_seconds = 0.0
+        self.max_queue_depth = 0
+        self.queue_depth_sum = 0
+        self.queue_depth_samples = 0
+        self.first_start = None
+        self.last_end = None
+
+    def sample_queue_depth(self, queue: asyncio.Queue):
+        depth = queue.qsize()
+        self.max_queue_depth = max(self.max_queue_depth, depth)
+        self.queue_depth_sum += depth
+        self.queue_depth_samples += 1
+
+    def get_stats(self) -> dict:
+        """ Queue depth: of the queue INTO the stage (sampled whenever the stage takes a document) """
+        active_seconds = (self.last_end - self.first_start) if self.first_start is not None and \
+            self.last_end is not None else 0.0
+        return {'stage': self.name, 'concurrency': self.concurrency, 'documents': self.documents,
+                'failed': self.failed, 'busy_seconds': round(self.busy_seconds, 4),
+                'blocked_seconds': round(self.blocked_seconds, 4),
+                'documents_per_second': round(self.documents / active_seconds, 4) if active_seconds > 0 else None,
+                'max_queue_depth': self.max_queue_depth,
+                'mean_queue_depth': round(self.queue_depth_sum / self.queue_depth_samples, 4) if
+                self.queue_depth_samples > 0 else 0.0}
+
+
+async def _run_stage(name: str, function: Callable[[dict], Awaitable[dict or None]], concurrency: int,
+                     input_queue: asyncio.Queue, output_queue: asyncio.Queue or None, metrics: StageMetrics,
+                     conf_log: ConfLog):
+    """ concurrency tasks take documents from input_queue, process them with function and put them into
+    output_queue. A document whose processing fails is logged and dropped. When all documents are through, _END is
+    handed over to the next stage. """
+
+    async def work():
+        while True:
+            document = await input_queue.get()
+            if document is _END:
+                """ For the other tasks of this stage """
+                await input_queue.put(_END)
+                return
+            metrics.sample_queue_depth(queue=input_queue)
+            start = time.perf_counter()
+            metrics.first_start = start if metrics.first_start is None else metrics.first_start
+            with log_context(document=document['name'], stage=name):
+                try:
+                    document = await function(document)
+                except Exception as e:
+                    conf_log.logging.error(e, exc_info=True)
+                    metrics.failed += 1
+                    document = None
+            metrics.last_end = time.perf_counter()
+            metrics.busy_seconds += metrics.last_end - start
+            if document is None:
+                continue
+            metrics.documents += 1
+            if output_queue is not None:
+                put_start = time.perf_counter()
+                await output_queue.put(document)
+                metrics.blocked_seconds += time.perf_counter() - put_start
+
+    await asyncio.gather(*[work() for _ in range(max(concurrency, 1))])
+    if output_queue is not None:
+        await output_queue.put(_END)
+
+
+async def run_pipeline(paths: List[str], conf_log: ConfLog, sink: Callable[[dict], None] = None) -> \
+        Tuple[pd.DataFrame, List[dict]]:
+    """ Runs all pdf docs in paths through the pipeline. sink: called with every result (dict of one row, in the
+    order in which the documents are finished, may be a coroutine function), e.g. to write the rows to a database.
+    Returns the results (in the order of paths) and the metrics of every stage. """
+    loop = asyncio.get_running_loop()
+    queue_size = max(conf_log.pipeline_queue_size, 1)
+    layout_concurrency = conf_log.pipeline_layout_concurrency or os.cpu_count()
+    concurrency = {'discovery': 1, 'read': conf_log.pipeline_read_concurrency, 'layout': layout_concurrency,
+                   'find_word': conf_log.pipeline_search_concurrency, 'extract': conf_log.pipeline_extract_concurrency,
+                   'sink': conf_log.pipeline_sink_concurrency}
+    metrics = {name: StageMetrics(name=name, concurrency=stage_concurrency) for name, stage_concurrency in
+               concurrency.items()}
+    queues = {name: asyncio.Queue(maxsize=queue_size) for name in concurrency}
+    find_word_settings = get_find_word_settings(conf_log=conf_log)
+    sentence_corpus = get_sentence_corpus(conf_log=conf_log)
+    results: Dict[int, dict] = dict()
+    thread_executor = ThreadPoolExecutor(max_workers=concurrency['read'] + concurrency['find_word'] +
+                                         concurrency['extract'] + concurrency['sink'],
+                                         thread_name_prefix='Pipeline')
+    process_executor = ProcessPoolExecutor(max_workers=layout_concurrency, initializer=_init_layout_worker,
+                                           initargs=(get_log_queue(), logging.getLogger().level))
+
+    async def discover(document: dict) -> dict:
+        return document
+
+    async def read(document: dict) -> dict:
+        """ Files and members of ZIP/TAR archives (see D_Search/Sources.py) """
+        document['data'] = await loop.run_in_executor(thread_executor, read_document, document['path'])
+        return document
+
+    async def layout(document: dict) -> dict:
+        document['table_keywords'], document['page_texts'] = await loop.run_in_executor(
+            process_executor, layout_document, document['path'], document.pop('data'))
+        return document
+
+    async def find_word(document: dict) -> dict:
+        def search() -> dict:
+            with log_context(document=document['name'], stage='find_word'):
+                page_search = PageSearch(conf_log=conf_log)
+                if sentence_corpus is not None:
+                    page_search.sentence_sink = sentence_corpus.get_sink(document=document['name'])
+                findings = page_search.find_word_in_pages(page_texts=document.pop('page_texts'),
+                                                          table_keywords=document['table_keywords'],
+                                                          **find_word_settings)
+                """ In document order, like PDFMiner.find_word """
+                document['search_result'] = sorted(findings, key=lambda page_findings: page_findings['page_number'])
+                document['matching_sentences'] = page_search.matching_sentences
+                return document
+        return await loop.run_in_executor(thread_executor, search)
+
+    async def extract(document: dict) -> dict:
+        """ On a thread (like find_word), so the event loop and the other stages do not wait for it """
+        def extract_document() -> dict:
+            with log_context(document=document['name'], stage='extract'):
+                document['result'] = extract_results(search_result=document.pop('search_result'),
+                                                     matching_sentences=document.pop('matching_sentences'),
+                                                     table_keywords=document['table_keywords'],
+                                                     name_of_pdf=document['name'], conf_log=conf_log)
+                return document
+        return await loop.run_in_executor(thread_executor, extract_document)
+
+    async def write(document: dict) -> dict:
+        results[document['index']] = document['result']
+        if sink is not None:
+            if asyncio.iscoroutinefunction(sink):
+                await sink(document['result'])
+            else:
+                await loop.run_in_executor(thread_executor, sink, document['result'])
+        return document
+
+    stages = [('discovery', discover, 'read'), ('read', read, 'layout'), ('layout', layout, 'find_word'),
+              ('find_word', find_word, 'extract'), ('extract', extract, 'sink'), ('sink', write, None)]
+
+    async def feed():
+        for index, path in enumerate(paths):
+            await queues['discovery'].put({'index': index, 'path': path, 'name': get_document_name(path=path)})
+        await queues['discovery'].put(_END)
+
+    start = time.perf_counter()
+    try:
+        await asyncio.gather(feed(), *[_run_stage(name=name, function=function, concurrency=concurrency[name],
+                                                  input_queue=queues[name],
+                                                  output_queue=queues[next_name] if next_name is not None else None,
+                                                  metrics=metrics[name], conf_log=conf_log)
+                                       for name, function, next_name in stages])
+    finally:
+        thread_executor.shutdown(wait=True)
+        process_executor.shutdown(wait=True)
+        if sentence_corpus is not None:
+            conf_log.logging.info('Sentence corpus: %s', sentence_corpus.get_stats())
+            sentence_corpus.close()
+    wall_seconds = time.perf_counter() - start
+    df_aggregate = create_result_dataframe_of_dicts(result_dicts=[results[index] for index in sorted(results)])
+    stage_metrics = [metrics[name].get_stats() for name, _, _ in stages]
+    for stage_stats in stage_metrics:
+        stage_stats['wall_seconds'] = round(wall_seconds, 4)
+    return df_aggregate, stage_metrics
+
+
+def analyze_pdfs_pipeline(sink: Callable[[dict], None] = None) -> pd.DataFrame:
+    """ Like analyze_pdfs(), but as a pipeline. The metrics of the stages are logged (INFO) and stored in
+    DataFrame.attrs['pipeline_metrics']. """
+    conf_log = ConfLog()
+    paths = get_pdf_paths(directory=conf_log.path_to_reports_for_analysis_directory)
+    df_aggregate, stage_metrics = asyncio.run(run_pipeline(paths=paths, conf_log=conf_log, sink=sink))
+    for stage_stats in stage_metrics:
+        conf_log.logging.info('Pipeline stage: %s', stage_stats)
+    if df_aggregate is not None:
+        df_aggregate.attrs['pipeline_metrics'] = stage_metrics
+    return df_aggregate
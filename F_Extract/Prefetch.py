@@ -0,0 +1,160 @@
+import os
+import time
+import queue
+import threading
+from typing import List, Iterator
+
+from D_Search.Sources import read_document, is_archive, is_archive_member, get_archive_member_paths
+
+""" Read-ahead of the pdf docs: while the current document is analyzed (CPU bound), a background thread already reads
+    the next documents (I/O bound, e.g. from a slow network share), so the CPU does not wait for the disk.
+
+    mode "memory":     the next depth documents are read into memory and handed over as bytes (DocumentSession then
+                       parses them without opening the file again).
+    mode "page_cache": the next depth documents are only read (and discarded) to warm the page cache of the OS; they
+                       are opened (memory-mapped) as usual. This needs less memory for very large documents.
+
+    wait_seconds is the time the analysis had to wait for documents that were not read yet (the remaining I/O wait),
+    read_seconds the time the background thread spent reading. If wait_seconds is high, increase the depth.
+"""
+
+PREFETCH_MODE_MEMORY = 'memory'
+PREFETCH_MODE_PAGE_CACHE = 'page_cache'
+
+_END_OF_DOCUMENTS = object()
+
+
+class PrefetchedDocument:
+
+    def __init__(self, path: str, data: bytes or None = None, read_seconds: float = 0.0,
+                 error: Exception or None = None):
+        self.path = path
+        """ None if the document was not read into memory (mode page_cache, depth 0 or read error) """
+        self.data = data
+        self.read_seconds = read_seconds
+        """ The document is still handed over if it could not be read, opening it again then raises the error """
+        self.error = error
+
+
+class DocumentPrefetcher:
+
+    def __init__(self, paths: List[str], depth: int = 2, mode: str = PREFETCH_MODE_MEMORY,
+                 chunk_size: int = 1 << 20):
+        if mode not in (PREFETCH_MODE_MEMORY, PREFETCH_MODE_PAGE_CACHE):
+            raise ValueError(f'Unknown prefetch mode: {mode} ! ')
+        self.paths = paths
+        self.depth = depth
+        self.mode = mode
+        self.chunk_size = chunk_size
+        """ At most depth documents are read ahead (the queue blocks the background thread when it is full) """
+        self.queue = queue.Queue(maxsize=max(depth, 1))
+        self._stop = threading.Event()
+        self._thread = None
+        """ An unexpected error of the background thread, raised again by __iter__ """
+        self._error = None
+        self.read_seconds = 0.0
+        self.wait_seconds = 0.0
+        self.read_bytes = 0
+        self.documents = 0
+
+    def read_document(self, path: str) -> PrefetchedDocument:
+        start = time.perf_counter()
+        try:
+            if self.mode == PREFETCH_MODE_MEMORY or is_archive_member(path=path):
+                """ A member of an archive (see D_Search/Sources.py) can only be handed over in memory """
+                data = read_document(path=path)
+                size = len(data)
+            else:
+                data = None
+                size = 0
+                with open(path, 'rb') as stream:
+                    for chunk in iter(lambda: stream.read(self.chunk_size), b''):
+                        size += len(chunk)
+            error = None
+        except Exception as e:
+            """ Also corrupt members of archives (zlib.error, zipfile.BadZipFile, tarfile.TarError) """
+            data, size, error = None, 0, e
+        read_seconds = time.perf_counter() - start
+        self.read_seconds += read_seconds
+        self.read_bytes += size
+        return PrefetchedDocument(path=path, data=data, read_seconds=read_seconds, error=error)
+
+    def _read_ahead(self):
+        """ The end is always queued, otherwise the analysis would wait for the next document forever """
+        try:
+            for path in self.paths:
+                prefetched_document = self.read_document(path=path)
+                if not self._put(prefetched_document):
+                    return
+        except Exception as e:
+            self._error = e
+        finally:
+            self._put(_END_OF_DOCUMENTS)
+
+    def _put(self, item) -> bool:
+        """ Waits for a free place in the queue, but gives up if the prefetcher was closed """
+        while not self._stop.is_set():
+            try:
+                self.queue.put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def _get(self):
+        """ Waits for the next document, but fails instead of waiting forever if the background thread died """
+        while True:
+            try:
+                return self.queue.get(timeout=0.1)
+            except queue.Empty:
+                if not self._thread.is_alive() and self.queue.empty():
+                    if self._error is not None:
+                        raise RuntimeError('The prefetch thread failed') from self._error
+                    raise RuntimeError('The prefetch thread ended without the end of the documents')
+
+    def __iter__(self) -> Iterator[PrefetchedDocument]:
+        if self.depth <= 0:
+            """ No read-ahead: the documents are opened by the analysis itself """
+            for path in self.paths:
+                self.documents += 1
+                yield PrefetchedDocument(path=path)
+            return
+        self._thread = threading.Thread(target=self._read_ahead, name='DocumentPrefetcher', daemon=True)
+        self._thread.start()
+        try:
+            while True:
+                start = time.perf_counter()
+                item = self._get()
+                self.wait_seconds += time.perf_counter() - start
+                if item is _END_OF_DOCUMENTS:
+                    if self._error is not None:
+                        raise RuntimeError('The prefetch thread failed') from self._error
+                    break
+                self.documents += 1
+                yield item
+        finally:
+            self.close()
+
+    def close(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def get_stats(self) -> dict:
+        return {'prefetch_depth': self.depth, 'prefetch_mode': self.mode, 'documents': self.documents,
+                'read_megabytes': round(self.read_bytes / 2 ** 20, 2), 'read_seconds': round(self.read_seconds, 4),
+                'io_wait_seconds': round(self.wait_seconds, 4)}
+
+
+def get_pdf_paths(directory: str) -> List[str]:
+    """ The pdf docs in directory and in the ZIP/TAR archives in directory (as member paths, see D_Search/Sources.py)
+    """
+    paths = list()
+    for pdf_doc in os.scandir(directory):
+        path = os.fsdecode(pdf_doc)
+        if path.endswith(".pdf"):
+            paths.append(path)
+        elif is_archive(path=path) and pdf_doc.is_file():
+            paths.extend(get_archive_member_paths(archive_path=path))
+    return paths
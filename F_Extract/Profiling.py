@@ -0,0 +1,97 @@
+import os
+import re
+import time
+import pstats
+import cProfile
+import hashlib
+from contextlib import contextmanager
+from typing import List, Dict, Iterator
+
+""" Profiling mode of analyze_pdfs (see [F_Extract.Profiling] in config.ini): the analysis of every (or of every
+    sampled) pdf doc runs under cProfile and its profile is written to "<directory>/<name of the pdf doc>.prof". At the
+    end of the run the profiles are added up: the report lists the slowest documents (with the paths of their profile
+    files, e.g. for "python -m pstats <file>" or snakeviz) and the functions that took the most time over all of them
+    (e.g. PageSearch.get_coordinates_and_word or pdfminer's layout analysis).
+"""
+
+
+class DocumentProfiler:
+
+    def __init__(self, directory: str, sample_rate: float = 1.0, top_n: int = 10):
+        os.makedirs(directory, exist_ok=True)
+        self.directory = directory
+        self.sample_rate = sample_rate
+        self.top_n = top_n
+        """ One record per profiled document: name, profile_path, seconds """
+        self.documents: List[dict] = list()
+
+    def is_sampled(self, name: str) -> bool:
+        """ The sample depends only on the name of the document, so the same documents are profiled in every run """
+        if self.sample_rate >= 1.0:
+            return True
+        fraction = int.from_bytes(hashlib.blake2b(name.encode('utf-8'), digest_size=8).digest(), 'big') / 2 ** 64
+        return fraction < self.sample_rate
+
+    def get_profile_path(self, name: str) -> str:
+        return os.path.join(self.directory, re.sub(r'[^\w.-]+', '_', name) + '.prof')
+
+    @contextmanager
+    def profile(self, name: str) -> Iterator[dict or None]:
+        """ Profiles the block if the document is sampled. Yields the record of the document (filled in when the block
+        ends) or None. """
+        if not self.is_sampled(name=name):
+            yield None
+            return
+        record = {'name': name, 'profile_path': self.get_profile_path(name=name), 'seconds': None}
+        profiler = cProfile.Profile()
+        start = time.perf_counter()
+        profiler.enable()
+        try:
+            yield record
+        finally:
+            profiler.disable()
+            record['seconds'] = time.perf_counter() - start
+            profiler.dump_stats(record['profile_path'])
+            self.documents.append(record)
+
+    def add_profile(self, name: str, profile_path: str, seconds: float):
+        """ For profiles written by other (worker) processes """
+        self.documents.append({'name': name, 'profile_path': profile_path, 'seconds': seconds})
+
+    def get_slowest_documents(self, top_n: int = None) -> List[dict]:
+        return sorted(self.documents, key=lambda record: record['seconds'], reverse=True)[:top_n or self.top_n]
+
+    def get_hot_functions(self, top_n: int = None, sort_key: str = 'tottime') -> List[dict]:
+        """ Functions over all profiles, by own time (tottime) or including the called functions (cumtime) """
+        if len(self.documents) == 0:
+            return list()
+        stats = pstats.Stats(*[record['profile_path'] for record in self.documents])
+        functions = list()
+        for (filename, line, function_name), (_, calls, tottime, cumtime, _) in stats.stats.items():
+            functions.append({'function': f'{function_name} ({os.path.basename(filename)}:{line})',
+                              'calls': calls, 'tottime': round(tottime, 4), 'cumtime': round(cumtime, 4)})
+        return sorted(functions, key=lambda function: function[sort_key], reverse=True)[:top_n or self.top_n]
+
+    def get_report(self) -> Dict[str, list]:
+        return {'slowest_documents': self.get_slowest_documents(),
+                'hot_functions_tottime': self.get_hot_functions(sort_key='tottime'),
+                'hot_functions_cumtime': self.get_hot_functions(sort_key='cumtime')}
+
+    def write_report(self, path: str = None) -> str:
+        """ Writes the report as text (default: report.txt in the profile directory) and returns its path """
+        path = path or os.path.join(self.directory, 'report.txt')
+        report = self.get_report()
+        lines = [f'Profiled documents: {len(self.documents)} (sample rate {self.sample_rate})', '',
+                 f'Slowest {len(report["slowest_documents"])} documents:']
+        for rank, record in enumerate(report['slowest_documents'], start=1):
+            lines.append(f'{rank:>3}. {record["seconds"]:>9.3f} s  {record["name"]}  '
+                         f'{os.path.abspath(record["profile_path"])}')
+        for sort_key in ('tottime', 'cumtime'):
+            lines += ['', f'Hot functions over all documents (by {sort_key}):',
+                      f'{"tottime":>10} {"cumtime":>10} {"calls":>10}  function']
+            for function in report[f'hot_functions_{sort_key}']:
+                lines.append(f'{function["tottime"]:>10.3f} {function["cumtime"]:>10.3f} {function["calls"]:>10}  '
+                             f'{function["function"]}')
+        with open(path, 'w', encoding='utf-8') as report_file:
+            report_file.write('\n'.join(lines) + '\n')
+        return path
@@ -0,0 +1,185 @@
+import io
+import os
+import sys
+import time
+import heapq
+import hashlib
+import sqlite3
+import statistics
+from typing import List, Dict
+import pandas as pd
+from pdfminer.pdfparser import PDFParser
+from pdfminer.pdfdocument import PDFDocument
+from pdfminer.pdftypes import resolve1
+
+from D_Search.Sources import is_archive_member, get_document_name, get_document_size, get_document_identity
+
+try:
+    import resource
+except ImportError:
+    """ Windows: the peak memory of the processes is not measured """
+    resource = None
+
+""" Scheduling of the pdf docs for the parallel analysis (see analyze_pdfs in F_Extract/Extract.py): the cost
+    (seconds) of every document is estimated before it is dispatched and the documents are dispatched longest
+    processing time (LPT) first. A 600-page report that is started last would otherwise set the length of the whole
+    batch (makespan).
+
+    Estimate: the recorded time of the same document (key: hash of its name, size and modification time, see
+    get_document_key) in an earlier run or else its number of pages (from the page tree of the pdf doc, without any
+    layout) times the median seconds per page of all earlier runs. Without any history, the file size is used as a
+    tie breaker. The documents are not read in full before they are dispatched.
+"""
+
+DEFAULT_SECONDS_PER_PAGE = 0.5
+
+""" Worker processes (every process has its own conf_log, stores and font cache) or worker threads of this process
+    (they share them, meant for free-threaded CPython builds without GIL, e.g. python3.13t) """
+EXECUTION_MODE_PROCESS = 'process'
+EXECUTION_MODE_THREAD = 'thread'
+EXECUTION_MODES = (EXECUTION_MODE_PROCESS, EXECUTION_MODE_THREAD)
+
+
+def get_peak_rss_mb() -> float or None:
+    """ Peak resident set size of this process in MB (None where it can not be measured) """
+    if resource is None:
+        return None
+    max_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    """ Bytes on macOS, kilobytes on Linux """
+    return max_rss / 1024 ** 2 if sys.platform == 'darwin' else max_rss / 1024
+
+
+def is_gil_enabled() -> bool:
+    """ False on free-threaded builds of CPython (3.13t) that run without GIL """
+    return getattr(sys, '_is_gil_enabled', lambda: True)()
+
+
+def get_document_key(path: str) -> str:
+    """ Key of a document in the run history. Nothing is read before the documents are dispatched: the key is a hash
+    of the identity of the document (see D_Search/Sources.py), not of its content. """
+    return hashlib.blake2b(get_document_identity(path=path).encode('utf-8', 'surrogatepass'),
+                           digest_size=16).hexdigest()
+
+
+def get_page_count(path: str, data: bytes or None = None) -> int or None:
+    """ /Count of the root of the page tree: only the trailer, the cross reference table and the catalog are read.
+    data: the content of the pdf doc if it was already read into memory """
+    try:
+        with open(path, 'rb') if data is None else io.BytesIO(data) as stream:
+            document = PDFDocument(PDFParser(stream))
+            return int(resolve1(resolve1(document.catalog['Pages'])['Count']))
+    except Exception:
+        return None
+
+
+class RunHistory:
+    """ Recorded analysis times of the documents of earlier runs (sqlite) """
+
+    def __init__(self, path: str):
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self.path = path
+        self.connection = sqlite3.connect(path, timeout=30, check_same_thread=False)
+        self.connection.execute('PRAGMA journal_mode=WAL')
+        self.connection.execute('CREATE TABLE IF NOT EXISTS document_runs (document_hash TEXT, name TEXT, '
+                                'pages INTEGER, size INTEGER, seconds REAL, recorded_at REAL)')
+        self.connection.commit()
+
+    def get_seconds(self, document_hash: str) -> float or None:
+        """ The latest recorded time of the document """
+        row = self.connection.execute('SELECT seconds FROM document_runs WHERE document_hash = ? ORDER BY '
+                                      'recorded_at DESC LIMIT 1', (document_hash,)).fetchone()
+        return row[0] if row is not None else None
+
+    def get_seconds_per_page(self) -> float or None:
+        rates = [seconds / pages for pages, seconds in
+                 self.connection.execute('SELECT pages, seconds FROM document_runs WHERE pages > 0')]
+        return statistics.median(rates) if len(rates) > 0 else None
+
+    def record(self, document_hash: str, name: str, pages: int or None, size: int, seconds: float):
+        self.connection.execute('INSERT INTO document_runs VALUES (?, ?, ?, ?, ?, ?)',
+                                (document_hash, name, pages, size, seconds, time.time()))
+        self.connection.commit()
+
+    def close(self):
+        self.connection.close()
+
+
+class DocumentJob:
+
+    def __init__(self, path: str, document_hash: str, pages: int or None, size: int):
+        self.path = path
+        self.name = get_document_name(path=path)
+        self.document_hash = document_hash
+        self.pages = pages
+        self.size = size
+        self.predicted_seconds = None
+        """ 'history' (same document), 'pages' (pages * seconds per page) or 'size' (no page count) """
+        self.prediction_source = None
+        self.actual_seconds = None
+
+
+def estimate_jobs(paths: List[str], history: RunHistory) -> List[DocumentJob]:
+    seconds_per_page = history.get_seconds_per_page() or DEFAULT_SECONDS_PER_PAGE
+    """ Without a page count, a page is assumed to have the median size of the pages of the other documents """
+    jobs = list()
+    for path in paths:
+        """ The size comes from the file system (or the listing of the archive), the page count from the page tree of a
+        file. A member of an archive is not read here (it is read by the worker): its cost is estimated by its size """
+        jobs.append(DocumentJob(path=path, document_hash=get_document_key(path=path),
+                                pages=None if is_archive_member(path=path) else get_page_count(path=path),
+                                size=get_document_size(path=path)))
+    bytes_per_page = [job.size / job.pages for job in jobs if job.pages]
+    median_bytes_per_page = statistics.median(bytes_per_page) if len(bytes_per_page) > 0 else 100000
+    for job in jobs:
+        recorded_seconds = history.get_seconds(document_hash=job.document_hash)
+        if recorded_seconds is not None:
+            job.predicted_seconds, job.prediction_source = recorded_seconds, 'history'
+        elif job.pages:
+            job.predicted_seconds, job.prediction_source = job.pages * seconds_per_page, 'pages'
+        else:
+            job.predicted_seconds = job.size / median_bytes_per_page * seconds_per_page
+            job.prediction_source = 'size'
+    return jobs
+
+
+def get_lpt_order(jobs: List[DocumentJob]) -> List[DocumentJob]:
+    """ Longest predicted processing time first (ties: larger file first) """
+    return sorted(jobs, key=lambda job: (-job.predicted_seconds, -job.size, job.name))
+
+
+def get_lpt_makespan(seconds: List[float], workers: int) -> float:
+    """ Makespan if the jobs (in this order) are always given to the worker that becomes free first """
+    finish_times = [0.0] * max(workers, 1)
+    for job_seconds in seconds:
+        heapq.heapreplace(finish_times, finish_times[0] + job_seconds)
+    return max(finish_times)
+
+
+def get_run_report(jobs: List[DocumentJob], workers: int, wall_seconds: float) -> pd.DataFrame:
+    """ Predicted vs. actual cost per document. The makespans (predicted, actual with the LPT order and actual with
+    the order of the directory listing) are stored in DataFrame.attrs """
+    rows = list()
+    for rank, job in enumerate(jobs):
+        rows.append({'rank': rank, 'NamePDF': job.name, 'pages': job.pages, 'size': job.size,
+                     'prediction_source': job.prediction_source, 'predicted_seconds': job.predicted_seconds,
+                     'actual_seconds': job.actual_seconds,
+                     'error_seconds': None if job.actual_seconds is None else
+                     job.actual_seconds - job.predicted_seconds})
+    report = pd.DataFrame(rows)
+    done = [job for job in jobs if job.actual_seconds is not None]
+    report.attrs['workers'] = workers
+    report.attrs['wall_seconds'] = wall_seconds
+    report.attrs['predicted_makespan'] = get_lpt_makespan(seconds=[job.predicted_seconds for job in jobs],
+                                                          workers=workers)
+    report.attrs['lpt_makespan'] = get_lpt_makespan(seconds=[job.actual_seconds for job in done], workers=workers)
+    report.attrs['unordered_makespan'] = get_lpt_makespan(
+        seconds=[job.actual_seconds for job in sorted(done, key=lambda job: job.path)], workers=workers)
+    report.attrs['mean_absolute_error_seconds'] = statistics.mean(
+        abs(job.actual_seconds - job.predicted_seconds) for job in done) if len(done) > 0 else None
+    return report
+
+
+def get_report_summary(report: pd.DataFrame) -> Dict[str, float]:
+    return {key: round(value, 4) if isinstance(value, float) else value for key, value in report.attrs.items()}
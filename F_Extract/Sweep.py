@@ -0,0 +1,195 @@
+import os
+import ast
+import math
+import logging
+import time
+import itertools
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List, Set
+import pandas as pd
+
+from A_Configuration_and_Logs.conf_and_log import ConfLog
+from A_Configuration_and_Logs.log_setup import configure_worker_logging, get_log_queue
+from D_Search.PDFMiner import PDFMiner, PageSearch
+from D_Search.Sources import is_archive_member, read_document, get_document_name
+from F_Extract.Extract import extract_results_of_documents, get_find_word_settings
+from F_Extract.Prefetch import get_pdf_paths
+
+""" Parameter sweep: every pdf doc is parsed and tokenized (PageText) ONCE, then every combination of settings in the
+    grid is evaluated on these shared pages (in parallel worker processes) and scored against the ground truth.
+
+    Usage (the __main__ guard is needed for the worker processes on Windows):
+        if __name__ == '__main__':
+            result = sweep(grid={'D_Search': {'neighbour_x_tolerance': [4.0, 6.0], 'decimals': [0, 1]},
+                                 'F_Extract': {'number_of_table_vals_to_include': [1, 3]}})
+"""
+
+SWEEPABLE_SECTIONS = ('D_Search', 'F_Extract')
+""" The settings that the evaluation of a combination reads (PageSearch.find_word_in_pages and
+    extract_results_of_documents). Settings of the parse (backend, page_priority, layout), of the year of the documents
+    (standard_year_if_year_not_found: the year is detected once, year_regex only filters the values again), of the
+    stores and of the paths would have no effect on the already tokenized pages. """
+SWEEPABLE_SETTINGS = {
+    'D_Search': ('keyword_dict_of_lists', 'search_word_list', 'year_regex', 'unit_list', 'neighbour_x_tolerance',
+                 'neighbour_y_tolerance', 'table_x_tolerance', 'table_y_tolerance',
+                 'min_num_int_digits_in_searched_value', 'decimals', 'approximate', 'approximate_max_errors',
+                 'approximate_min_length', 'multi_year', 'multi_year_min_years', 'sentence_segmentation'),
+    'F_Extract': ('number_of_vals_to_include', 'number_of_text_vals_to_include', 'number_of_neighbour_vals_to_include',
+                  'number_of_table_vals_to_include')}
+
+""" Pages of all documents in a worker process (set once by the initializer of the process pool) """
+_sweep_documents = None
+
+
+def get_settings_grid(grid: Dict[str, Dict[str, list]], conf_log: ConfLog) -> List[Dict[str, Dict[str, str]]]:
+    """ {'D_Search': {'decimals': [0, 1]}, 'F_Extract': {...}} -> list of all combinations as ConfLog overrides """
+    keys = list()
+    values = list()
+    for section, settings in grid.items():
+        if section not in SWEEPABLE_SECTIONS:
+            raise KeyError(f'Only settings in {SWEEPABLE_SECTIONS} can be swept, the layout needs a new parse ! ')
+        for key, key_values in settings.items():
+            if key not in conf_log.config[section]:
+                raise KeyError(f'Unknown setting {key} in section {section} ! ')
+            if key not in SWEEPABLE_SETTINGS[section]:
+                raise KeyError(f'Setting {key} in section {section} has no effect on the tokenized pages, see '
+                               f'SWEEPABLE_SETTINGS ! ')
+            keys.append((section, key))
+            values.append(key_values)
+    settings_grid = list()
+    for combination in itertools.product(*values):
+        overrides = dict()
+        for (section, key), value in zip(keys, combination):
+            overrides.setdefault(section, dict())[key] = str(value)
+        settings_grid.append(overrides)
+    return settings_grid
+
+
+def tokenize_documents(paths: List[str], conf_log: ConfLog) -> List[dict]:
+    """ Parses every pdf doc once. The year (table_keywords) is taken from the current config.ini. """
+    documents = list()
+    for path in paths:
+        try:
+            data = read_document(path=path) if is_archive_member(path=path) else None
+            miner = PDFMiner(path=path, conf_log=conf_log, data=data)
+            try:
+                table_keywords = miner.get_year_and_fy()
+                page_texts = list(miner.iter_page_texts())
+            finally:
+                miner.close()
+            documents.append({'name': get_document_name(path=path), 'table_keywords': table_keywords,
+                              'page_texts': page_texts})
+        except Exception as e:
+            conf_log.logging.error(e, exc_info=True)
+    return documents
+
+
+def _init_sweep_worker(documents: List[dict], log_queue=None, log_level: int = logging.ERROR):
+    global _sweep_documents
+    _sweep_documents = documents
+    if log_queue is not None:
+        configure_worker_logging(queue=log_queue, level=log_level)
+
+
+def evaluate_settings(overrides: Dict[str, Dict[str, str]], documents: List[dict] = None) -> dict:
+    """ Runs find_word (on the already tokenized pages) plus E_Collect/F_Extract for all documents """
+    documents = _sweep_documents if documents is None else documents
+    conf_log = ConfLog(overrides=overrides)
+    start = time.perf_counter()
+    searched_documents = list()
+    for document in documents:
+        page_search = PageSearch(conf_log=conf_log)
+        search_result = page_search.find_word_in_pages(page_texts=document['page_texts'],
+                                                       table_keywords=document['table_keywords'],
+                                                       **get_find_word_settings(conf_log=conf_log))
+        searched_documents.append({'search_result': search_result,
+                                   'matching_sentences': page_search.matching_sentences,
+                                   'table_keywords': document['table_keywords'], 'name': document['name']})
+    """ E_Collect/F_Extract of all documents at once """
+    results = extract_results_of_documents(documents=searched_documents, conf_log=conf_log)
+    return {'overrides': overrides, 'results': results, 'seconds': time.perf_counter() - start}
+
+
+def parse_ground_truth_values(cell) -> Set[float] or None:
+    """ Cells look like "['7,477', '8,231']" or "[]". Empty cells (NaN) are unknown and return None. """
+    if cell is None or (isinstance(cell, float) and math.isnan(cell)):
+        return None
+    try:
+        values = ast.literal_eval(str(cell))
+    except (ValueError, SyntaxError):
+        return None
+    numbers = set()
+    for value in values if isinstance(values, (list, tuple, set)) else [values]:
+        try:
+            numbers.add(float(str(value).replace(',', '')))
+        except ValueError:
+            pass
+    return numbers
+
+
+def load_ground_truth(path: str, scopes: List[str]) -> Dict[str, Dict[str, Set[float] or None]]:
+    ground_truth_df = pd.read_excel(path)
+    ground_truth = dict()
+    for _, row in ground_truth_df.iterrows():
+        ground_truth[str(row['NamePDF'])] = {scope: parse_ground_truth_values(row[scope]) if scope in row else None
+                                             for scope in scopes}
+    return ground_truth
+
+
+def score_results(results: List[dict], ground_truth: Dict[str, Dict[str, Set[float] or None]],
+                  scopes: List[str]) -> dict:
+    """ accuracy: share of (document, scope) pairs with a known ground truth where the first (most frequent) result
+    value is in the ground truth (or where both are empty). recall: share of ground truth values found at all. """
+    evaluated = correct = truth_values = found_values = 0
+    for result in results:
+        truth_of_document = ground_truth.get(result['NamePDF'])
+        if truth_of_document is None:
+            continue
+        for scope in scopes:
+            truth = truth_of_document.get(scope)
+            if truth is None:
+                continue
+            predicted = result.get(scope, [])
+            evaluated += 1
+            if (len(truth) == 0 and len(predicted) == 0) or (len(predicted) > 0 and predicted[0] in truth):
+                correct += 1
+            truth_values += len(truth)
+            found_values += len(truth.intersection(predicted))
+    return {'evaluated': evaluated, 'accuracy': correct / evaluated if evaluated > 0 else None,
+            'recall': found_values / truth_values if truth_values > 0 else None}
+
+
+def sweep(grid: Dict[str, Dict[str, list]], paths: List[str] = None, ground_truth_path: str = None,
+          max_workers: int = None) -> pd.DataFrame:
+    """ Returns one row per combination of settings with its accuracy, recall and runtime (in seconds, without the
+    parsing which is done once for all combinations and stored in DataFrame.attrs['parse_seconds']) """
+    conf_log = ConfLog()
+    settings_grid = get_settings_grid(grid=grid, conf_log=conf_log)
+    if paths is None:
+        """ Like analyze_pdfs: the pdf docs and the members of ZIP/TAR archives """
+        paths = get_pdf_paths(directory=conf_log.path_to_reports_for_analysis_directory)
+    scopes = list(conf_log.keyword_dict_of_lists.keys())
+    ground_truth = load_ground_truth(path=ground_truth_path or conf_log.sweep_ground_truth_path, scopes=scopes)
+    max_workers = max_workers or conf_log.sweep_max_workers or os.cpu_count()
+
+    start = time.perf_counter()
+    documents = tokenize_documents(paths=paths, conf_log=conf_log)
+    parse_seconds = time.perf_counter() - start
+
+    if max_workers == 1:
+        evaluations = [evaluate_settings(overrides=overrides, documents=documents) for overrides in settings_grid]
+    else:
+        with ProcessPoolExecutor(max_workers=max_workers, initializer=_init_sweep_worker,
+                                 initargs=(documents, get_log_queue(), logging.getLogger().level)) as executor:
+            evaluations = list(executor.map(evaluate_settings, settings_grid))
+
+    rows = list()
+    for evaluation in evaluations:
+        row = {f'{section}.{key}': value for section, settings in evaluation['overrides'].items() for key, value in
+               settings.items()}
+        row.update(score_results(results=evaluation['results'], ground_truth=ground_truth, scopes=scopes))
+        row['seconds'] = evaluation['seconds']
+        rows.append(row)
+    result_df = pd.DataFrame(rows)
+    result_df.attrs['parse_seconds'] = parse_seconds
+    return result_df
@@ -0,0 +1,5 @@
+import os
+import sys
+
+""" The packages of the repository (A_Configuration_and_Logs, D_Search, ...) are imported from its root """
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -0,0 +1,39 @@
+import pytest
+
+from D_Search.ApproximateMatch import ApproximateKeyword, ApproximateMatcher, fold
+
+
+def test_fold_keeps_positions():
+    assert fold('Sc0pe l') == fold('SCOPE 1') == fold('scope |')
+    assert fold('CO₂e') == fold('co2e')
+    assert len(fold('Scope 1\xa0emissions')) == len('Scope 1\xa0emissions')
+
+
+@pytest.mark.parametrize('line, matches', [
+    ('Total Sc0pe l emissions', [(6, 13, 0)]),
+    ('SCOPE 1 and Scope l', [(0, 7, 0), (12, 19, 0)]),
+    ('Scopee 1 emissions', [(0, 8, 1)]),
+    ('Scpe 1 emissions', [(0, 6, 1)]),
+    ('Scopel emissions', [(0, 6, 1)])])
+def test_folded_and_approximate_occurrences(line, matches):
+    assert ApproximateKeyword(keyword='Scope 1').find(line=line) == matches
+
+
+@pytest.mark.parametrize('line', ['Scope 2 emissions', 'Scope 3: 1000 t', 'Scope emissions'])
+def test_digits_are_protected(line):
+    """ a digit of the keyword can not be substituted or deleted: "Scope 1" is not found in "Scope 2" """
+    assert ApproximateKeyword(keyword='Scope 1').find(line=line) == []
+
+
+def test_short_keywords_are_only_folded():
+    keyword = ApproximateKeyword(keyword='CO2e')
+    assert keyword.max_errors == 0
+    assert keyword.find(line='C02e and CO3e') == [(0, 4, 0)]
+
+
+def test_matcher_reports_every_keyword_name():
+    matcher = ApproximateMatcher(keywords=['Scope 1', 'scope 1', 'Scope 2'])
+    assert len(matcher.keywords) == 2
+    assert matcher.find(line='Sc0pe l: 1000 t; Scope 2: 71 t') == [('Scope 1', 0, 7), ('scope 1', 0, 7),
+                                                                     ('Scope 2', 17, 24)]
+    assert matcher.find(line='no keyword in this line') == []
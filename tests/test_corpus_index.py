@@ -0,0 +1,34 @@
+import pytest
+
+from D_Search.CorpusIndex import CorpusIndex
+
+
+def get_failing_page_texts():
+    raise ValueError('damaged page')
+    yield
+
+
+def test_failing_document_leaves_nothing_behind(tmp_path):
+    index = CorpusIndex(path=str(tmp_path / 'index.sqlite'))
+    with pytest.raises(ValueError):
+        index.add_document(name='damaged.pdf', document_hash='a', extraction_fingerprint='f', table_keywords=[],
+                           page_texts=get_failing_page_texts())
+    index.add_document(name='ok.pdf', document_hash='b', extraction_fingerprint='f', table_keywords=['2020'],
+                       page_texts=[])
+    index.close()
+    index = CorpusIndex(path=str(tmp_path / 'index.sqlite'))
+    assert [name for _, name, _ in index.get_documents()] == ['ok.pdf']
+    index.close()
+
+
+def test_failing_reindex_keeps_the_indexed_document(tmp_path):
+    index = CorpusIndex(path=str(tmp_path / 'index.sqlite'))
+    document_id = index.add_document(name='report.pdf', document_hash='a', extraction_fingerprint='f',
+                                     table_keywords=['2020'], page_texts=[])
+    with pytest.raises(ValueError):
+        index.add_document(name='report.pdf', document_hash='a', extraction_fingerprint='f', table_keywords=['2021'],
+                           page_texts=get_failing_page_texts())
+    assert index.get_documents() == [(document_id, 'report.pdf', ['2020'])]
+    index.remove_document(document_id=document_id)
+    assert index.get_documents() == []
+    index.close()
@@ -0,0 +1,65 @@
+import random
+
+import pytest
+
+from E_Collect.Collect import get_values_and_page_numbers
+from E_Collect.FindingsFrame import get_number_and_pages_dicts
+from F_Extract.Extract import aggregate_results
+
+SCOPES = ['Scope1', 'Scope2', 'Scope3', 'Scope1und2']
+METHODS = ('neighbour_values', 'table_values', 'text_values')
+
+
+def get_search_results(seed: int, num_of_documents: int = 50) -> list:
+    generator = random.Random(seed)
+    documents = list()
+    for _ in range(num_of_documents):
+        search_results = list()
+        for page_number in sorted(generator.sample(range(1, 60), generator.randint(0, 8))):
+            page_findings = {'page_number': page_number}
+            for scope in SCOPES:
+                if generator.random() < 0.5:
+                    page_findings[scope] = {
+                        method: set(float(generator.choice([10, 20, 30, 40, 1000, 2000]))
+                                    for _ in range(generator.randint(0, 3))) for method in METHODS}
+            search_results.append(page_findings)
+        documents.append(search_results)
+    return documents
+
+
+def aggregate_per_document(search_results: list, num_of_return_values_of_methods: dict,
+                           num_of_return_values: int) -> dict:
+    """ The number_and_pages_dict of one document the way it was built before the findings frame """
+    keyword_dict = {scope: list() for scope in SCOPES}
+    table = get_values_and_page_numbers(search_results, keyword_dict, num_of_return_values_of_methods['table_values'],
+                                        'table_values')
+    neighbour = get_values_and_page_numbers(search_results, keyword_dict,
+                                            num_of_return_values_of_methods['neighbour_values'], 'neighbour_values')
+    text = get_values_and_page_numbers(search_results, keyword_dict, num_of_return_values_of_methods['text_values'],
+                                       'text_values')
+    return aggregate_results(neighbour, table, text, num_of_return_values)
+
+
+@pytest.mark.parametrize('neighbour, table, text, num_of_return_values', [
+    (1, 3, 1, 3), (2, 2, 2, 2), (3, 3, 3, 5), (1, 1, 1, 1),
+    # distinct numbers per method: the mapped limits used to stay categorical
+    (1, 2, 3, 3), (3, 2, 1, 2)])
+def test_parity_with_aggregate_results(neighbour, table, text, num_of_return_values):
+    documents = get_search_results(seed=1)
+    num_of_return_values_of_methods = {'neighbour_values': neighbour, 'table_values': table, 'text_values': text}
+    number_and_pages_dicts = get_number_and_pages_dicts(
+        search_results=list(enumerate(documents)), scopes=SCOPES,
+        num_of_return_values_of_methods=num_of_return_values_of_methods, num_of_return_values=num_of_return_values)
+    for document, search_results in enumerate(documents):
+        expected = aggregate_per_document(search_results, num_of_return_values_of_methods, num_of_return_values)
+        assert number_and_pages_dicts[document] == expected
+        assert all(type(value) is float for scope in SCOPES for value in number_and_pages_dicts[document][scope])
+
+
+def test_document_without_findings():
+    number_and_pages_dicts = get_number_and_pages_dicts(
+        search_results=[(0, [])], scopes=SCOPES,
+        num_of_return_values_of_methods={'neighbour_values': 1, 'table_values': 2, 'text_values': 3},
+        num_of_return_values=3)
+    assert number_and_pages_dicts[0] == aggregate_per_document([], {'neighbour_values': 1, 'table_values': 2,
+                                                                    'text_values': 3}, 3)
@@ -0,0 +1,54 @@
+import json
+import logging
+import threading
+
+from A_Configuration_and_Logs import log_setup
+from A_Configuration_and_Logs.log_setup import DebugRateLimitFilter, JsonLinesFormatter, LogContextFilter, \
+    log_context
+
+
+def get_record(message: str, level: int = logging.DEBUG, name: str = 'D_Search') -> logging.LogRecord:
+    return logging.LogRecord(name=name, level=level, pathname=__file__, lineno=1, msg=message, args=(1,),
+                             exc_info=None)
+
+
+def test_debug_records_are_limited_per_message_and_interval(monkeypatch):
+    now = [100.0]
+    monkeypatch.setattr(log_setup.time, 'monotonic', lambda: now[0])
+    rate_limit = DebugRateLimitFilter(max_records=2, interval=1.0)
+    assert [rate_limit.filter(get_record('page %s')) for _ in range(4)] == [True, True, False, False]
+    """ another message (template) or another logger has its own limit """
+    assert rate_limit.filter(get_record('document %s'))
+    assert rate_limit.filter(get_record('page %s', name='F_Extract'))
+    now[0] += 1.0
+    assert rate_limit.filter(get_record('page %s'))
+
+
+def test_info_records_are_never_dropped():
+    rate_limit = DebugRateLimitFilter(max_records=1, interval=60.0)
+    assert all(rate_limit.filter(get_record('page %s', level=logging.INFO)) for _ in range(5))
+    assert all(DebugRateLimitFilter(max_records=0).filter(get_record('page %s')) for _ in range(5))
+
+
+def test_rate_limit_is_thread_safe():
+    rate_limit = DebugRateLimitFilter(max_records=10, interval=60.0)
+    passed = list()
+
+    def log():
+        passed.extend(rate_limit.filter(get_record('page %s')) for _ in range(500))
+
+    threads = [threading.Thread(target=log) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert sum(passed) == 10
+
+
+def test_json_lines_carry_the_log_context():
+    record = get_record('page %s', level=logging.WARNING)
+    with log_context(document='Report_2020.pdf', stage='search'):
+        LogContextFilter().filter(record)
+    entry = json.loads(JsonLinesFormatter().format(record))
+    assert (entry['level'], entry['message'], entry['document'], entry['page'], entry['stage']) == \
+        ('WARNING', 'page 1', 'Report_2020.pdf', None, 'search')
@@ -0,0 +1,15 @@
+import pytest
+
+from D_Search.PDFMiner import num_of_int_digits, single_digit_num_is_point_zero
+
+
+@pytest.mark.parametrize('word, digits', [('1000', 4), ('71.5', 2), ('0.5', 1), ('0', 0), (2020.0, 4),
+                                          ('-12', 2), ('-1000.0', 4), ('-0.5', 1)])
+def test_num_of_int_digits(word, digits):
+    """ negative numbers have as many int digits as positive ones (they used to raise a math domain error) """
+    assert num_of_int_digits(word=word) == digits
+
+
+def test_single_digit_num_is_point_zero():
+    assert single_digit_num_is_point_zero('3') and single_digit_num_is_point_zero('-3.0')
+    assert not single_digit_num_is_point_zero('3.5') and not single_digit_num_is_point_zero('30')
@@ -0,0 +1,65 @@
+import os
+import shutil
+import zipfile
+
+import pytest
+
+from F_Extract.Scheduler import DocumentJob, RunHistory, estimate_jobs, get_document_key, get_lpt_makespan, \
+    get_lpt_order
+
+SAMPLE_REPORT = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'B_Reports',
+                             'Sample_Reports', 'SiemensPage27.pdf')
+
+
+def get_job(name: str, predicted_seconds: float, size: int) -> DocumentJob:
+    job = DocumentJob(path=name, document_hash=name, pages=None, size=size)
+    job.predicted_seconds = predicted_seconds
+    return job
+
+
+def test_lpt_order_longest_first_ties_by_size_and_name():
+    jobs = [get_job('a.pdf', 1.0, 10), get_job('b.pdf', 5.0, 10), get_job('c.pdf', 1.0, 20),
+            get_job('d.pdf', 1.0, 10)]
+    assert [job.name for job in get_lpt_order(jobs=jobs)] == ['b.pdf', 'c.pdf', 'a.pdf', 'd.pdf']
+
+
+def test_lpt_makespan():
+    assert get_lpt_makespan(seconds=[5, 4, 3, 3, 3], workers=2) == 10
+    assert get_lpt_makespan(seconds=[5, 4, 3, 3, 3], workers=1) == 18
+    assert get_lpt_makespan(seconds=[], workers=4) == 0
+
+
+@pytest.fixture
+def paths(tmp_path):
+    path = str(tmp_path / 'Report.pdf')
+    shutil.copyfile(SAMPLE_REPORT, path)
+    archive_path = str(tmp_path / 'vendor.zip')
+    with zipfile.ZipFile(archive_path, 'w') as archive:
+        archive.write(SAMPLE_REPORT, arcname='Member.pdf')
+    return [path, archive_path + '::Member.pdf']
+
+
+def test_estimate_without_history(paths, tmp_path):
+    history = RunHistory(path=str(tmp_path / 'history.sqlite'))
+    file_job, member_job = estimate_jobs(paths=paths, history=history)
+    assert (file_job.pages, file_job.prediction_source, file_job.predicted_seconds) == (1, 'pages', 0.5)
+    """ a member of an archive is not read: it is estimated by its size (like the file of the same size) """
+    assert (member_job.pages, member_job.prediction_source) == (None, 'size')
+    assert member_job.size == file_job.size == os.path.getsize(SAMPLE_REPORT)
+    assert member_job.predicted_seconds == pytest.approx(0.5)
+    history.close()
+
+
+def test_estimate_from_history(paths, tmp_path):
+    history = RunHistory(path=str(tmp_path / 'history.sqlite'))
+    history.record(document_hash=get_document_key(path=paths[0]), name='Report.pdf', pages=1,
+                   size=os.path.getsize(paths[0]), seconds=3.0)
+    file_job, member_job = estimate_jobs(paths=paths, history=history)
+    assert (file_job.prediction_source, file_job.predicted_seconds) == ('history', 3.0)
+    """ the seconds per page of the history """
+    assert member_job.predicted_seconds == pytest.approx(3.0)
+    """ a changed file is another document """
+    stat = os.stat(paths[0])
+    os.utime(paths[0], ns=(stat.st_atime_ns, stat.st_mtime_ns + 10 ** 9))
+    assert estimate_jobs(paths=paths[:1], history=history)[0].prediction_source == 'pages'
+    history.close()
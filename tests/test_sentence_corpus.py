@@ -0,0 +1,80 @@
+import gzip
+import json
+import os
+
+from D_Search.SentenceCorpus import BloomFilter, SentenceCorpus
+
+
+def read_sentences(path: str) -> list:
+    with gzip.open(path, 'rt', encoding='utf-8') as stream:
+        return [json.loads(line)['sentence'] for line in stream]
+
+
+def test_bloom_filter_add_and_contains():
+    bloom_filter = BloomFilter(expected_items=1000, false_positive_rate=0.001)
+    assert bloom_filter.add('Scope 1 emissions were 1000 t.')
+    assert not bloom_filter.add('Scope 1 emissions were 1000 t.')
+    assert 'Scope 1 emissions were 1000 t.' in bloom_filter
+    assert 'Scope 2 emissions were 71 t.' not in bloom_filter
+    assert bloom_filter.count == 1
+
+
+def test_bloom_filter_save_and_load(tmp_path):
+    path = str(tmp_path / 'filter.bloom')
+    bloom_filter = BloomFilter(expected_items=1000)
+    bloom_filter.add('sentence')
+    bloom_filter.save(path=path, metadata={'corpus_size': 42})
+    loaded = BloomFilter(expected_items=1000)
+    assert loaded.load(path=path)
+    assert 'sentence' in loaded and loaded.count == 1 and loaded.metadata == {'corpus_size': 42}
+    assert not BloomFilter(expected_items=10).load(path=path)
+    assert not os.path.exists(path + '.tmp')
+
+
+def test_sentences_are_written_once_over_runs(tmp_path):
+    path = str(tmp_path / 'corpus.jsonl.gz')
+    corpus = SentenceCorpus(path=path, expected_sentences=1000)
+    corpus.add(document='a.pdf', page_number=1, sentences_by_scope={'Scope1': {'Scope 1:  1000 t'}})
+    corpus.close()
+    corpus = SentenceCorpus(path=path, expected_sentences=1000)
+    corpus.add(document='b.pdf', page_number=3, sentences_by_scope={'Scope1': {'Scope 1: 1000 t'},
+                                                                    'Scope2': {'Scope 2: 71 t'}})
+    assert corpus.get_stats() == {'sentences_written': 1, 'sentence_duplicates': 1, 'sentences_in_corpus': 2}
+    corpus.close()
+    assert read_sentences(path) == ['Scope 1: 1000 t', 'Scope 2: 71 t']
+
+
+def test_missing_filter_is_rebuilt(tmp_path):
+    path = str(tmp_path / 'corpus.jsonl.gz')
+    corpus = SentenceCorpus(path=path, expected_sentences=1000)
+    corpus.add(document='a.pdf', page_number=1, sentences_by_scope={'Scope1': {'Scope 1: 1000 t'}})
+    corpus.close()
+    os.remove(path + '.bloom')
+    corpus = SentenceCorpus(path=path, expected_sentences=1000)
+    corpus.add(document='a.pdf', page_number=1, sentences_by_scope={'Scope1': {'Scope 1: 1000 t'}})
+    assert corpus.get_stats()['sentence_duplicates'] == 1
+    corpus.close()
+
+
+def test_damaged_end_is_cut_off_before_appending(tmp_path):
+    path = str(tmp_path / 'corpus.jsonl.gz')
+    corpus = SentenceCorpus(path=path, expected_sentences=1000)
+    corpus.add(document='a.pdf', page_number=1, sentences_by_scope={'Scope1': {'Scope 1: 1000 t'}})
+    corpus.close()
+    """ A killed run: its member has no end (and the filter was not saved) """
+    records = ''.join(json.dumps({'document': 'b.pdf', 'page': page, 'scopes': ['Scope2'],
+                                  'sentence': f'Scope 2 of page {page}: 71 t'}) + '\n' for page in range(200))
+    killed_member = gzip.compress(records.encode(), compresslevel=0)
+    with open(path, 'ab') as stream:
+        stream.write(killed_member[:len(killed_member) // 2])
+    corpus = SentenceCorpus(path=path, expected_sentences=1000)
+    corpus.add(document='c.pdf', page_number=5, sentences_by_scope={'Scope3': {'Scope 3: 5 t'}})
+    corpus.close()
+    sentences = read_sentences(path)
+    assert sentences[0] == 'Scope 1: 1000 t' and sentences[-1] == 'Scope 3: 5 t'
+    salvaged = sentences[1:-1]
+    assert 0 < len(salvaged) < 200
+    assert salvaged == [f'Scope 2 of page {page}: 71 t' for page in range(len(salvaged))]
+    corpus = SentenceCorpus(path=path, expected_sentences=1000)
+    assert corpus.get_stats()['sentences_in_corpus'] == len(sentences)
+    corpus.close()
@@ -0,0 +1,50 @@
+import pytest
+
+from D_Search.ApproximateMatch import get_keyword_matchers
+from D_Search.SentenceIndex import PageSentenceIndex, split_sentences
+
+
+@pytest.mark.parametrize('text, sentences', [
+    ('Scope 1 emissions were approx. 1,000 t CO2e in 2020. Scope 2 emissions were 71 t.',
+     ['Scope 1 emissions were approx. 1,000 t CO2e in 2020', 'Scope 2 emissions were 71 t']),
+    ('Die Emissionen (z.B. Scope 1) betrugen 12.345,6 t. Das ist gut!',
+     ['Die Emissionen (z.B. Scope 1) betrugen 12.345,6 t', 'Das ist gut']),
+    ('Energy use (e.g. gas) rose. Source: Siemens Corp. Annual report',
+     ['Energy use (e.g. gas) rose', 'Source: Siemens Corp. Annual report']),
+    ('Emissions fell by 1.5 million t. see Fig. 3 for details. Next one? Yes',
+     ['Emissions fell by 1.5 million t. see Fig. 3 for details', 'Next one', 'Yes']),
+    ('', [])])
+def test_abbreviations_and_numbers_stay_in_their_sentence(text, sentences):
+    assert split_sentences(text=text) == sentences
+
+
+def test_period_segmentation():
+    assert split_sentences(text='approx. 1.5 t. Next', segmentation='period') == ['approx', ' 1', '5 t', ' Next']
+
+
+def test_unknown_segmentation():
+    with pytest.raises(ValueError):
+        split_sentences(text='Scope 1.', segmentation='spacy')
+
+
+def test_matching_sentences_of_the_page():
+    index = PageSentenceIndex(texts=['Scope 1 emissions were approx. 1,000 t CO2e. No  data\non Scope 2.'],
+                              keywords_dict_of_list={'Scope1': ['Scope 1'], 'Scope2': ['Scope 2']},
+                              search_word_list=['CO2e'])
+    assert index.get_matching_sentences(keywords_key='Scope1') == {'Scope 1 emissions were approx. 1,000 t CO2e'}
+    """ "No data on Scope 2" has no search word """
+    assert index.get_matching_sentences(keywords_key='Scope2') == set()
+    assert [sentence for sentence, _, _ in index.sentences] == ['Scope 1 emissions were approx. 1,000 t CO2e',
+                                                                 'No data on Scope 2']
+
+
+def test_keywords_of_the_sentences_with_ocr_errors():
+    keywords_dict_of_list = {'Scope1': ['Scope 1'], 'Scope2': ['Scope 2']}
+    texts = ['Sc0pe l emissions were 1,000 t CO2e. Scope 2 emissions were 71 t CO2e.']
+    exact = PageSentenceIndex(texts=texts, keywords_dict_of_list=keywords_dict_of_list, search_word_list=['CO2e'])
+    assert exact.get_matching_sentences(keywords_key='Scope1') == set()
+    approximate = PageSentenceIndex(texts=texts, keywords_dict_of_list=keywords_dict_of_list,
+                                    search_word_list=['CO2e'],
+                                    keyword_matchers=get_keyword_matchers(keywords_dict_of_list=keywords_dict_of_list))
+    assert approximate.get_matching_sentences(keywords_key='Scope1') == {'Sc0pe l emissions were 1,000 t CO2e'}
+    assert approximate.get_matching_sentences(keywords_key='Scope2') == {'Scope 2 emissions were 71 t CO2e'}
@@ -0,0 +1,73 @@
+import io
+import os
+import tarfile
+import zipfile
+
+import pytest
+
+from D_Search.Sources import get_archive_member_paths, get_document_identity, get_document_name, \
+    get_document_size, is_archive_member, read_document, split_member_path
+
+DOCUMENTS = {'reports/Report_2020.pdf': b'%PDF-1.4 report 2020', 'Report_2021.PDF': b'%PDF-1.4 report 2021 ' * 100}
+
+
+def write_zip(path: str):
+    with zipfile.ZipFile(path, 'w', compression=zipfile.ZIP_DEFLATED) as archive:
+        archive.writestr('reports/', b'')
+        archive.writestr('readme.txt', b'no pdf')
+        for name, data in DOCUMENTS.items():
+            archive.writestr(name, data)
+
+
+def write_tar(path: str, mode: str):
+    with tarfile.open(path, mode) as archive:
+        for name, data in [('readme.txt', b'no pdf')] + list(DOCUMENTS.items()):
+            info = tarfile.TarInfo(name=name)
+            info.size, info.mtime = len(data), 1600000000
+            archive.addfile(info, io.BytesIO(data))
+
+
+@pytest.fixture(params=[('vendor.zip', None), ('vendor.tar', 'w:'), ('vendor.tar.gz', 'w:gz')])
+def archive_path(request, tmp_path):
+    name, mode = request.param
+    path = str(tmp_path / name)
+    if mode is None:
+        write_zip(path=path)
+    else:
+        write_tar(path=path, mode=mode)
+    return path
+
+
+def test_members_are_read_without_unpacking(archive_path):
+    member_paths = get_archive_member_paths(archive_path=archive_path)
+    assert member_paths == [archive_path + '::' + name for name in DOCUMENTS]
+    for member_path, (name, data) in zip(member_paths, DOCUMENTS.items()):
+        assert is_archive_member(path=member_path)
+        assert split_member_path(path=member_path) == (archive_path, name)
+        assert get_document_name(path=member_path) == os.path.basename(archive_path) + '::' + name
+        assert read_document(path=member_path) == data
+        assert get_document_size(path=member_path) == len(data)
+    assert os.listdir(os.path.dirname(archive_path)) == [os.path.basename(archive_path)]
+
+
+def test_missing_member(archive_path):
+    with pytest.raises(KeyError):
+        read_document(path=archive_path + '::missing.pdf')
+
+
+def test_identity_of_members_and_files(archive_path, tmp_path):
+    first, second = get_archive_member_paths(archive_path=archive_path)
+    assert get_document_identity(path=first) != get_document_identity(path=second)
+    assert get_document_identity(path=first) == get_document_identity(path=first)
+    path = str(tmp_path / 'Report.pdf')
+    with open(path, 'wb') as stream:
+        stream.write(b'%PDF-1.4')
+    assert not is_archive_member(path=path)
+    assert split_member_path(path=path) == (path, None)
+    assert get_document_name(path=path) == 'Report.pdf'
+    assert read_document(path=path) == b'%PDF-1.4' and get_document_size(path=path) == 8
+    assert get_document_identity(path=path).startswith('Report.pdf:8:')
+
+
+def test_separator_in_a_file_name_is_no_member():
+    assert split_member_path(path='reports/a::b.pdf') == ('reports/a::b.pdf', None)
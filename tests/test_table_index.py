@@ -0,0 +1,52 @@
+from D_Search.TableIndex import PageTableIndex, is_numeric_token
+
+""" A table with the years 2020 and 2019 as column headers and the rows Scope 1 (y 500-510) and Scope 2 (y 480-490) """
+TABLE_KEYWORD_COORDINATES = [(100.0, 600.0, 120.0, 610.0, '2020'), (150.0, 600.0, 170.0, 610.0, '2019')]
+WORD_COORDINATES = [(20.0, 500.0, 60.0, 510.0, 'Scope'), (62.0, 500.0, 66.0, 510.0, '1'),
+                    (101.0, 500.0, 119.0, 510.0, '1,000'), (152.0, 500.0, 165.0, 510.0, '900'),
+                    (20.0, 480.0, 60.0, 490.0, 'Scope'), (62.0, 480.0, 66.0, 490.0, '2'),
+                    (103.0, 480.0, 115.0, 490.0, '71'), (152.0, 480.0, 164.0, 490.0, '68.5'),
+                    (300.0, 480.0, 320.0, 490.0, '99')]
+
+
+def get_index() -> PageTableIndex:
+    return PageTableIndex(word_coordinates=WORD_COORDINATES, table_keyword_coordinates=TABLE_KEYWORD_COORDINATES,
+                          table_x_tolerance=0.5, decimals=1)
+
+
+def test_columns_and_rows():
+    index = get_index()
+    assert index.column_labels == ['2020', '2019']
+    assert not index.is_empty()
+    """ the numbers below the row labels (x 62-66) and outside of the columns (x 300) are in no column """
+    assert index.get_column_labels_of_x_coordinates(x0=62.0, x1=66.0) == []
+    assert index.get_row(y0=499.0, y1=511.0) == {'2020': {'1,000'}, '2019': {'900'}}
+    assert index.get_row(y0=479.0, y1=491.0) == {'2020': {'71'}, '2019': {'68.5'}}
+
+
+def test_values_of_a_column_and_of_all_columns():
+    index = get_index()
+    assert index.get_values(y0=499.0, y1=511.0, column_label='2020') == {'1,000'}
+    assert index.get_values(y0=499.0, y1=511.0, column_label='2018') == set()
+    assert index.get_values(y0=479.0, y1=491.0) == {'71', '68.5'}
+    assert index.get_values(y0=470.0, y1=520.0, column_label='2019') == {'900', '68.5'}
+    """ a row is only found if it lies within the y-band completely """
+    assert index.get_values(y0=485.0, y1=511.0) == {'1,000', '900'}
+    assert index.get_values(y0=300.0, y1=400.0) == set()
+
+
+def test_lookups_are_cached():
+    index = get_index()
+    assert index.get_row(y0=499.0, y1=511.0) is index.get_row(y0=499.0, y1=511.0)
+
+
+def test_page_without_table_keywords_is_empty():
+    index = PageTableIndex(word_coordinates=WORD_COORDINATES, table_keyword_coordinates=[], table_x_tolerance=0.5,
+                           decimals=1)
+    assert index.is_empty() and index.column_labels == []
+
+
+def test_numeric_tokens():
+    assert is_numeric_token('1,000') and is_numeric_token('68.5') and is_numeric_token('-3')
+    assert not is_numeric_token('Scope') and not is_numeric_token('CO2e')
+    assert is_numeric_token('1.000', thousands_separator='.')